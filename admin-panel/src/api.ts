@@ -4,12 +4,16 @@ import type {
   PresetTemplate,
   RunScreenerData,
   ScreenerConditions,
+  BatchScreenerData,
+  SearchSuggestion,
+  DashboardData,
 } from './types'
 
 const BASE = '/api/screener'
 
-export async function fetchRecords(limit = 50): Promise<ApiResponse<ScreenerRecord[]>> {
-  const res = await fetch(`${BASE}/records?limit=${limit}`)
+export async function fetchRecords(limit = 50, cursor = ''): Promise<ApiResponse<ScreenerRecord[]>> {
+  const query = cursor ? `limit=${limit}&cursor=${encodeURIComponent(cursor)}` : `limit=${limit}`
+  const res = await fetch(`${BASE}/records?${query}`)
   return res.json()
 }
 
@@ -40,3 +44,35 @@ export async function runScreener(payload: {
   })
   return res.json()
 }
+
+export async function runScreenerBatch(payload: {
+  preset_keys?: string[]
+  condition_sets?: Record<string, ScreenerConditions>
+  counts_only?: boolean
+} = {}): Promise<ApiResponse<BatchScreenerData>> {
+  const res = await fetch(`${BASE}/batch`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload),
+  })
+  return res.json()
+}
+
+export async function searchStocks(q: string, limit = 10): Promise<ApiResponse<SearchSuggestion[]>> {
+  const res = await fetch(`${BASE}/search?q=${encodeURIComponent(q)}&limit=${limit}`)
+  return res.json()
+}
+
+/** 首屏数据一次取回；fields 为空时返回全部部分 */
+export async function fetchDashboard(options: {
+  fields?: string[]
+  picksLimit?: number
+  recordsLimit?: number
+} = {}): Promise<ApiResponse<DashboardData>> {
+  const params = new URLSearchParams()
+  if (options.fields?.length) params.set('fields', options.fields.join(','))
+  if (options.picksLimit !== undefined) params.set('picks_limit', String(options.picksLimit))
+  if (options.recordsLimit !== undefined) params.set('records_limit', String(options.recordsLimit))
+  const res = await fetch(`/api/dashboard?${params}`)
+  return res.json()
+}
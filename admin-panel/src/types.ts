@@ -1,8 +1,12 @@
 /** 自定义筛选规则 */
 export interface CustomRule {
-  field: string
-  op: 'gt' | 'gte' | 'lt' | 'lte' | 'eq' | 'neq' | 'contains'
-  value: string | number
+  field?: string
+  op?: 'gt' | 'gte' | 'lt' | 'lte' | 'eq' | 'neq' | 'contains'
+  value?: string | number
+  /** 字段间比较：与另一字段比较（替代 value） */
+  value_field?: string
+  /** 公式表达式，例如 tech_score * 0.6 + auction_score * 0.4 > 0.7 */
+  expr?: string
 }
 
 /** 筛选条件 */
@@ -85,6 +89,10 @@ export interface ApiResponse<T = unknown> {
   success: boolean
   message?: string
   data: T
+  /** 键集分页游标，为空表示没有更多数据 */
+  next_cursor?: string | null
+  /** 已提交的后台任务（如候选池为空时的分析任务） */
+  job_id?: string
 }
 
 /** 执行选股响应 data */
@@ -94,6 +102,27 @@ export interface RunScreenerData {
   stocks: StockItem[]
 }
 
+/** 批量选股单组结果 */
+export interface BatchScreenerItem {
+  name: string
+  total: number
+  stocks?: StockItem[]
+}
+
+/** 批量选股响应 data */
+export interface BatchScreenerData {
+  pool_size: number
+  results: Record<string, BatchScreenerItem>
+}
+
+/** 股票搜索联想结果 */
+export interface SearchSuggestion {
+  symbol: string
+  stock_name: string
+  code: string
+  match: 'code_exact' | 'code_prefix' | 'name_prefix' | 'pinyin_prefix' | 'substring'
+}
+
 /** 字段选项 */
 export interface FieldOption {
   value: string
@@ -105,3 +134,21 @@ export interface OpOption {
   value: CustomRule['op']
   label: string
 }
+
+/** 最新推荐快照（仪表盘） */
+export interface DashboardPicks {
+  version: number
+  analysis_date: string
+  analysis_time: string
+  total: number
+  items: Partial<StockItem>[]
+}
+
+/** /api/dashboard 响应 data；只包含 fields 请求的部分 */
+export interface DashboardData {
+  status?: Record<string, unknown>
+  picks?: DashboardPicks | null
+  strategy_config?: Record<string, number | string>
+  presets?: PresetTemplate[]
+  records?: ScreenerRecord[]
+}
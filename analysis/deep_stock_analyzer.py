@@ -19,7 +19,11 @@ warnings.filterwarnings('ignore')
 import requests
 import time
 from typing import Dict, List, Optional, Tuple
-import sqlite3
+
+from backend.services.database import get_database
+from backend.services.deep_reports import report_json
+from backend.services.persistence import DEEP_ANALYSIS_UPSERT, get_persistence_queue
+from backend.services.trading_calendar import trading_date
 
 class DeepStockAnalyzer:
     """深度股票分析引擎 - 集成LLM专业分析"""
@@ -30,71 +34,8 @@ class DeepStockAnalyzer:
         self.init_analysis_database()
         
     def init_analysis_database(self):
-        """初始化深度分析数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 创建深度分析结果表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS deep_analysis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                symbol TEXT NOT NULL,
-                stock_name TEXT,
-                analysis_date TEXT,
-                
-                -- 基础数据
-                current_price REAL,
-                price_change_pct REAL,
-                volume_ratio REAL,
-                market_cap_billion REAL,
-                
-                -- 技术指标详细数据
-                rsi_14 REAL,
-                macd_signal TEXT,
-                ma5 REAL,
-                ma10 REAL,
-                ma20 REAL,
-                ma60 REAL,
-                bollinger_position REAL,
-                
-                -- 资金流向数据
-                main_inflow REAL,
-                retail_inflow REAL,
-                institutional_inflow REAL,
-                net_inflow REAL,
-                
-                -- 竞价分析
-                auction_ratio REAL,
-                auction_volume_ratio REAL,
-                gap_type TEXT,
-                
-                -- LLM分析结果
-                llm_analysis_text TEXT,
-                investment_rating TEXT,
-                confidence_level TEXT,
-                risk_assessment TEXT,
-                
-                -- 投资建议
-                buy_point TEXT,
-                sell_point TEXT,
-                stop_loss_price REAL,
-                target_price REAL,
-                expected_return_pct REAL,
-                holding_period_days INTEGER,
-                position_suggestion REAL,
-                
-                -- 评分
-                technical_score REAL,
-                fundamental_score REAL,
-                sentiment_score REAL,
-                total_score REAL,
-                
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """初始化深度分析数据库（deep_analysis 表结构由 services.database 统一维护）"""
+        self.db = get_database(self.db_path)
     
     def get_comprehensive_stock_data(self, symbol: str) -> Dict:
         """获取股票全量数据 - 分时、日K、资金流等"""
@@ -1000,7 +941,7 @@ class DeepStockAnalyzer:
                 **comprehensive_data,
                 **llm_analysis,
                 **scores,
-                'analysis_date': datetime.now().strftime('%Y-%m-%d'),
+                'analysis_date': trading_date(),
                 'analysis_timestamp': datetime.now().isoformat()
             }
             
@@ -1017,11 +958,8 @@ class DeepStockAnalyzer:
             return {}
     
     def _save_deep_analysis(self, analysis: Dict):
-        """保存深度分析结果到数据库"""
+        """保存深度分析结果（提交到异步持久化队列，由写线程批量落库）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # 提取数据
             symbol = analysis['symbol']
             basic = analysis['basic_info']
@@ -1031,19 +969,7 @@ class DeepStockAnalyzer:
             auction = analysis['auction_data']
             fundamental = analysis['fundamental_data']
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO deep_analysis (
-                    symbol, stock_name, analysis_date,
-                    current_price, price_change_pct, volume_ratio, market_cap_billion,
-                    rsi_14, macd_signal, ma5, ma10, ma20, ma60, bollinger_position,
-                    main_inflow, retail_inflow, institutional_inflow, net_inflow,
-                    auction_ratio, auction_volume_ratio, gap_type,
-                    llm_analysis_text, investment_rating, confidence_level, risk_assessment,
-                    buy_point, sell_point, stop_loss_price, target_price, 
-                    expected_return_pct, holding_period_days, position_suggestion,
-                    technical_score, fundamental_score, sentiment_score, total_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            get_persistence_queue(self.db_path).submit(DEEP_ANALYSIS_UPSERT, (
                 symbol, basic['code_name'], analysis['analysis_date'],
                 price['current_price'], price['price_change_pct'], 
                 price['current_volume'] / price['avg_volume_10d'] if price['avg_volume_10d'] > 0 else 1.0,
@@ -1054,12 +980,10 @@ class DeepStockAnalyzer:
                 analysis['llm_analysis_text'], analysis['investment_rating'], analysis['confidence_level'], analysis['risk_assessment'],
                 analysis['buy_point'], analysis['sell_point'], analysis['stop_loss_price'], analysis['target_price'],
                 analysis['expected_return_pct'], analysis['holding_period_days'], analysis['position_suggestion'],
-                analysis['technical_score'], analysis['fundamental_score'], analysis['sentiment_score'], analysis['total_score']
+                analysis['technical_score'], analysis['fundamental_score'], analysis['sentiment_score'], analysis['total_score'],
+                report_json(analysis)
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             print(f"⚠️ 保存深度分析失败: {e}")
 
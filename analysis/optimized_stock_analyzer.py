@@ -19,45 +19,25 @@ warnings.filterwarnings('ignore')
 class OptimizedStockAnalyzer:
     """优化版股票分析器"""
     
+    # 默认配置（降低筛选条件）
+    CONFIG_DEFAULTS = {
+        'tech_weight': 0.65,
+        'auction_weight': 0.35,
+        'score_threshold': 0.45,  # 降低阈值从0.65到0.45
+        'max_recommendations': 15,
+        'min_price': 2.0,
+        'max_price': 300.0
+    }
+    
     def __init__(self):
         self.fallback_mode = False
         self.analysis_results = {}
         
     def get_strategy_config(self):
-        """获取策略配置"""
+        """获取策略配置（读取策略配置服务的进程内快照，每次分析运行读取一次）"""
         try:
-            import sqlite3
-            conn = sqlite3.connect("data/cchan_web.db")
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT config_key, config_value FROM system_config 
-                WHERE config_key LIKE 'strategy_%'
-            ''')
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            # 默认配置（降低筛选条件）
-            config = {
-                'tech_weight': 0.65,
-                'auction_weight': 0.35,
-                'score_threshold': 0.45,  # 降低阈值从0.65到0.45
-                'max_recommendations': 15,
-                'min_price': 2.0,
-                'max_price': 300.0
-            }
-            
-            for key, value in results:
-                config_name = key.replace('strategy_', '')
-                if config_name in config:
-                    try:
-                        if config_name in ['tech_weight', 'auction_weight', 'score_threshold', 'min_price', 'max_price']:
-                            config[config_name] = float(value)
-                        elif config_name == 'max_recommendations':
-                            config[config_name] = int(value)
-                    except ValueError:
-                        pass
+            from backend.services.strategy_config import get_strategy_config_service
+            config = get_strategy_config_service().snapshot(defaults=self.CONFIG_DEFAULTS)
             
             # 确保阈值不会过高
             if config['score_threshold'] > 0.7:
@@ -67,14 +47,7 @@ class OptimizedStockAnalyzer:
             
         except Exception:
             # 返回宽松的默认配置
-            return {
-                'tech_weight': 0.65,
-                'auction_weight': 0.35,
-                'score_threshold': 0.45,
-                'max_recommendations': 15,
-                'min_price': 2.0,
-                'max_price': 300.0
-            }
+            return dict(self.CONFIG_DEFAULTS)
     
     def get_enhanced_stock_pool(self):
         """获取增强的股票池 - 使用多种策略确保有数据"""
@@ -110,6 +83,14 @@ class OptimizedStockAnalyzer:
                 '创业板': stock_df[stock_df['code'].str.startswith('sz.30')]
             }
             
+            # 保存全市场股票列表，供选股搜索索引使用
+            try:
+                from stock_screener.search_index import save_universe
+                universe = pd.concat(markets.values(), ignore_index=True)
+                save_universe(list(zip(universe['code'], universe['code_name'])))
+            except Exception as e:
+                print(f"⚠️ 保存股票列表失败: {e}")
+            
             sample_stocks = []
             for market_name, market_stocks in markets.items():
                 if len(market_stocks) > 0:
@@ -234,9 +215,13 @@ class OptimizedStockAnalyzer:
         
         return False, "正常股票"
     
-    def analyze_stock_with_fallback(self, symbol, stock_name):
-        """带降级策略的股票分析"""
-        config = self.get_strategy_config()
+    def analyze_stock_with_fallback(self, symbol, stock_name, config=None):
+        """
+        带降级策略的股票分析
+
+        @param {dict} config - 本轮分析的策略配置快照，缺省时单独读取
+        """
+        config = config or self.get_strategy_config()
         
         try:
             # 方案1: 尝试获取真实数据分析
@@ -267,6 +252,16 @@ class OptimizedStockAnalyzer:
             df = rs.get_data()
             bs.logout()
             
+            # 顺带写入本地日线库，供推荐结果跟踪使用
+            try:
+                from backend.services.bar_store import BAR_UPSERT, bar_rows
+                from backend.services.persistence import get_persistence_queue
+                persistence = get_persistence_queue()
+                for row in bar_rows(symbol, df):
+                    persistence.submit(BAR_UPSERT, row)
+            except Exception as e:
+                print(f"⚠️ 写入本地日线失败 {symbol}: {e}")
+            
             if df.empty or len(df) < 5:
                 return None
             
@@ -569,16 +564,23 @@ class OptimizedStockAnalyzer:
         else:
             return np.random.uniform(50, 150)
     
-    def generate_optimized_recommendations(self):
-        """生成优化的股票推荐 - 集成深度分析"""
+    def generate_optimized_recommendations(self, progress=None):
+        """
+        生成优化的股票推荐 - 集成深度分析
+        
+        @param {callable} progress - 进度回调 progress(stage=, processed=, total=)，后台任务用于上报进度
+        """
+        progress = progress or (lambda **kwargs: None)
         print("🚀 开始优化版股票分析（集成LLM深度分析）...")
         
         config = self.get_strategy_config()
         print(f"📊 策略配置: 阈值={config['score_threshold']}, 最大推荐={config['max_recommendations']}")
         
         # 获取股票池
+        progress(stage='获取股票池')
         stock_pool = self.get_enhanced_stock_pool()
         print(f"📋 股票池大小: {len(stock_pool)} 只")
+        progress(stage='逐只分析', processed=0, total=len(stock_pool))
         
         recommendations = []
         analysis_count = 0
@@ -595,6 +597,7 @@ class OptimizedStockAnalyzer:
         
         for symbol, stock_name in stock_pool:
             analysis_count += 1
+            progress(processed=analysis_count)
             
             # 🛡️ 风险股票过滤
             is_risky, risk_reason = self._is_risky_stock(symbol, stock_name)
@@ -616,7 +619,7 @@ class OptimizedStockAnalyzer:
                     print(f"⚠️ {symbol} 深度分析失败: {e}")
             
             # 基础分析
-            result = self.analyze_stock_with_fallback(symbol, stock_name)
+            result = self.analyze_stock_with_fallback(symbol, stock_name, config)
             if result:
                 recommendations.append(result)
                 print(f"✅ {symbol} {stock_name}: {result['total_score']:.3f}")
@@ -630,6 +633,7 @@ class OptimizedStockAnalyzer:
         final_recommendations = recommendations[:config['max_recommendations']]
         
         print(f"🎯 分析完成: {analysis_count}只股票，推荐{len(final_recommendations)}只")
+        progress(stage='生成推荐解释', processed=analysis_count, total=analysis_count)
         
         # 生成统计数据
         if final_recommendations:
@@ -672,12 +676,12 @@ class OptimizedStockAnalyzer:
             
             # >>> Explain Builder Patch - 生成详细HTML解释并保存到数据库
             try:
-                from backend.explain_builder import build_explain_html
-                import sqlite3
-                import os
+                from backend.explain_builder import build_explain_fields, render_explain_html
+                from backend.services.explain_store import blob_writes
+                from backend.services.persistence import STOCK_ANALYSIS_UPSERT, get_persistence_queue
                 
-                conn = sqlite3.connect(os.path.join('.', "data/cchan_web.db"))
-                cur = conn.cursor()
+                # 写入交给持久化队列的写线程批量完成，分析流程不等待磁盘
+                persistence = get_persistence_queue()
                 
                 print(f"🔧 开始为 {len(final_recommendations)} 只股票生成详细解释...")
                 
@@ -700,25 +704,17 @@ class OptimizedStockAnalyzer:
                         else:
                             rec['signal'] = '关注信号'
                         
-                        # 生成HTML解释和价格数据
-                        html_content, prices_json = build_explain_html(
-                            rec['symbol'], 
-                            rec, 
-                            structure_dict
-                        )
+                        # 生成结构化解释字段（数据库只保存字段的内容哈希；走势图按本地日线按需生成）
+                        fields = build_explain_fields(rec['symbol'], rec, structure_dict)
+                        explain_hash, prices_hash, writes = blob_writes(fields)
                         
                         # 保存到推荐字典中
-                        rec['explain_html'] = html_content
-                        rec['mini_prices'] = prices_json
+                        rec['explain_html'] = render_explain_html(fields)
                         
-                        # 保存到数据库
-                        cur.execute('''
-                            INSERT OR REPLACE INTO stock_analysis 
-                            (symbol, stock_name, analysis_date, total_score, tech_score, 
-                             auction_score, confidence, entry_price, stop_loss, target_price, 
-                             explanation, explain_html, mini_prices, created_at)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                        ''', (
+                        # 提交到持久化队列
+                        for statement, params in writes:
+                            persistence.submit(statement, params)
+                        persistence.submit(STOCK_ANALYSIS_UPSERT, (
                             rec['symbol'],
                             rec.get('stock_name', ''),
                             datetime.now().strftime('%Y-%m-%d'),
@@ -730,19 +726,25 @@ class OptimizedStockAnalyzer:
                             rec.get('stop_loss', 0),
                             rec.get('target_price', 0),
                             rec.get('explanation', ''),
-                            html_content,
-                            prices_json
+                            explain_hash,
+                            prices_hash
                         ))
                         
                     except Exception as e:
                         print(f"⚠️ 为股票 {rec.get('symbol', 'unknown')} 生成解释失败: {e}")
                         rec['explain_html'] = f"<div class='text-center py-4 text-gray-500'>解释生成失败: {str(e)}</div>"
-                        rec['mini_prices'] = "[]"
-                
-                conn.commit()
-                conn.close()
-                print(f"✅ 详细解释生成完成，已保存到数据库")
                 
+                print(f"✅ 详细解释生成完成，已提交数据库写入队列")
+
+                # 补齐走势缩略图默认区间的本地日线（只下载缺失部分）
+                try:
+                    from backend.services.bar_store import get_bar_store
+                    from backend.services.mini_charts import DEFAULT_RANGE, RANGES
+                    chart_start = (datetime.now() - timedelta(days=RANGES[DEFAULT_RANGE])).strftime('%Y-%m-%d')
+                    get_bar_store().sync([rec['symbol'] for rec in final_recommendations], chart_start)
+                except Exception as e:
+                    print(f"⚠️ 同步走势图日线失败: {e}")
+
             except Exception as e:
                 print(f"⚠️ 批量生成解释失败: {e}")
             
@@ -11,7 +11,10 @@ import threading
 from datetime import datetime, timedelta
 import logging
 import os
-from daily_report_generator import DailyReportGenerator
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.daily_report_generator import DailyReportGenerator
 
 # 配置日志
 log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
@@ -90,9 +93,8 @@ class TradingDayScheduler:
                     logging.info(f"📭 今日报告已发送，跳过执行")
                     return
                 
-                # 执行分析并发送报告
                 logging.info("📊 开始生成和发送交易日报...")
-                success = self.report_generator.send_daily_report()
+                success = self._analyze_and_send()
                 
                 if success:
                     self.report_sent_today = True
@@ -104,6 +106,15 @@ class TradingDayScheduler:
             except Exception as e:
                 logging.error(f"❌ 执行每日分析时出错: {e}")
     
+    def _analyze_and_send(self) -> bool:
+        """执行全市场分析并发送日报，返回是否发送成功"""
+        # 与 Web 端“立即分析”走同一流程与同一单飞键：同一交易日已在进行或已完成的分析直接复用其结果
+        from backend.services.analysis_runner import run_full_analysis
+        report_data, executed = run_full_analysis()
+        if not executed:
+            logging.info("🔗 复用进行中或已完成的今日分析，未重复分析")
+        return bool(report_data) and self.report_generator.email_sender.send_daily_report(report_data)
+    
     def setup_schedule(self):
         """设置定时任务"""
         # 在9:25-9:29时间段每分钟检查一次
@@ -118,10 +129,34 @@ class TradingDayScheduler:
         # 可选：添加盘后补发时间
         schedule.every().day.at("15:05").do(self.execute_fallback_report)
         
+        # 收盘后回填推荐结果（T+1/T+3/T+5），随后夜间数据维护
+        schedule.every().day.at("20:00").do(self.execute_outcome_tracking)
+        schedule.every().day.at("02:30").do(self.execute_maintenance)
+        
         logging.info("⏰ 定时任务已设置:")
         logging.info("   📊 主要执行时间: 9:25-9:29 (每分钟)")
         logging.info("   🔄 备用执行时间: 9:30")
         logging.info("   📋 盘后补发时间: 15:05")
+        logging.info("   🎯 结果回填时间: 20:00")
+        logging.info("   🧹 数据维护时间: 02:30")
+    
+    def execute_outcome_tracking(self):
+        """回填推荐之后的表现（补齐本地日线后批量计算）"""
+        try:
+            from backend.services.rec_history import get_recommendation_history
+            report = get_recommendation_history().fill_outcomes()
+            logging.info(f"🎯 推荐结果回填完成: {report}")
+        except Exception as e:
+            logging.error(f"❌ 回填推荐结果时出错: {e}")
+    
+    def execute_maintenance(self):
+        """夜间数据维护（保留期归档、VACUUM/ANALYZE）"""
+        try:
+            from backend.services.maintenance import run_maintenance
+            report = run_maintenance()
+            logging.info(f"🧹 数据维护完成: {report}")
+        except Exception as e:
+            logging.error(f"❌ 数据维护时出错: {e}")
     
     def execute_fallback_report(self):
         """盘后补发报告"""
@@ -172,10 +207,10 @@ class TradingDayScheduler:
         """测试模式运行"""
         logging.info("🧪 启动测试模式...")
         
-        # 忽略时间和交易日限制，直接执行
+        # 忽略时间和交易日限制，直接执行（与定时任务同一流程，不额外占用 BaoStock）
         try:
             logging.info("📊 执行测试分析...")
-            success = self.report_generator.send_daily_report()
+            success = self._analyze_and_send()
             
             if success:
                 logging.info("✅ 测试模式执行成功!")
@@ -5,10 +5,11 @@ CChanTrader-AI Web管理平台
 Flask Web应用主程序
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, stream_with_context
 import os
 import json
-import sqlite3
+import hashlib
+import fnmatch
 from datetime import datetime, timedelta
 import threading
 import time
@@ -21,15 +22,32 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 导入我们的模块
 from backend.services.email_config import EmailSender
-from backend.daily_report_generator import DailyReportGenerator
-from analysis.trading_day_scheduler import TradingDayScheduler
-from stock_screener.screener import StockScreener
+from backend.services.database import get_database
+from backend.services.strategy_config import STRATEGY_DEFAULTS, get_strategy_config_service
+from backend.services.system_status import get_system_status_service
+from backend.services import analysis_runner
+from backend.services.explain_store import load_latest_detail
+from backend.services.maintenance import FILE_PATTERNS, get_archive_store, retention_config, run_maintenance
+from backend.services.jobs import get_job_manager
+from backend.services.events import TOPICS as EVENT_TOPICS, format_sse, get_event_bus
+from backend.services.single_flight import get_single_flight
+from backend.services.picks_snapshot import CACHE_KEY as PICKS_CACHE_KEY, filter_picks, get_picks_snapshot_service
+from backend.services.shared_cache import get_shared_cache
+from backend.services.deep_reports import get_deep_report_cache
+from backend.services import scheduler_control
+from backend.services.dashboard import DashboardService
+from backend.services.http_cache import conditional, init_compression
 from stock_screener.models import ScreenerRecordManager
+from stock_screener.search_index import get_search_index
+# 分析器、调度器、统计与选股引擎依赖 pandas / akshare / baostock，均在首次使用时导入，
+# 使冷启动与 /health 不必承担这些导入开销
 
 app = Flask(__name__, 
            template_folder='../frontend/templates',
            static_folder='../frontend/static')
 app.secret_key = 'cchan_trader_ai_secret_key'
+# 大于阈值的 JSON / HTML 响应按 Accept-Encoding 压缩（流式响应除外）
+init_compression(app)
 
 
 @app.after_request
@@ -39,7 +57,8 @@ def add_cors_headers(response):
     if origin.startswith('http://localhost:') or origin.startswith('http://127.0.0.1:'):
         response.headers['Access-Control-Allow-Origin'] = origin
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, If-None-Match'
+        response.headers['Access-Control-Expose-Headers'] = 'ETag'
     return response
 
 
@@ -48,9 +67,8 @@ def handle_options(path):
     """处理预检请求"""
     return '', 204
 
-# 全局变量
-scheduler_instance = None
-scheduler_thread = None
+# 全局变量（调度器运行在独立进程中，见 services.scheduler_control）
+auction_monitor_stop = None
 
 class WebAppManager:
     """Web应用管理器"""
@@ -60,133 +78,48 @@ class WebAppManager:
         self.init_database()
         
     def init_database(self):
-        """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 创建股票推荐表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stock_recommendations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                stock_name TEXT,
-                market TEXT,
-                current_price REAL,
-                total_score REAL,
-                tech_score REAL,
-                auction_score REAL,
-                auction_ratio REAL,
-                gap_type TEXT,
-                confidence TEXT,
-                strategy TEXT,
-                entry_price REAL,
-                stop_loss REAL,
-                target_price REAL,
-                status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 创建系统配置表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS system_config (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                config_key TEXT UNIQUE NOT NULL,
-                config_value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 创建系统日志表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS system_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                level TEXT NOT NULL,
-                message TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """初始化数据库（表结构统一由 services.database 维护）"""
+        self.db = get_database(self.db_path)
+        self.strategy_config = get_strategy_config_service(self.db_path)
+        self.status_service = get_system_status_service(self.db_path)
+    
+    @property
+    def rec_history(self):
+        """按月分区的推荐历史（首次使用时导入，依赖 pandas）"""
+        from backend.services.rec_history import get_recommendation_history
+        return get_recommendation_history(self.db_path)
     
     def save_recommendations(self, recommendations: list, date: str):
-        """保存股票推荐到数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 先删除当日旧数据
-        cursor.execute('DELETE FROM stock_recommendations WHERE date = ?', (date,))
-        
-        # 插入新数据
-        for stock in recommendations:
-            cursor.execute('''
-                INSERT INTO stock_recommendations 
-                (date, symbol, stock_name, market, current_price, total_score, 
-                 tech_score, auction_score, auction_ratio, gap_type, confidence, 
-                 strategy, entry_price, stop_loss, target_price)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                date, stock.get('symbol'), stock.get('stock_name'), 
-                stock.get('market'), stock.get('current_price'), 
-                stock.get('total_score'), stock.get('tech_score'),
-                stock.get('auction_score'), stock.get('auction_ratio'),
-                stock.get('gap_type'), stock.get('confidence'),
-                stock.get('strategy'), stock.get('entry_price'),
-                stock.get('stop_loss'), stock.get('target_price')
-            ))
-        
-        conn.commit()
-        conn.close()
+        """保存股票推荐到数据库（见 services.analysis_runner.save_recommendations）"""
+        analysis_runner.save_recommendations(self.db_path, recommendations, date)
     
     def get_recommendations(self, date: str = None, limit: int = 50):
         """获取股票推荐"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         if date:
-            cursor.execute('''
+            return self.db.query('''
                 SELECT * FROM stock_recommendations 
                 WHERE date = ? 
                 ORDER BY total_score DESC LIMIT ?
             ''', (date, limit))
-        else:
-            cursor.execute('''
-                SELECT * FROM stock_recommendations 
-                ORDER BY created_at DESC LIMIT ?
-            ''', (limit,))
-        
-        columns = [description[0] for description in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return results
+        return self.db.query('''
+            SELECT * FROM stock_recommendations 
+            ORDER BY created_at DESC LIMIT ?
+        ''', (limit,))
     
     def get_system_status(self):
-        """获取系统状态"""
-        global scheduler_instance
-        
-        # 检查是否应该自动启动调度器
-        auto_start_enabled = os.getenv('AUTO_START_SCHEDULER', 'false').lower() == 'true'
-        
-        status = {
-            'scheduler_running': scheduler_instance is not None and scheduler_instance.is_running,
-            'auto_start_enabled': auto_start_enabled,
-            'last_update': self.get_last_update_time(),
-            'today_recommendations': len(self.get_recommendations(datetime.now().strftime('%Y-%m-%d'))),
-            'email_configured': self.is_email_configured(),
-            'system_health': 'good',  # 简化版
-            'trading_mode': os.getenv('TRADING_MODE', 'short_term'),  # 新增交易模式
-            'scheduler_recommended': self._should_recommend_scheduler_start()
-        }
+        """获取系统状态（数据库与 .env 相关字段来自带 TTL 的共享状态快照，调度器状态来自其心跳）"""
+        status = self.status_service.snapshot()
+        status['scheduler_running'] = scheduler_control.get_status(self.db_path)['running']
+        status['scheduler_recommended'] = self._should_recommend_scheduler_start(status['email_configured'])
         
         return status
     
-    def _should_recommend_scheduler_start(self):
+    def _should_recommend_scheduler_start(self, email_configured=None):
         """判断是否建议启动调度器"""
+        if email_configured is None:
+            email_configured = self.is_email_configured()
         # 如果邮件已配置且当前是交易时间段，建议启动
-        if self.is_email_configured():
+        if email_configured:
             now = datetime.now()
             # 工作日的8:00-16:00建议启动
             if now.weekday() < 5 and 8 <= now.hour <= 16:
@@ -195,25 +128,11 @@ class WebAppManager:
     
     def get_last_update_time(self):
         """获取最后更新时间"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT MAX(created_at) FROM stock_recommendations')
-        result = cursor.fetchone()[0]
-        conn.close()
-        return result if result else "从未更新"
+        return self.status_service.snapshot()['last_update']
     
     def is_email_configured(self):
-        """检查邮件是否已配置"""
-        # 强制重新加载，避免缓存
-        load_dotenv(override=True)
-        sender_email = os.getenv('SENDER_EMAIL', '')
-        sender_password = os.getenv('SENDER_PASSWORD', '')
-        recipient_emails = os.getenv('RECIPIENT_EMAILS', '')
-        
-        configured = all([sender_email, sender_password, recipient_emails])
-        print(f"邮件配置检查: {configured} (邮箱:{bool(sender_email)}, 密码:{bool(sender_password)}, 接收:{bool(recipient_emails)})")
-        
-        return configured
+        """检查邮件是否已配置（.env 文件修改后才重新加载）"""
+        return self.status_service.email_configured()
     
     def save_email_config(self, config: dict):
         """保存邮件配置"""
@@ -256,6 +175,7 @@ EMAIL_PROVIDER={config.get('email_provider', 'gmail')}
             
             # 重新加载
             load_dotenv(env_path, override=True)
+            self.status_service.invalidate()
             
             # 验证加载成功
             print(f"验证环境变量加载:")
@@ -275,21 +195,9 @@ EMAIL_PROVIDER={config.get('email_provider', 'gmail')}
             raise e
     
     def save_strategy_config(self, config: dict):
-        """保存策略配置"""
+        """保存策略配置（写穿透刷新进程内快照）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 更新或插入策略配置
-            for key, value in config.items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO system_config (config_key, config_value, updated_at)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                ''', (f'strategy_{key}', str(value)))
-            
-            conn.commit()
-            conn.close()
-            
+            self.strategy_config.save(config)
             print(f"策略配置已保存: {config}")
             
         except Exception as e:
@@ -297,61 +205,17 @@ EMAIL_PROVIDER={config.get('email_provider', 'gmail')}
             raise e
     
     def get_strategy_config(self):
-        """获取策略配置"""
+        """获取策略配置（读取进程内快照）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT config_key, config_value FROM system_config 
-                WHERE config_key LIKE 'strategy_%'
-            ''')
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            # 构建配置字典 (调整默认价格范围以包含低价股)
-            config = {
-                'tech_weight': 0.65,
-                'auction_weight': 0.35,
-                'score_threshold': 0.65,
-                'max_recommendations': 15,
-                'min_price': 2.0,  # 包含低价股
-                'max_price': 300.0,
-                'updated_at': '从未设置'
-            }
-            
-            for key, value in results:
-                config_name = key.replace('strategy_', '')
-                if config_name in config:
-                    try:
-                        if config_name in ['tech_weight', 'auction_weight', 'score_threshold', 'min_price', 'max_price']:
-                            config[config_name] = float(value)
-                        elif config_name == 'max_recommendations':
-                            config[config_name] = int(value)
-                        else:
-                            config[config_name] = value
-                    except ValueError:
-                        # 如果转换失败，保持默认值
-                        pass
-            
-            return config
-            
+            return self.strategy_config.snapshot()
         except Exception as e:
             print(f"获取策略配置失败: {e}")
             # 返回默认配置
-            return {
-                'tech_weight': 0.65,
-                'auction_weight': 0.35,
-                'score_threshold': 0.65,
-                'max_recommendations': 15,
-                'min_price': 2.0,
-                'max_price': 300.0,
-                'updated_at': '从未设置'
-            }
+            return dict(STRATEGY_DEFAULTS)
 
 # 初始化管理器
 web_manager = WebAppManager()
+dashboard_service = DashboardService(web_manager.db_path, status_loader=web_manager.get_system_status)
 
 def generate_report_from_db_data(db_recommendations):
     """从数据库推荐数据生成邮件报告格式"""
@@ -583,12 +447,8 @@ def recommendations():
 def stock_detail(symbol):
     """股票详情页面"""
     try:
-        # 使用深度分析器生成详细报告
-        from analysis.deep_stock_analyzer import DeepStockAnalyzer
-        analyzer = DeepStockAnalyzer()
-        
-        # 生成深度分析报告
-        analysis_report = analyzer.generate_deep_analysis_report(symbol)
+        # 优先读取当日已生成的深度报告，没有时现场生成
+        analysis_report = get_deep_report_cache(web_manager.db_path).get_or_generate(symbol)
         
         if not analysis_report:
             flash('股票分析失败，请稍后重试', 'error')
@@ -833,98 +693,217 @@ def save_strategy_config():
 def get_strategy_config():
     """获取策略参数配置API"""
     try:
-        config = web_manager.get_strategy_config()
-        return jsonify({'success': True, 'config': config})
+        # 配置版本在共享缓存中，任一 worker 保存后递增
+        etag = f"strategy-config-{web_manager.strategy_config.version}"
+        return conditional(lambda: jsonify({'success': True, 'config': web_manager.get_strategy_config()}), etag)
     except Exception as e:
         print(f"获取策略配置异常: {e}")
         return jsonify({'success': False, 'message': f'获取失败: {str(e)}'})
 
 @app.route('/api/start_scheduler', methods=['POST'])
 def start_scheduler():
-    """启动调度器API"""
-    global scheduler_instance, scheduler_thread
-    
+    """启动调度器API（启用独立调度器进程中的定时任务）"""
     try:
-        if scheduler_instance and scheduler_instance.is_running:
+        status = scheduler_control.get_status(web_manager.db_path)
+        if status['running']:
             return jsonify({'success': False, 'message': '调度器已在运行中'})
         
-        scheduler_instance = TradingDayScheduler()
-        scheduler_thread = threading.Thread(target=scheduler_instance.start_scheduler, daemon=True)
-        scheduler_thread.start()
-        
+        scheduler_control.set_enabled(True, web_manager.db_path)
+        if not status['process_alive']:
+            return jsonify({'success': True, 'message': '调度已启用，但调度器进程未运行，请执行 python3 run.py --scheduler'})
         return jsonify({'success': True, 'message': '调度器已启动'})
     except Exception as e:
         return jsonify({'success': False, 'message': f'启动失败: {str(e)}'})
 
 @app.route('/api/stop_scheduler', methods=['POST'])
 def stop_scheduler():
-    """停止调度器API"""
-    global scheduler_instance
-    
+    """停止调度器API（停用定时任务，调度器进程保持运行）"""
     try:
-        if scheduler_instance:
-            scheduler_instance.stop_scheduler()
-            scheduler_instance = None
-        
+        scheduler_control.set_enabled(False, web_manager.db_path)
         return jsonify({'success': True, 'message': '调度器已停止'})
     except Exception as e:
         return jsonify({'success': False, 'message': f'停止失败: {str(e)}'})
 
+# 竞价监控运行标记：多 worker 下启动与停止请求可能落在不同 worker，
+# 运行中的 worker 定期续期标记，标记被删除或替换时停止本 worker 的监控线程
+AUCTION_MONITOR_KEY = 'auction_monitor'
+AUCTION_MONITOR_TTL = 30
+
+def _keep_auction_monitor_alive(stop_event, token):
+    cache = get_shared_cache(web_manager.db_path)
+    while not stop_event.wait(AUCTION_MONITOR_TTL / 3):
+        marker = cache.get(AUCTION_MONITOR_KEY)
+        if not marker or marker.get('token') != token:
+            stop_event.set()
+        else:
+            cache.set(AUCTION_MONITOR_KEY, marker, ttl=AUCTION_MONITOR_TTL)
+
+@app.route('/api/auction_monitor/start', methods=['POST'])
+def start_auction_monitor():
+    """在后台监控最新推荐股票的集合竞价，信号变化通过 /api/events 推送"""
+    global auction_monitor_stop
+    
+    try:
+        cache = get_shared_cache(web_manager.db_path)
+        if cache.get(AUCTION_MONITOR_KEY):
+            return jsonify({'success': False, 'message': '竞价监控已在运行中'})
+        
+        snapshot = get_picks_snapshot_service(web_manager.db_path).current()
+        recommendations = snapshot['recommendations'] if snapshot else []
+        prev_close_prices = {
+            r['symbol'].split('.')[-1]: r['current_price']
+            for r in recommendations if r.get('symbol') and r.get('current_price')
+        }
+        if not prev_close_prices:
+            return jsonify({'success': False, 'message': '暂无推荐股票，请先运行分析'})
+        
+        from backend.realtime_auction_monitor import RealTimeAuctionMonitor
+        monitor = RealTimeAuctionMonitor(list(prev_close_prices))
+        auction_monitor_stop = threading.Event()
+        token = hashlib.sha1(f'{os.getpid()}:{time.time()}'.encode()).hexdigest()[:12]
+        cache.set(AUCTION_MONITOR_KEY, {'token': token, 'pid': os.getpid(), 'symbols': len(prev_close_prices)},
+                  ttl=AUCTION_MONITOR_TTL)
+        threading.Thread(target=monitor.run_in_background, args=(prev_close_prices, auction_monitor_stop),
+                         daemon=True).start()
+        threading.Thread(target=_keep_auction_monitor_alive, args=(auction_monitor_stop, token),
+                         daemon=True).start()
+        
+        return jsonify({'success': True, 'message': f'竞价监控已启动，监控 {len(prev_close_prices)} 只股票'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'启动失败: {str(e)}'})
+
+@app.route('/api/auction_monitor/stop', methods=['POST'])
+def stop_auction_monitor():
+    """停止后台竞价监控（运行在其他 worker 上的监控在下一次续期检查时停止）"""
+    get_shared_cache(web_manager.db_path).invalidate(AUCTION_MONITOR_KEY)
+    if auction_monitor_stop:
+        auction_monitor_stop.set()
+    return jsonify({'success': True, 'message': '竞价监控已停止'})
+
+def run_full_analysis(progress=None):
+    """
+    执行一次完整分析并落库、发布快照（见 services.analysis_runner，与调度器共用单飞键）
+
+    @returns {tuple} (报告数据, 是否由本次调用执行)
+    """
+    return analysis_runner.run_full_analysis(web_manager.db_path, progress=progress)
+
+def execute_analysis_job(job):
+    """
+    分析任务执行函数（在后台工作线程中运行）
+
+    @param {Job} job - 用于上报进度
+    @returns {dict} 与旧版同步接口相同结构的结果 {success, message, data}
+    """
+    report_data, executed = run_full_analysis(progress=job.progress)
+    
+    if not report_data:
+        print("❌ 分析失败或无推荐股票")
+        return {
+            'success': False, 
+            'message': '分析完成但未找到符合条件的股票，可能是市场条件不佳或筛选条件过于严格'
+        }
+    
+    recommendations = report_data['recommendations']
+    if not executed:
+        job.progress(message='已复用同一交易日正在进行的分析结果')
+    
+    # 统计分析结果
+    high_confidence_count = len([r for r in recommendations if r.get('confidence') == 'very_high'])
+    low_price_count = len([r for r in recommendations if r.get('current_price', 999) <= 10])
+    avg_score = sum(r.get('total_score', 0) for r in recommendations) / len(recommendations) if recommendations else 0
+    
+    print(f"📊 分析完成: {len(recommendations)}只股票, 强烈推荐{high_confidence_count}只, 低价股{low_price_count}只")
+    
+    return {
+        'success': True, 
+        'message': f'分析完成！共筛选出 {len(recommendations)} 只推荐股票，其中强烈推荐 {high_confidence_count} 只，低价机会 {low_price_count} 只',
+        'data': {
+            'total_count': len(recommendations),
+            'high_confidence_count': high_confidence_count,
+            'low_price_count': low_price_count,
+            'average_score': round(avg_score, 3),
+            'analysis_date': report_data['date'],
+            'analysis_time': report_data.get('analysis_time', 'Unknown')
+        }
+    }
+
 @app.route('/api/run_analysis', methods=['POST'])
 def run_analysis():
-    """立即执行分析API - 使用优化版分析器"""
+    """提交分析任务API - 立即返回任务 id，进度与结果通过 /api/jobs/<id> 查询"""
     try:
-        print(f"🔄 开始生成交易日报...")
-        
-        # 使用优化版分析器
-        from analysis.optimized_stock_analyzer import OptimizedStockAnalyzer
-        analyzer = OptimizedStockAnalyzer()
-        report_data = analyzer.generate_optimized_recommendations()
-        
-        if report_data and 'recommendations' in report_data:
-            recommendations = report_data['recommendations']
-            
-            # 保存到数据库
-            web_manager.save_recommendations(
-                recommendations,
-                report_data['date']
-            )
-            
-            # 统计分析结果
-            high_confidence_count = len([r for r in recommendations if r.get('confidence') == 'very_high'])
-            low_price_count = len([r for r in recommendations if r.get('current_price', 999) <= 10])
-            avg_score = sum(r.get('total_score', 0) for r in recommendations) / len(recommendations) if recommendations else 0
-            
-            print(f"📊 分析完成: {len(recommendations)}只股票, 强烈推荐{high_confidence_count}只, 低价股{low_price_count}只")
-            
-            return jsonify({
-                'success': True, 
-                'message': f'分析完成！共筛选出 {len(recommendations)} 只推荐股票，其中强烈推荐 {high_confidence_count} 只，低价机会 {low_price_count} 只',
-                'data': {
-                    'total_count': len(recommendations),
-                    'high_confidence_count': high_confidence_count,
-                    'low_price_count': low_price_count,
-                    'average_score': round(avg_score, 3),
-                    'analysis_date': report_data['date'],
-                    'analysis_time': report_data.get('analysis_time', 'Unknown')
-                }
-            })
-        else:
-            print("❌ 分析失败或无推荐股票")
-            return jsonify({
-                'success': False, 
-                'message': '分析完成但未找到符合条件的股票，可能是市场条件不佳或筛选条件过于严格'
-            })
-            
+        job, created = get_job_manager().submit('analysis', execute_analysis_job)
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'message': '分析任务已提交' if created else '已有分析任务在执行，已返回该任务',
+            'job': job.to_dict()
+        }), 202
     except Exception as e:
-        import traceback
-        print(f"❌ 分析异常: {e}")
-        traceback.print_exc()
         return jsonify({
             'success': False, 
-            'message': f'分析过程中出现错误: {str(e)}，请检查系统配置或稍后重试'
+            'message': f'提交分析任务失败: {str(e)}'
         })
 
+@app.route('/api/jobs', methods=['GET'])
+def api_list_jobs():
+    """最近的后台任务"""
+    jobs = get_job_manager().list(kind=request.args.get('kind') or None,
+                                  limit=min(request.args.get('limit', 20, type=int), 100))
+    return jsonify({'success': True, 'data': [job.to_dict() for job in jobs]})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """后台任务状态（阶段、已处理数量、预计剩余时间）"""
+    job = get_job_manager().get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def api_job_result(job_id):
+    """后台任务结果；任务未结束时返回 202"""
+    job = get_job_manager().get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    if not job.finished:
+        return jsonify({'success': False, 'message': '任务尚未完成', 'data': job.to_dict()}), 202
+    if job.error:
+        return jsonify({'success': False, 'message': f'任务执行失败: {job.error}', 'data': job.to_dict()})
+    return jsonify({'success': True, 'data': job.to_dict(include_result=True)})
+
+# SSE 推送：心跳间隔与断线重连等待
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+@app.route('/api/events', methods=['GET'])
+def api_events():
+    """
+    事件流（Server-Sent Events）：任务进度、新推荐、竞价信号变化
+
+    查询参数:
+        topics - 逗号分隔的主题（job,recommendations,auction），缺省为全部
+
+    支持 Last-Event-ID：断线重连时补发之后的事件
+    """
+    topics = [t for t in request.args.get('topics', '').split(',') if t in EVENT_TOPICS] or list(EVENT_TOPICS)
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = get_event_bus().subscribe(topics, last_event_id=last_event_id)
+
+    def stream():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                yield format_sse(event) if event else ": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    response = app.response_class(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/system_status')
 def system_status():
     """获取系统状态API"""
@@ -942,14 +921,11 @@ def update_stock_status():
         stock_id = data.get('id')
         new_status = data.get('status')
         
-        conn = sqlite3.connect(web_manager.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE stock_recommendations SET status = ? WHERE id = ?',
-            (new_status, stock_id)
-        )
-        conn.commit()
-        conn.close()
+        with web_manager.db.transaction() as conn:
+            conn.execute(
+                'UPDATE stock_recommendations SET status = ? WHERE id = ?',
+                (new_status, stock_id)
+            )
         
         return jsonify({'success': True, 'message': '状态已更新'})
     except Exception as e:
@@ -958,63 +934,47 @@ def update_stock_status():
 # >>> CChanTrader-AI Explain Patch : picks endpoint
 @app.route('/api/picks', methods=['GET'])
 def api_get_picks():
-    """获取带解释的推荐股票列表API"""
+    """
+    获取带解释的推荐股票列表API（读取最近一次完整分析的快照，不触发分析）
+
+    查询参数:
+        limit      - 最大返回条数，默认 10
+        confidence - 信心等级
+        market     - 市场
+        min_score  - 最低综合评分
+
+    支持 If-None-Match：快照与筛选条件未变时返回 304
+    """
     try:
-        from analysis.optimized_stock_analyzer import OptimizedStockAnalyzer
-        
-        # 获取查询参数
-        limit = request.args.get('limit', 10, type=int)
+        limit = min(request.args.get('limit', 10, type=int), 200)
         confidence = request.args.get('confidence', '')
+        market = request.args.get('market', '')
+        min_score = request.args.get('min_score', type=float)
         
-        analyzer = OptimizedStockAnalyzer()
-        data = analyzer.generate_optimized_recommendations()
-        recommendations = data.get('recommendations', [])
-        
-        # 应用过滤器
-        if confidence:
-            recommendations = [r for r in recommendations if r.get('confidence') == confidence]
-        
-        # 限制返回数量
-        recommendations = recommendations[:limit]
-        
-        # 保存到数据库
-        try:
-            conn = sqlite3.connect(web_manager.db_path)
-            cursor = conn.cursor()
-            
-            for stock in recommendations:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO stock_analysis 
-                    (symbol, stock_name, analysis_date, total_score, tech_score, 
-                     auction_score, confidence, entry_price, stop_loss, target_price, explanation)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    stock.get('symbol', ''),
-                    stock.get('stock_name', ''),
-                    datetime.now().strftime('%Y-%m-%d'),
-                    stock.get('total_score', 0),
-                    stock.get('tech_score', 0),
-                    stock.get('auction_score', 0),
-                    stock.get('confidence', 'medium'),
-                    stock.get('entry_price', 0),
-                    stock.get('stop_loss', 0),
-                    stock.get('target_price', 0),
-                    stock.get('explanation', '')
-                ))
-            
-            conn.commit()
-            conn.close()
-            print(f"✅ 已保存 {len(recommendations)} 条推荐记录到数据库")
-            
-        except Exception as db_error:
-            print(f"⚠️ 保存到数据库失败: {db_error}")
+        snapshot = get_picks_snapshot_service(web_manager.db_path).current()
+        if snapshot is None:
+            return jsonify({
+                'success': True,
+                'data': [],
+                'total': 0,
+                'message': '暂无分析结果，请先运行分析（POST /api/picks/refresh）'
+            })
         
-        return jsonify({
-            'success': True,
-            'data': recommendations,
-            'total': len(recommendations),
-            'timestamp': datetime.now().isoformat()
-        })
+        filters = f"{limit}|{confidence}|{market}|{min_score}"
+        etag = f"picks-{snapshot['version']}-{hashlib.sha1(filters.encode('utf-8')).hexdigest()[:10]}"
+
+        def build():
+            recommendations = filter_picks(snapshot['recommendations'], confidence=confidence,
+                                           market=market, min_score=min_score, limit=limit)
+            return jsonify({
+                'success': True,
+                'data': recommendations,
+                'total': len(recommendations),
+                'analysis_date': snapshot['analysis_date'],
+                'snapshot_version': snapshot['version'],
+                'timestamp': snapshot['created_at']
+            })
+        return conditional(build, etag)
         
     except Exception as e:
         return jsonify({
@@ -1023,27 +983,77 @@ def api_get_picks():
             'data': []
         })
 
+@app.route('/api/dashboard', methods=['GET'])
+def api_dashboard():
+    """
+    仪表盘首屏数据API：一次返回系统状态、最新推荐、策略配置、选股模板与最近的选股记录
+
+    查询参数:
+        fields        - 字段投影，逗号分隔，可选 status、picks、strategy_config、presets、records；
+                        "picks.列名" 只返回推荐的指定列；缺省返回全部
+        picks_limit   - 推荐条数，默认 10，最多 200
+        records_limit - 选股记录条数，默认 20，最多 100
+
+    数据来自按版本缓存的快照；支持 If-None-Match，未变化时返回 304
+    """
+    try:
+        etag, data = dashboard_service.render(
+            fields=request.args.get('fields', ''),
+            picks_limit=request.args.get('picks_limit', 10, type=int),
+            records_limit=request.args.get('records_limit', 20, type=int),
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'获取仪表盘数据失败: {str(e)}'})
+
+    return conditional(lambda: jsonify({'success': True, 'data': data}), etag)
+
+@app.route('/api/export/<table>', methods=['GET'])
+def api_export(table):
+    """
+    流式导出历史数据API（分块传输，内存占用与导出行数无关）
+
+    路径参数:
+        table  - stock_recommendations / deep_analysis / screener_records
+    查询参数:
+        format - csv（默认）/ ndjson / parquet（需要 pyarrow）
+        start  - 起始日期 YYYY-MM-DD（含）
+        end    - 结束日期 YYYY-MM-DD（含）
+    """
+    from backend.services.exporter import ExportError, Exporter
+    try:
+        exporter = Exporter(web_manager.db_path, table, request.args.get('format', 'csv'),
+                            start=request.args.get('start'), end=request.args.get('end'))
+    except ExportError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    response = app.response_class(stream_with_context(exporter.stream()), content_type=exporter.content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{exporter.filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/picks/refresh', methods=['POST'])
+def api_refresh_picks():
+    """重新分析并在完成后更新推荐快照（后台任务）"""
+    job, created = get_job_manager().submit('analysis', execute_analysis_job)
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'message': '分析任务已提交' if created else '已有分析任务在执行，已返回该任务',
+        'job': job.to_dict()
+    }), 202
+
 # HTMX股票分析详情API端点
 @app.route('/api/stocks/<symbol>/analysis', methods=['GET'])
 def get_stock_analysis_detail(symbol):
     """获取股票分析详情（优化版 - 直接从数据库读取）"""
     try:
-        import sqlite3
-        import os
-        import json
-        
-        # 从数据库读取预生成的解释HTML和价格数据
-        conn = sqlite3.connect(os.path.join('.', "data/cchan_web.db"))
-        cur = conn.cursor()
-        
-        row = cur.execute(
-            "SELECT explain_html, mini_prices FROM stock_analysis WHERE symbol = ? ORDER BY created_at DESC LIMIT 1",
-            (symbol,)
-        ).fetchone()
-        
-        conn.close()
+        # 从数据库读取解释字段与价格数据，按需渲染HTML
+        detail = load_latest_detail(web_manager.db.connect(), symbol,
+                                    archive=get_archive_store(web_manager.db_path))
         
-        if not row or not row[0]:
+        if not detail:
             # 如果数据库中没有数据，返回默认提示
             return jsonify({
                 "html": f"""
@@ -1061,15 +1071,13 @@ def get_stock_analysis_detail(symbol):
                 "prices": []
             })
         
-        # 解析价格数据
-        try:
-            prices = json.loads(row[1] or "[]")
-        except:
-            prices = []
+        html, _ = detail
+        chart = load_mini_chart(symbol)
         
         return jsonify({
-            "html": row[0],
-            "prices": prices
+            "html": html,
+            "prices": chart['c'],
+            "chart": chart
         })
         
     except Exception as e:
@@ -1090,6 +1098,44 @@ def get_stock_analysis_detail(symbol):
             "prices": []
         })
 
+def load_mini_chart(symbol, range_=None, points=None):
+    """走势缩略图序列，读取失败时返回空序列"""
+    from backend.services.mini_charts import DEFAULT_POINTS, DEFAULT_RANGE, get_mini_chart_service
+    range_ = range_ or DEFAULT_RANGE
+    try:
+        return get_mini_chart_service(web_manager.db_path).series(symbol, range_, points or DEFAULT_POINTS)
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"⚠️ 读取 {symbol} 走势图失败: {e}")
+        return {'symbol': symbol, 'range': range_, 'start_date': None, 'last_date': None,
+                'bars': 0, 't': [], 'c': []}
+
+
+@app.route('/api/stocks/<symbol>/mini_chart', methods=['GET'])
+def get_stock_mini_chart(symbol):
+    """
+    走势缩略图：本地日线按 LTTB 降采样到固定点数
+
+    参数: range=1m|3m|6m|1y，points=点数，format=json|f32
+    （f32 返回 little-endian float32 交错数组 [t0, c0, t1, c1, ...]，起始日在 X-Start-Date 头中）
+    """
+    from backend.services.mini_charts import MiniChartService
+    try:
+        chart = load_mini_chart(symbol, request.args.get('range'), request.args.get('points', type=int))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    if request.args.get('format') == 'f32':
+        response = app.response_class(MiniChartService.to_float32(chart), mimetype='application/octet-stream')
+        response.headers['X-Start-Date'] = chart['start_date'] or ''
+    else:
+        response = jsonify({'success': True, 'data': chart})
+    # 同一最后交易日的序列不变
+    response.set_etag(f"{symbol}-{chart['range']}-{request.args.get('points', '')}-{chart['last_date']}-{request.args.get('format', 'json')}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 # ------------------------------------------------------------------
 # 条件选股模块 (同花顺风格)
 # ------------------------------------------------------------------
@@ -1099,14 +1145,52 @@ screener_record_mgr = ScreenerRecordManager()
 @app.route('/screener')
 def screener_page():
     """条件选股页面"""
+    from stock_screener.screener import StockScreener
     presets = StockScreener.get_preset_list()
     records = screener_record_mgr.get_records(limit=20)
     return render_template('screener.html', presets=presets, records=records)
 
 
+def _load_candidate_pool():
+    """获取当日全部推荐股票作为候选池（只读库，不在请求中触发分析）"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    return web_manager.get_recommendations(today, limit=200)
+
+
+# 选股结果在共享缓存中的有效期（秒）；键中包含推荐快照版本，新的分析结果发布后自动失效
+SCREENER_CACHE_TTL = 600
+
+
+def _screener_cache_key(conditions):
+    """筛选结果的缓存键：当日、推荐快照版本与条件摘要"""
+    cache = get_shared_cache(web_manager.db_path)
+    digest = hashlib.sha1(json.dumps(conditions, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+    return f"screener:{datetime.now().strftime('%Y-%m-%d')}:{cache.version(PICKS_CACHE_KEY)}:{digest}"
+
+
+def _screen_with_shared_cache(candidate_pool, conditions):
+    """执行筛选；同一候选池与条件的结果在各 worker 间复用"""
+    from stock_screener.screener import StockScreener
+    cache = get_shared_cache(web_manager.db_path)
+    key = _screener_cache_key(conditions)
+    results = cache.get(key)
+    if results is None:
+        engine = StockScreener(search_index=get_search_index(web_manager.db_path))
+        results = engine.screen(candidate_pool, conditions)
+        cache.set(key, results, ttl=SCREENER_CACHE_TTL)
+    return results
+
+
 @app.route('/api/screener/run', methods=['POST'])
 def api_screener_run():
-    """执行条件选股并保存记录"""
+    """
+    执行条件选股并保存记录
+
+    每次调用都保存一条记录；相同候选池与条件的筛选结果经共享缓存复用
+    当日候选池为空时提交后台分析任务并返回 202 与 job_id，不在请求中同步执行分析
+    """
+    from stock_screener.screener import StockScreener
+    from stock_screener.expression import RuleCompileError, validate_rules
     try:
         payload = request.json or {}
         conditions = payload.get('conditions', {})
@@ -1123,31 +1207,23 @@ def api_screener_run():
         if not record_name:
             record_name = f"选股 {datetime.now().strftime('%m-%d %H:%M')}"
 
-        # 获取当日全部推荐股票作为候选池
-        today = datetime.now().strftime('%Y-%m-%d')
-        candidate_pool = web_manager.get_recommendations(today, limit=200)
-
-        # 候选池为空时用分析器补充
-        if not candidate_pool:
-            try:
-                from analysis.optimized_stock_analyzer import OptimizedStockAnalyzer
-                analyzer = OptimizedStockAnalyzer()
-                report = analyzer.generate_optimized_recommendations()
-                if report and 'recommendations' in report:
-                    candidate_pool = report['recommendations']
-                    web_manager.save_recommendations(candidate_pool, today)
-            except Exception as e:
-                print(f"⚠️ 自动补充候选池失败: {e}")
+        # 自定义规则先编译校验，未知字段或语法错误直接返回
+        validate_rules(conditions.get('custom_rules'))
 
+        candidate_pool = _load_candidate_pool()
         if not candidate_pool:
+            # 全市场分析耗时数分钟，交给后台任务执行（同一时间只会有一个分析任务），完成后再筛选
+            job, created = get_job_manager().submit('analysis', execute_analysis_job)
             return jsonify({
                 'success': False,
-                'message': '没有可用的股票数据，请先在首页运行"立即分析"',
-            })
+                'job_id': job.id,
+                'message': '今日还没有候选池，已提交分析任务，完成后请重新筛选' if created
+                           else '今日还没有候选池，分析任务正在执行，完成后请重新筛选',
+                'job': job.to_dict(),
+            }), 202
 
-        # 执行筛选
-        engine = StockScreener()
-        results = engine.screen(candidate_pool, conditions)
+        # 执行筛选（结果经共享缓存复用）
+        results = _screen_with_shared_cache(candidate_pool, conditions)
 
         # 保存记录
         save_conditions = dict(conditions)
@@ -1165,6 +1241,8 @@ def api_screener_run():
             }
         })
 
+    except RuleCompileError as e:
+        return jsonify({'success': False, 'message': f'自定义条件有误: {str(e)}'})
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1174,27 +1252,179 @@ def api_screener_run():
 @app.route('/api/screener/presets', methods=['GET'])
 def api_screener_presets():
     """获取预置选股模板列表"""
+    from stock_screener.screener import StockScreener
     return jsonify({
         'success': True,
         'data': StockScreener.get_preset_list(),
     })
 
 
+@app.route('/api/screener/batch', methods=['POST'])
+def api_screener_batch():
+    """
+    单次扫描评估多组条件（默认全部预置模板），返回每组的结果与数量
+
+    请求体:
+        preset_keys    - 需要评估的模板 key 列表，缺省为全部模板
+        condition_sets - 额外的自定义条件组 {key: conditions}
+        counts_only    - 为 true 时只返回数量，不返回股票明细
+    """
+    from stock_screener.screener import StockScreener
+    from stock_screener.expression import RuleCompileError, validate_rules
+    try:
+        payload = request.json or {}
+        preset_keys = payload.get('preset_keys')
+        extra_sets = payload.get('condition_sets') or {}
+        counts_only = bool(payload.get('counts_only', False))
+
+        # 只传自定义条件组时不再附带全部模板
+        if preset_keys is None:
+            preset_keys = [] if extra_sets else list(StockScreener.PRESET_TEMPLATES.keys())
+
+        condition_sets = {}
+        names = {}
+        for key in preset_keys:
+            tpl = StockScreener.PRESET_TEMPLATES.get(key)
+            if tpl:
+                condition_sets[key] = tpl['conditions']
+                names[key] = tpl['name']
+        for key, conditions in extra_sets.items():
+            condition_sets[key] = conditions or {}
+            names.setdefault(key, key)
+            validate_rules(condition_sets[key].get('custom_rules'))
+
+        # 批量评估用于模板计数等轻量场景，候选池为空时直接返回
+        candidate_pool = _load_candidate_pool()
+        if not candidate_pool:
+            return jsonify({
+                'success': False,
+                'message': '没有可用的股票数据，请先在首页运行"立即分析"',
+            })
+
+        engine = StockScreener(search_index=get_search_index(web_manager.db_path))
+        batch_results = engine.screen_many(candidate_pool, condition_sets)
+
+        data = {}
+        for key, stocks in batch_results.items():
+            item = {'name': names[key], 'total': len(stocks)}
+            if not counts_only:
+                item['stocks'] = stocks
+            data[key] = item
+
+        return jsonify({
+            'success': True,
+            'message': f'已评估 {len(data)} 组条件，候选池 {len(candidate_pool)} 只',
+            'data': {
+                'pool_size': len(candidate_pool),
+                'results': data,
+            }
+        })
+
+    except RuleCompileError as e:
+        return jsonify({'success': False, 'message': f'自定义条件有误: {str(e)}'})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': f'批量选股失败: {str(e)}'})
+
+
+@app.route('/api/screener/replay', methods=['POST'])
+def api_screener_replay():
+    """
+    在历史每日候选池上回放选股条件，并附带命中股票的 T+N 收益
+
+    请求体:
+        preset_keys     - 回放的模板 key 列表（与 conditions 二选一，均为空时回放全部模板）
+        conditions      - 自定义条件
+        start_date      - 起始日期，缺省为 90 天前
+        end_date        - 截止日期，缺省为今天
+        horizons        - 前瞻收益天数列表，缺省 [1, 3, 5]
+        include_matches - 是否返回命中明细，缺省 true
+    """
+    from stock_screener.screener import StockScreener
+    from stock_screener.expression import RuleCompileError, validate_rules
+    from stock_screener.replay import ScreenerReplay
+    from backend.services.bar_store import get_bar_store
+    try:
+        payload = request.json or {}
+        horizons = tuple(int(h) for h in payload.get('horizons') or ScreenerReplay.DEFAULT_HORIZONS)
+        if not horizons or any(h <= 0 or h > 60 for h in horizons):
+            return jsonify({'success': False, 'message': '前瞻天数必须在 1-60 之间'})
+
+        if payload.get('conditions'):
+            condition_sets = {'custom': payload['conditions']}
+        else:
+            keys = payload.get('preset_keys') or list(StockScreener.PRESET_TEMPLATES.keys())
+            condition_sets = {
+                key: StockScreener.PRESET_TEMPLATES[key]['conditions']
+                for key in keys if key in StockScreener.PRESET_TEMPLATES
+            }
+        if not condition_sets:
+            return jsonify({'success': False, 'message': '没有可回放的条件'})
+        for conditions in condition_sets.values():
+            validate_rules(conditions.get('custom_rules'))
+
+        # 前瞻收益取本地日线库的完整日线（推荐表中的价格只覆盖再次入选的日期）
+        replay = ScreenerReplay(web_manager.db_path, price_provider=get_bar_store(web_manager.db_path).load_panel)
+        results = replay.replay(
+            condition_sets,
+            start_date=payload.get('start_date'),
+            end_date=payload.get('end_date'),
+            horizons=horizons,
+        )
+        if not payload.get('include_matches', True):
+            for item in results.values():
+                item.pop('matches', None)
+
+        return jsonify({'success': True, 'data': results})
+
+    except RuleCompileError as e:
+        return jsonify({'success': False, 'message': f'自定义条件有误: {str(e)}'})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'参数格式错误: {str(e)}'})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': f'历史回放失败: {str(e)}'})
+
+
+@app.route('/api/screener/search', methods=['GET'])
+def api_screener_search():
+    """股票输入联想：代码前缀 / 名称片段 / 拼音首字母"""
+    query = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    if not query:
+        return jsonify({'success': True, 'data': []})
+    index = get_search_index(web_manager.db_path)
+    return jsonify({'success': True, 'data': index.search(query, limit=limit)})
+
+
 @app.route('/api/screener/records', methods=['GET'])
 def api_screener_records():
     """获取历史选股记录"""
-    limit = request.args.get('limit', 20, type=int)
-    records = screener_record_mgr.get_records(limit=limit)
-    return jsonify({'success': True, 'data': records})
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    cursor = request.args.get('cursor', '')
+    records = screener_record_mgr.get_records(limit=limit, cursor=cursor)
+    next_cursor = screener_record_mgr.make_cursor(records[-1]) if len(records) == limit else None
+    return jsonify({'success': True, 'data': records, 'next_cursor': next_cursor})
 
 
 @app.route('/api/screener/records/<int:record_id>', methods=['GET'])
 def api_screener_record_detail(record_id):
-    """获取单条选股记录详情"""
-    record = screener_record_mgr.get_record_by_id(record_id)
-    if not record:
-        return jsonify({'success': False, 'message': '记录不存在'})
-    return jsonify({'success': True, 'data': record})
+    """
+    获取单条选股记录详情（include_data=0 时不返回完整结果）
+
+    支持 If-None-Match：记录保存后不再修改，记录列表版本未变（没有新增或删除）时返回 304，不再读库解压
+    """
+    include_data = request.args.get('include_data', '1') != '0'
+    etag = f"screener-record-{record_id}-{screener_record_mgr.version}-{int(include_data)}"
+
+    def build():
+        record = screener_record_mgr.get_record_by_id(record_id, include_data=include_data)
+        if not record:
+            return jsonify({'success': False, 'message': '记录不存在'})
+        return jsonify({'success': True, 'data': record})
+    return conditional(build, etag)
 
 
 @app.route('/api/screener/records/<int:record_id>', methods=['DELETE'])
@@ -1206,20 +1436,137 @@ def api_screener_record_delete(record_id):
     return jsonify({'success': False, 'message': '删除失败，记录可能不存在'})
 
 
+# ------------------------------------------------------------------
+# 统计分析
+# ------------------------------------------------------------------
+
+@app.route('/stats')
+def stats_page():
+    """统计分析页面"""
+    from backend.services.analytics import get_analytics_service
+    return render_template('stats.html', stats_info=get_analytics_service(web_manager.db_path).info())
+
+
+@app.route('/api/stats', methods=['GET'])
+def api_stats_info():
+    """可用的统计查询与当前查询后端"""
+    from backend.services.analytics import get_analytics_service
+    return jsonify({'success': True, 'data': get_analytics_service(web_manager.db_path).info()})
+
+
+@app.route('/api/stats/<name>', methods=['GET'])
+def api_stats_query(name):
+    """
+    执行聚合统计查询
+
+    查询参数:
+        start_date - 起始日期，缺省为一年前
+        end_date   - 截止日期，缺省为今天
+    """
+    from backend.services.analytics import get_analytics_service
+    try:
+        service = get_analytics_service(web_manager.db_path)
+        rows = service.query(name, request.args.get('start_date'), request.args.get('end_date'))
+        return jsonify({'success': True, 'data': rows, 'backend': service.backend})
+    except KeyError:
+        return jsonify({'success': False, 'message': f'未知的统计查询: {name}'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'统计查询失败: {str(e)}'})
+
+
+# ------------------------------------------------------------------
+# 推荐历史与结果跟踪
+# ------------------------------------------------------------------
+
+@app.route('/api/recommendations/history', methods=['GET'])
+def api_recommendation_history():
+    """
+    推荐历史及其后续表现
+
+    查询参数:
+        start_date - 起始日期，缺省为 90 天前
+        end_date   - 截止日期，缺省为今天
+        symbol     - 只看某只股票
+    """
+    end_date = request.args.get('end_date') or datetime.now().strftime('%Y-%m-%d')
+    start_date = request.args.get('start_date') or (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
+    try:
+        history = web_manager.rec_history
+        return jsonify({
+            'success': True,
+            'data': history.query(start_date, end_date, symbol=request.args.get('symbol')),
+            'summary': history.summary(start_date, end_date),
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'获取推荐历史失败: {str(e)}'})
+
+
+@app.route('/api/recommendations/outcomes/refresh', methods=['POST'])
+def api_refresh_outcomes():
+    """在后台补齐日线并回填推荐结果"""
+    thread = threading.Thread(target=web_manager.rec_history.fill_outcomes, daemon=True)
+    thread.start()
+    return jsonify({'success': True, 'message': '推荐结果回填已在后台启动'})
+
+
+# ------------------------------------------------------------------
+# 数据维护
+# ------------------------------------------------------------------
+
+@app.route('/api/maintenance', methods=['GET'])
+def api_maintenance_info():
+    """保留天数配置与已归档的月份"""
+    return jsonify({
+        'success': True,
+        'retention': retention_config(),
+        'archives': get_archive_store(web_manager.db_path).summary(),
+    })
+
+
+@app.route('/api/maintenance/files/<name>', methods=['GET'])
+def api_maintenance_file(name):
+    """读取已归档的 JSON 输出文件（竞价分析、日报），data/ 下仍有原文件时直接返回原文件"""
+    if name != os.path.basename(name) or not any(fnmatch.fnmatch(name, p) for p in FILE_PATTERNS):
+        return jsonify({'success': False, 'message': f'不支持的文件: {name}'}), 400
+
+    path = os.path.join(os.path.dirname(os.path.abspath(web_manager.db_path)), name)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+    else:
+        content = get_archive_store(web_manager.db_path).read_file(name)
+    if content is None:
+        return jsonify({'success': False, 'message': f'文件不存在: {name}'}), 404
+    return app.response_class(content, mimetype='application/json')
+
+
+@app.route('/api/maintenance/run', methods=['POST'])
+def api_maintenance_run():
+    """
+    执行数据维护
+
+    请求体:
+        dry_run - 为 true 时同步返回将被归档的数量，不修改数据；否则在后台执行
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        if data.get('dry_run'):
+            report = run_maintenance(web_manager.db_path, dry_run=True)
+            return jsonify({'success': True, 'data': report})
+
+        thread = threading.Thread(target=run_maintenance, args=(web_manager.db_path,), daemon=True)
+        thread.start()
+        return jsonify({'success': True, 'message': '数据维护已在后台启动'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'数据维护失败: {str(e)}'})
+
+
 @app.route("/health")
 def health():
     """健康检查端点"""
     return "ok", 200
 
 if __name__ == "__main__":
-    # 确保数据目录存在
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
-    os.makedirs(data_dir, exist_ok=True)
-    
-    print("🚀 启动 CChanTrader-AI Web管理平台...")
-    print("🌐 访问地址: http://localhost:8080")
-    print("🛑 停止服务: Ctrl+C")
-    
-    # Railway 部署时使用环境变量中的端口
-    port = int(os.environ.get("PORT", 8080))
-    app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
+    # 统一由 run.py 启动（支持 --profile-startup）
+    from run import main
+    main()
\ No newline at end of file
@@ -10,8 +10,6 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import baostock as bs
-import akshare as ak
 from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
@@ -45,6 +43,7 @@ class DailyReportGenerator:
             end_date = datetime.now().strftime('%Y-%m-%d')
             start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
             
+            import baostock as bs
             rs = bs.query_history_k_data_plus(symbol,
                 'date,code,open,high,low,close,volume',
                 start_date=start_date, 
@@ -69,7 +68,8 @@ class DailyReportGenerator:
     def get_auction_data_quick(self, symbol: str) -> dict:
         """快速获取竞价数据"""
         try:
-            # 使用AKShare获取竞价数据
+            # 使用AKShare获取竞价数据（akshare 导入耗时数秒，用到时才导入）
+            import akshare as ak
             pre_market_df = ak.stock_zh_a_hist_pre_min_em(
                 symbol=symbol,
                 start_time="09:00:00", 
@@ -316,6 +316,7 @@ class DailyReportGenerator:
             return {}
         
         # 连接数据源
+        import baostock as bs
         lg = bs.login()
         print(f"📊 BaoStock连接: {lg.error_code}")
         
@@ -405,7 +406,7 @@ class DailyReportGenerator:
             
             # 保存详细结果
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            json_file = fos.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'daily_report_{timestamp}.json')
+            json_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', f'daily_report_{timestamp}.json')
             with open(json_file, 'w', encoding='utf-8') as f:
                 json.dump(report_data, f, ensure_ascii=False, indent=2)
             
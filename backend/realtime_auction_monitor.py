@@ -3,6 +3,8 @@
 """
 CChanTrader-AI 实时竞价监控模块
 实时获取和分析集合竞价数据，支持开盘前决策
+
+信号较上一轮发生变化时发布到事件总线的 auction 主题，由 /api/events 推送到页面
 """
 
 import os
@@ -11,10 +13,15 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import akshare as ak
 import warnings
 warnings.filterwarnings('ignore')
 
+from backend.services.events import get_event_bus
+
+# 信号强度或竞价比率变化超过阈值（或交易建议改变）才视为信号变化
+SIGNAL_STRENGTH_STEP = 0.05
+AUCTION_RATIO_STEP = 0.5
+
 class RealTimeAuctionMonitor:
     """实时竞价监控器"""
     
@@ -60,7 +67,8 @@ class RealTimeAuctionMonitor:
             if not self.check_auction_time():
                 return {'status': 'not_auction_time', 'data': None}
             
-            # 获取竞价数据
+            # 获取竞价数据（akshare 导入耗时数秒，用到时才导入）
+            import akshare as ak
             pre_market_df = ak.stock_zh_a_hist_pre_min_em(
                 symbol=symbol,
                 start_time="09:00:00", 
@@ -239,12 +247,49 @@ class RealTimeAuctionMonitor:
             # 分析信号
             analysis = self.analyze_auction_signals(symbol, auction_data, prev_close)
             results[symbol] = analysis
+            self._publish_if_changed(symbol, analysis)
             
             # 显示结果
             self._display_analysis(analysis)
         
         return results
     
+    def _publish_if_changed(self, symbol: str, analysis: dict):
+        """与上一轮信号比较，发生变化时发布 auction 事件"""
+        if not analysis.get('symbol'):
+            return
+        previous = self.signals.get(symbol)
+        changed = (
+            previous is None
+            or previous['recommendation'] != analysis['recommendation']
+            or abs(previous['signal_strength'] - analysis['signal_strength']) >= SIGNAL_STRENGTH_STEP
+            or abs(previous['auction_ratio'] - analysis['auction_ratio']) >= AUCTION_RATIO_STEP
+        )
+        if changed:
+            self.signals[symbol] = analysis
+            get_event_bus().publish('auction', dict(analysis, previous_recommendation=(previous or {}).get('recommendation')))
+    
+    def run_in_background(self, prev_close_prices: dict, stop_event, interval: int = 30):
+        """
+        在后台线程中持续监控，直到 stop_event 被设置（供 Web 服务使用，不写结果文件）
+        
+        @param {dict} prev_close_prices - {股票代码: 前收盘价}
+        @param {threading.Event} stop_event - 停止信号
+        @param {int} interval - 竞价时间内的监控间隔（秒）
+        """
+        print(f"🔄 竞价监控已在后台启动，监控 {len(self.watch_list)} 只股票")
+        while not stop_event.is_set():
+            try:
+                if self.check_auction_time():
+                    self.monitor_watch_list(prev_close_prices)
+                    stop_event.wait(interval)
+                else:
+                    stop_event.wait(60)
+            except Exception as e:
+                print(f"⚠️ 竞价监控出错: {e}")
+                stop_event.wait(interval)
+        print("🛑 后台竞价监控已停止")
+    
     def _display_analysis(self, analysis: dict):
         """显示分析结果"""
         symbol = analysis['symbol']
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 完整分析执行
+Web 触发（立即分析、刷新推荐）与调度器共用同一条分析流程与同一个单飞键，
+同一交易日并发发起的分析（包括调度器进程与 Web worker 之间）只执行一次
+
+流程：OptimizedStockAnalyzer 分析 → 写入推荐表与推荐历史 → 发布最新推荐快照 → 后台预生成深度报告
+"""
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.deep_reports import get_deep_report_cache
+from backend.services.jobs import get_job_manager
+from backend.services.picks_snapshot import get_picks_snapshot_service
+from backend.services.single_flight import get_single_flight
+from backend.services.system_status import get_system_status_service
+
+
+ANALYSIS_KIND = 'optimized_analysis'
+
+
+def save_recommendations(db_path, recommendations, date):
+    """
+    保存当日推荐（删除当日旧数据、批量插入与历史分区写入在同一事务内完成）
+
+    @param {str} db_path - 数据库路径
+    @param {list[dict]} recommendations - 推荐股票
+    @param {str} date - 推荐日期
+    @returns {int} 写入条数
+    """
+    from backend.services.rec_history import get_recommendation_history
+
+    rows = [
+        (
+            date, stock.get('symbol'), stock.get('stock_name'),
+            stock.get('market'), stock.get('current_price'),
+            stock.get('total_score'), stock.get('tech_score'),
+            stock.get('auction_score'), stock.get('auction_ratio'),
+            stock.get('gap_type'), stock.get('confidence'),
+            stock.get('strategy'), stock.get('entry_price'),
+            stock.get('stop_loss'), stock.get('target_price')
+        )
+        for stock in recommendations
+    ]
+
+    with get_database(db_path).transaction() as conn:
+        # 先删除当日旧数据
+        conn.execute('DELETE FROM stock_recommendations WHERE date = ?', (date,))
+
+        # 批量插入新数据
+        conn.executemany('''
+            INSERT INTO stock_recommendations
+            (date, symbol, stock_name, market, current_price, total_score,
+             tech_score, auction_score, auction_ratio, gap_type, confidence,
+             strategy, entry_price, stop_loss, target_price)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+        # 按月分区的推荐历史（结果列由夜间任务回填）
+        get_recommendation_history(db_path).record(conn, date, recommendations)
+
+    get_system_status_service(db_path).record_recommendations_saved(date, len(rows))
+    return len(rows)
+
+
+def run_full_analysis(db_path=DEFAULT_DB_PATH, progress=None):
+    """
+    执行一次完整分析并落库、发布快照（同一交易日并发调用只执行一次）
+
+    @param {str} db_path - 数据库路径
+    @param {callable} progress - 进度回调 progress(stage=..., processed=..., total=...)
+    @returns {tuple} (报告数据, 是否由本次调用执行)；无推荐时报告为 None
+    """
+    def analyze():
+        print("🔄 开始生成交易日报...")
+
+        from analysis.optimized_stock_analyzer import OptimizedStockAnalyzer
+        report_data = OptimizedStockAnalyzer().generate_optimized_recommendations(progress=progress)
+        if not report_data or 'recommendations' not in report_data:
+            return None
+
+        # 保存到数据库，并发布为 /api/picks 读取的最新快照
+        if progress:
+            progress(stage='保存推荐结果')
+        save_recommendations(db_path, report_data['recommendations'], report_data['date'])
+        get_picks_snapshot_service(db_path).publish(report_data)
+
+        # 后台为当日推荐预生成深度报告，详情页点击即可直接渲染
+        symbols = [r['symbol'] for r in report_data['recommendations'] if r.get('symbol')]
+        get_job_manager().submit('deep_precompute', get_deep_report_cache(db_path).precompute,
+                                 params={'symbols': symbols})
+        return report_data
+
+    def on_wait(source):
+        if progress:
+            progress(stage='等待进行中的分析完成' if source == 'thread' else '等待其他进程的分析完成')
+
+    return get_single_flight(db_path).run(ANALYSIS_KIND, analyze, on_wait=on_wait)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 统计分析服务
+推荐历史的聚合查询，供统计页使用
+
+- 安装 duckdb 时，将 stock_recommendations / deep_analysis / screener_records
+  按 id 增量镜像到列式库 data/analytics.duckdb，聚合查询在镜像上执行，不占用业务库；
+  推荐历史（recommendation_history）的结果列由夜间任务原地回填，按月分区比对签名后整月替换
+- 未安装 duckdb（或镜像文件被其他进程占用）时，在 SQLite 的独立只读连接（mode=ro）上执行同样的查询，
+  不占用各线程共享的读写连接
+"""
+
+import os
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.exporter import open_readonly
+from backend.services.rec_history import HISTORY_VIEW, PARTITION_PREFIX, get_recommendation_history
+
+try:
+    import duckdb
+except ImportError:  # 可选依赖
+    duckdb = None
+
+
+DEFAULT_MIRROR_PATH = "data/analytics.duckdb"
+SYNC_INTERVAL = 60
+
+# 镜像表结构：{表名: [(列名, DuckDB 类型), ...]}，日期时间统一保存为文本以便两种后端共用 SQL
+MIRROR_TABLES = {
+    'stock_recommendations': [
+        ('id', 'BIGINT'), ('date', 'VARCHAR'), ('symbol', 'VARCHAR'), ('stock_name', 'VARCHAR'),
+        ('market', 'VARCHAR'), ('current_price', 'DOUBLE'), ('total_score', 'DOUBLE'),
+        ('tech_score', 'DOUBLE'), ('auction_score', 'DOUBLE'), ('auction_ratio', 'DOUBLE'),
+        ('gap_type', 'VARCHAR'), ('confidence', 'VARCHAR'), ('strategy', 'VARCHAR'),
+        ('entry_price', 'DOUBLE'), ('stop_loss', 'DOUBLE'), ('target_price', 'DOUBLE'),
+        ('status', 'VARCHAR'), ('created_at', 'VARCHAR'),
+    ],
+    'deep_analysis': [
+        ('id', 'BIGINT'), ('symbol', 'VARCHAR'), ('stock_name', 'VARCHAR'), ('analysis_date', 'VARCHAR'),
+        ('current_price', 'DOUBLE'), ('price_change_pct', 'DOUBLE'), ('volume_ratio', 'DOUBLE'),
+        ('market_cap_billion', 'DOUBLE'), ('investment_rating', 'VARCHAR'),
+        ('confidence_level', 'VARCHAR'), ('expected_return_pct', 'DOUBLE'),
+        ('technical_score', 'DOUBLE'), ('fundamental_score', 'DOUBLE'),
+        ('sentiment_score', 'DOUBLE'), ('total_score', 'DOUBLE'), ('created_at', 'VARCHAR'),
+    ],
+    'screener_records': [
+        ('id', 'BIGINT'), ('name', 'VARCHAR'), ('preset_key', 'VARCHAR'),
+        ('result_count', 'BIGINT'), ('created_at', 'VARCHAR'),
+    ],
+}
+
+# 推荐历史镜像的列（分区表没有自增 id，按分区整月同步）
+HISTORY_COLUMNS = [
+    ('date', 'VARCHAR'), ('symbol', 'VARCHAR'), ('market', 'VARCHAR'), ('confidence', 'VARCHAR'),
+    ('total_score', 'DOUBLE'), ('base_price', 'DOUBLE'), ('ret_1d', 'DOUBLE'), ('ret_3d', 'DOUBLE'),
+    ('ret_5d', 'DOUBLE'), ('hit_stop', 'BIGINT'), ('hit_target', 'BIGINT'), ('outcome_status', 'VARCHAR'),
+]
+# 分区签名：行数、最近回填时间与价格、评分合计，任一变化即整月重新镜像
+HISTORY_SIGNATURE_SQL = '''
+    SELECT COUNT(*), MAX(outcome_updated_at), TOTAL(current_price), TOTAL(total_score) FROM {name}
+'''
+
+# 按周分桶表达式（周一为起始日）
+WEEK_EXPR = {
+    'duckdb': "strftime(date_trunc('week', CAST(date AS DATE)), '%Y-%m-%d')",
+    'sqlite': "date(date, 'weekday 0', '-6 days')",
+}
+
+# 聚合查询：两个参数均为日期区间 (start_date, end_date)
+QUERIES = {
+    'score_by_market_week': {
+        'title': '各市场周平均评分',
+        'sql': '''
+            SELECT {week} AS week, market, COUNT(*) AS picks,
+                   ROUND(AVG(total_score), 4) AS avg_score
+            FROM stock_recommendations
+            WHERE date BETWEEN ? AND ?
+            GROUP BY 1, 2 ORDER BY 1, 2
+        ''',
+    },
+    'confidence_hit_rate': {
+        'title': '各信心等级命中率（5 个交易日内触及目标价）',
+        # 结果列由夜间任务按本地日线回填（见 services.rec_history）；命中率只统计 5 日窗口已完整的记录，
+        # 部分跟踪的记录只计入已有的收益
+        'sql': '''
+            SELECT confidence, COUNT(*) AS picks,
+                   COUNT(CASE WHEN outcome_status = 'done' THEN hit_target END) AS samples,
+                   ROUND(AVG(CASE WHEN outcome_status = 'done' THEN CAST(hit_target AS DOUBLE) END), 4) AS hit_rate,
+                   ROUND(AVG(CASE WHEN outcome_status = 'done' THEN CAST(hit_stop AS DOUBLE) END), 4) AS stop_rate,
+                   ROUND(AVG(ret_1d), 4) AS avg_ret_1d,
+                   ROUND(AVG(ret_5d), 4) AS avg_ret_5d
+            FROM recommendation_history
+            WHERE date BETWEEN ? AND ? AND outcome_status IN ('done', 'partial', 'expired')
+            GROUP BY confidence ORDER BY confidence
+        ''',
+        'requires': HISTORY_VIEW,
+    },
+    'daily_summary': {
+        'title': '每日推荐概览',
+        'sql': '''
+            SELECT date, COUNT(*) AS picks, ROUND(AVG(total_score), 4) AS avg_score,
+                   SUM(CASE WHEN confidence = 'very_high' THEN 1 ELSE 0 END) AS very_high,
+                   COUNT(DISTINCT market) AS markets
+            FROM stock_recommendations
+            WHERE date BETWEEN ? AND ?
+            GROUP BY date ORDER BY date DESC
+        ''',
+    },
+    'deep_rating_distribution': {
+        'title': '深度分析评级分布',
+        'sql': '''
+            SELECT investment_rating, COUNT(*) AS reports,
+                   ROUND(AVG(total_score), 4) AS avg_score,
+                   ROUND(AVG(expected_return_pct), 2) AS avg_expected_return
+            FROM deep_analysis
+            WHERE analysis_date BETWEEN ? AND ?
+            GROUP BY investment_rating ORDER BY reports DESC
+        ''',
+    },
+    'screener_usage': {
+        'title': '条件选股模板使用情况',
+        'sql': '''
+            SELECT COALESCE(NULLIF(preset_key, ''), 'custom') AS preset_key, COUNT(*) AS runs,
+                   ROUND(AVG(result_count), 1) AS avg_results
+            FROM screener_records
+            WHERE substr(created_at, 1, 10) BETWEEN ? AND ?
+            GROUP BY 1 ORDER BY runs DESC
+        ''',
+    },
+}
+
+
+class AnalyticsService:
+    """聚合查询服务（DuckDB 镜像优先，SQLite 兜底）"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, mirror_path=DEFAULT_MIRROR_PATH, sync_interval=SYNC_INTERVAL):
+        """
+        @param {str} db_path - 业务库路径
+        @param {str} mirror_path - DuckDB 镜像文件路径
+        @param {float} sync_interval - 查询前自动增量同步的最小间隔（秒）
+        """
+        self.db_path = db_path
+        self.mirror_path = mirror_path
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._duck = None
+        self._last_sync = 0.0
+        self.backend = 'sqlite'
+
+        if duckdb is not None:
+            try:
+                directory = os.path.dirname(mirror_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._duck = duckdb.connect(mirror_path)
+                self._ensure_mirror()
+                self.backend = 'duckdb'
+            except Exception as e:
+                # 镜像文件被其他进程持有写锁时退回 SQLite
+                print(f"⚠️ DuckDB 镜像不可用，统计查询使用 SQLite: {e}")
+                self._duck = None
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def query(self, name, start_date=None, end_date=None):
+        """
+        执行聚合查询
+
+        @param {str} name - QUERIES 中的查询名
+        @param {str} start_date - 起始日期，缺省为一年前
+        @param {str} end_date - 截止日期，缺省为今天
+        @returns {list[dict]}
+        """
+        if name not in QUERIES:
+            raise KeyError(name)
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        start_date = start_date or (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+        sql = QUERIES[name]['sql'].format(week=WEEK_EXPR[self.backend])
+        params = (start_date, end_date)
+
+        if self._duck is None:
+            with closing(open_readonly(self.db_path)) as conn:
+                required = QUERIES[name].get('requires')
+                if required and not conn.execute(
+                        'SELECT 1 FROM sqlite_master WHERE name = ?', (required,)).fetchone():
+                    # 尚未写入过推荐历史
+                    return []
+                cursor = conn.execute(sql, params)
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        if time.time() - self._last_sync > self.sync_interval:
+            self.sync()
+        with self._lock:
+            cursor = self._duck.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def info(self):
+        """
+        查询后端与可用查询列表
+
+        @returns {dict}
+        """
+        return {
+            'backend': self.backend,
+            'last_sync': (datetime.fromtimestamp(self._last_sync).strftime('%Y-%m-%d %H:%M:%S')
+                          if self._last_sync else None),
+            'queries': [{'key': key, 'title': q['title']} for key, q in QUERIES.items()],
+        }
+
+    # ------------------------------------------------------------------
+    # 镜像同步
+    # ------------------------------------------------------------------
+    def sync(self):
+        """
+        增量同步业务库到 DuckDB 镜像
+
+        @returns {dict} {表名: 新增行数}，未启用镜像时返回空字典
+        """
+        if self._duck is None:
+            return {}
+        conn = get_database(self.db_path).connect()
+        synced = {}
+        with self._lock:
+            for table, columns in MIRROR_TABLES.items():
+                synced[table] = self._sync_table(conn, table, columns)
+            synced[HISTORY_VIEW] = self._sync_history(conn)
+            self._last_sync = time.time()
+        return synced
+
+    def _ensure_mirror(self):
+        self._duck.execute(
+            'CREATE TABLE IF NOT EXISTS _mirror_state (table_name VARCHAR PRIMARY KEY, last_id BIGINT)'
+        )
+        self._duck.execute(
+            'CREATE TABLE IF NOT EXISTS _history_state (partition_name VARCHAR PRIMARY KEY, signature VARCHAR)'
+        )
+        for table, columns in list(MIRROR_TABLES.items()) + [(HISTORY_VIEW, HISTORY_COLUMNS)]:
+            ddl = ', '.join(f'{name} {col_type}' for name, col_type in columns)
+            self._duck.execute(f'CREATE TABLE IF NOT EXISTS {table} ({ddl})')
+
+    def _sync_history(self, conn):
+        """推荐历史按分区比对签名，有变化的月份整月替换"""
+        names = [name for name, _ in HISTORY_COLUMNS]
+        casts = ', '.join(f'CAST({name} AS {col_type})' for name, col_type in HISTORY_COLUMNS)
+        synced = 0
+        for partition in get_recommendation_history(self.db_path).partitions(conn):
+            signature = repr(conn.execute(HISTORY_SIGNATURE_SQL.format(name=partition)).fetchone())
+            row = self._duck.execute(
+                'SELECT signature FROM _history_state WHERE partition_name = ?', (partition,)
+            ).fetchone()
+            if row and row[0] == signature:
+                continue
+            month = partition[len(PARTITION_PREFIX):]
+            frame = pd.read_sql_query(f"SELECT {', '.join(names)} FROM {partition}", conn)
+            self._duck.execute(
+                f"DELETE FROM {HISTORY_VIEW} WHERE substr(date, 1, 4) || substr(date, 6, 2) = ?", (month,)
+            )
+            if not frame.empty:
+                self._duck.register('incoming', frame)
+                self._duck.execute(f'INSERT INTO {HISTORY_VIEW} SELECT {casts} FROM incoming')
+                self._duck.unregister('incoming')
+            self._duck.execute('INSERT OR REPLACE INTO _history_state VALUES (?, ?)', (partition, signature))
+            synced += len(frame)
+        return synced
+
+    def _sync_table(self, conn, table, columns):
+        """按 id 高水位增量同步单表"""
+        row = self._duck.execute(
+            'SELECT last_id FROM _mirror_state WHERE table_name = ?', (table,)
+        ).fetchone()
+        last_id = row[0] if row else 0
+
+        names = [name for name, _ in columns]
+        frame = pd.read_sql_query(
+            f"SELECT {', '.join(names)} FROM {table} WHERE id > ? ORDER BY id",
+            conn, params=(last_id,)
+        )
+
+        if table == 'stock_recommendations' and not frame.empty:
+            # 推荐按日整体重写（先删后插），新 id 所在日期的镜像数据整体替换
+            dates = frame['date'].dropna().unique().tolist()
+            self._duck.execute(
+                f"DELETE FROM stock_recommendations WHERE date IN ({', '.join('?' * len(dates))})", dates
+            )
+        elif table == 'deep_analysis' and not frame.empty:
+            # 同一股票同一交易日的报告覆盖写入（新 id），镜像中删除被替换的旧报告
+            self._duck.register('replaced', frame[['symbol', 'analysis_date']])
+            self._duck.execute(
+                'DELETE FROM deep_analysis WHERE EXISTS (SELECT 1 FROM replaced r '
+                'WHERE r.symbol = deep_analysis.symbol AND r.analysis_date = deep_analysis.analysis_date)'
+            )
+            self._duck.unregister('replaced')
+        elif table == 'screener_records':
+            # 选股记录可被删除，对齐现存 id
+            existing = pd.read_sql_query('SELECT id FROM screener_records', conn)
+            self._duck.register('existing_ids', existing)
+            self._duck.execute('DELETE FROM screener_records WHERE id NOT IN (SELECT id FROM existing_ids)')
+            self._duck.unregister('existing_ids')
+
+        if frame.empty:
+            return 0
+
+        casts = ', '.join(f'CAST({name} AS {col_type})' for name, col_type in columns)
+        self._duck.register('incoming', frame)
+        self._duck.execute(f'INSERT INTO {table} SELECT {casts} FROM incoming')
+        self._duck.unregister('incoming')
+        self._duck.execute(
+            'INSERT OR REPLACE INTO _mirror_state VALUES (?, ?)', (table, int(frame['id'].max()))
+        )
+        return len(frame)
+
+
+_services_lock = threading.Lock()
+_services = {}
+
+
+def get_analytics_service(db_path=DEFAULT_DB_PATH, mirror_path=DEFAULT_MIRROR_PATH):
+    """
+    获取统计分析服务（进程内共享）
+
+    @returns {AnalyticsService}
+    """
+    key = (os.path.abspath(db_path), os.path.abspath(mirror_path))
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = _services[key] = AnalyticsService(db_path, mirror_path)
+    return service
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 本地日线行情库
+把 BaoStock 日线缓存到 daily_bars 表，供推荐结果跟踪、回放与走势缩略图使用
+
+- 分析流程取到的日线顺带入库（经持久化队列批量写入）
+- sync 按股票增量补齐缺失区间，一次登录完成整批下载
+- 读取按 SQLite 参数上限分块，返回长表或 (交易日 × 股票) 面板
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+
+
+BAR_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+BAR_UPSERT = '''
+    INSERT OR REPLACE INTO daily_bars (symbol, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+MAX_SQL_PARAMS = 900
+# 起始日可能落在长假中：本地最早日线不晚于起始日之后这么多天即视为已覆盖
+START_TOLERANCE_DAYS = 10
+
+
+def bar_rows(symbol, frame):
+    """
+    把日线 DataFrame 转为 BAR_UPSERT 参数
+
+    @param {str} symbol - 股票代码（BaoStock 格式，如 sh.600000）
+    @param {DataFrame} frame - 含 date 与 open/high/low/close/volume 列
+    @returns {list[tuple]}
+    """
+    if frame is None or frame.empty:
+        return []
+    data = frame.copy()
+    for col in BAR_FIELDS:
+        data[col] = pd.to_numeric(data[col], errors='coerce') if col in data.columns else None
+    data = data.dropna(subset=['close'])
+    dates = data['date'].astype(str).str[:10]
+    return [
+        (symbol, date, *(None if pd.isna(v) else float(v) for v in values))
+        for date, values in zip(dates, data[list(BAR_FIELDS)].itertuples(index=False, name=None))
+    ]
+
+
+class BarStore:
+    """日线行情的本地存储"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        """
+        @param {str} db_path - 数据库路径
+        """
+        self.db = get_database(db_path)
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def write(self, symbol, frame):
+        """
+        写入（覆盖）一只股票的日线
+
+        @returns {int} 写入行数
+        """
+        rows = bar_rows(symbol, frame)
+        if rows:
+            with self.db.transaction() as conn:
+                conn.executemany(BAR_UPSERT, rows)
+        return len(rows)
+
+    def sync(self, symbols, start_date, end_date=None):
+        """
+        从 BaoStock 增量补齐日线（本地已覆盖起始日的股票从最后一个交易日之后开始，否则从起始日重新下载）
+
+        @param {list} symbols - 股票代码
+        @param {str} start_date - 需要覆盖的最早日期
+        @param {str} end_date - 截止日期，缺省为今天
+        @returns {int} 新写入行数
+        """
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        date_ranges = self.date_ranges(symbols)
+        covered = (datetime.strptime(start_date, '%Y-%m-%d')
+                   + timedelta(days=START_TOLERANCE_DAYS)).strftime('%Y-%m-%d')
+        todo = []
+        for symbol in symbols:
+            first, last = date_ranges.get(symbol, (None, None))
+            begin = start_date
+            if last and last >= start_date and first <= covered:
+                begin = (datetime.strptime(last, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            if begin <= end_date:
+                todo.append((symbol, begin))
+        if not todo:
+            return 0
+
+        import baostock as bs
+        lg = bs.login()
+        if lg.error_code != '0':
+            print(f"⚠️ BaoStock 登录失败，跳过日线同步: {lg.error_msg}")
+            return 0
+
+        written = 0
+        try:
+            for symbol, begin in todo:
+                try:
+                    rs = bs.query_history_k_data_plus(symbol, 'date,open,high,low,close,volume',
+                                                      start_date=begin, end_date=end_date,
+                                                      frequency='d')
+                    written += self.write(symbol, rs.get_data())
+                except Exception as e:
+                    print(f"⚠️ 同步 {symbol} 日线失败: {e}")
+        finally:
+            bs.logout()
+        print(f"📈 日线同步完成: {len(todo)} 只股票，新增 {written} 条")
+        return written
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def load_bars(self, symbols, start_date, end_date=None):
+        """
+        读取日线长表
+
+        @returns {DataFrame} 列: symbol, date, open, high, low, close, volume
+        """
+        columns = ['symbol', 'date', *BAR_FIELDS]
+        symbols = list(dict.fromkeys(symbols))
+        frames = []
+        for i in range(0, len(symbols), MAX_SQL_PARAMS):
+            chunk = symbols[i:i + MAX_SQL_PARAMS]
+            sql = (f"SELECT {', '.join(columns)} FROM daily_bars "
+                   f"WHERE symbol IN ({','.join('?' * len(chunk))}) AND date >= ?")
+            params = [*chunk, start_date]
+            if end_date:
+                sql += ' AND date <= ?'
+                params.append(end_date)
+            frames.append(pd.read_sql_query(sql, self.db.connect(), params=params))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True).sort_values(['symbol', 'date'], ignore_index=True)
+
+    def load_panel(self, symbols, start_date, end_date=None, field='close'):
+        """
+        读取 (交易日 × 股票) 面板，可直接作为 ScreenerReplay 的 price_provider
+
+        @returns {DataFrame}
+        """
+        bars = self.load_bars(symbols, start_date, end_date)
+        if bars.empty:
+            return pd.DataFrame()
+        return bars.pivot(index='date', columns='symbol', values=field).sort_index()
+
+    def date_ranges(self, symbols):
+        """
+        各股票本地日线的起止交易日
+
+        @returns {dict} {symbol: (first_date, last_date)}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        result = {}
+        conn = self.db.connect()
+        for i in range(0, len(symbols), MAX_SQL_PARAMS):
+            chunk = symbols[i:i + MAX_SQL_PARAMS]
+            for symbol, first, last in conn.execute(
+                f"SELECT symbol, MIN(date), MAX(date) FROM daily_bars "
+                f"WHERE symbol IN ({','.join('?' * len(chunk))}) GROUP BY symbol", chunk
+            ):
+                result[symbol] = (first, last)
+        return result
+
+    def last_dates(self, symbols):
+        """
+        各股票本地最后一个交易日
+
+        @returns {dict} {symbol: date}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        result = {}
+        conn = self.db.connect()
+        for i in range(0, len(symbols), MAX_SQL_PARAMS):
+            chunk = symbols[i:i + MAX_SQL_PARAMS]
+            result.update(conn.execute(
+                f"SELECT symbol, MAX(date) FROM daily_bars "
+                f"WHERE symbol IN ({','.join('?' * len(chunk))}) GROUP BY symbol", chunk
+            ).fetchall())
+        return result
+
+
+_stores_lock = threading.Lock()
+_stores = {}
+
+
+def get_bar_store(db_path=DEFAULT_DB_PATH):
+    """
+    获取日线行情库（同一数据库在进程内共享）
+
+    @returns {BarStore}
+    """
+    key = get_database(db_path).db_path
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(key, BarStore(key))
+    return store
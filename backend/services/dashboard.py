@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 仪表盘首屏数据
+/api/dashboard 一次返回首屏所需的全部数据：系统状态、最新推荐、策略配置、选股模板与最近的选股记录
+
+- 各部分都来自已有的快照服务，读库时共用当前线程的同一条连接
+- 组装好的快照按数据版本缓存：推荐快照、策略配置、选股记录、状态快照与调度开关的版本号
+  任一变化（包括其他 worker 的写入）即重新组装，否则最多复用 STATUS_TTL 秒
+- 快照的 ETag 由内容摘要生成；字段投影与条数限制在缓存的快照上完成，不再读库
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.picks_snapshot import CACHE_KEY as PICKS_CACHE_KEY, get_picks_snapshot_service
+from backend.services.scheduler_control import ENABLED_KEY as SCHEDULER_CACHE_KEY
+from backend.services.shared_cache import get_shared_cache
+from backend.services.strategy_config import CACHE_KEY as CONFIG_CACHE_KEY, get_strategy_config_service
+from backend.services.system_status import CACHE_KEY as STATUS_CACHE_KEY, STATUS_TTL, get_system_status_service
+from stock_screener.models import CACHE_KEY as RECORDS_CACHE_KEY, ScreenerRecordManager
+
+
+SECTIONS = ('status', 'picks', 'strategy_config', 'presets', 'records')
+PICKS_LIMIT = 10
+MAX_PICKS_LIMIT = 200
+RECORDS_LIMIT = 20
+MAX_RECORDS_LIMIT = 100
+
+
+def _json_default(value):
+    # 推荐数据中可能混有 numpy 标量
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def parse_fields(fields):
+    """
+    解析字段投影
+
+    @param {str} fields - 逗号分隔，如 "status,picks.symbol,picks.total_score,presets"；
+                          "picks.列名" 只返回推荐的指定列，为空表示全部
+    @returns {dict} {部分: 列名集合或 None（全部列）}
+    @raises {ValueError} 未知的部分
+    """
+    projection = {}
+    for field in (fields or '').split(','):
+        field = field.strip()
+        if not field:
+            continue
+        section, _, column = field.partition('.')
+        if section not in SECTIONS:
+            raise ValueError(f"未知字段: {section}，可选: {', '.join(SECTIONS)}")
+        if column:
+            if projection.get(section, set()) is not None:
+                projection.setdefault(section, set()).add(column)
+        else:
+            projection[section] = None
+    return projection or {section: None for section in SECTIONS}
+
+
+class DashboardService:
+    """仪表盘首屏数据快照"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, status_loader=None, ttl=STATUS_TTL):
+        """
+        @param {str} db_path - 数据库路径
+        @param {callable} status_loader - 返回系统状态字典，缺省为状态快照服务
+        @param {float} ttl - 版本未变时快照的最长复用时间（秒）
+        """
+        self.db_path = get_database(db_path).db_path
+        self.cache = get_shared_cache(db_path)
+        self.status_loader = status_loader or get_system_status_service(db_path).snapshot
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._records = ScreenerRecordManager(self.db_path)
+
+    def versions(self):
+        """
+        各部分的数据版本
+
+        @returns {tuple}
+        """
+        return tuple(self.cache.version(key) for key in (
+            PICKS_CACHE_KEY, CONFIG_CACHE_KEY, RECORDS_CACHE_KEY, STATUS_CACHE_KEY, SCHEDULER_CACHE_KEY
+        ))
+
+    def snapshot(self):
+        """
+        当前快照
+
+        @returns {tuple} (ETag, 数据)；数据为共享对象，调用方不得修改
+        """
+        versions = self.versions()
+        cached = self._snapshot
+        if cached is None or cached['versions'] != versions or time.time() >= cached['expires_at']:
+            with self._lock:
+                cached = self._snapshot
+                if cached is None or cached['versions'] != versions or time.time() >= cached['expires_at']:
+                    data = self._build()
+                    digest = hashlib.sha1(
+                        json.dumps(data, sort_keys=True, default=_json_default).encode('utf-8')
+                    ).hexdigest()[:16]
+                    # 组装过程中状态快照可能刚被重建（版本递增），以组装后的版本为准
+                    cached = self._snapshot = {
+                        'versions': self.versions(),
+                        'expires_at': time.time() + self.ttl,
+                        'etag': f'dashboard-{digest}',
+                        'data': data,
+                    }
+        return cached['etag'], cached['data']
+
+    def render(self, fields=None, picks_limit=PICKS_LIMIT, records_limit=RECORDS_LIMIT):
+        """
+        按字段投影与条数限制生成响应数据
+
+        @param {str} fields - 字段投影（见 parse_fields）
+        @param {int} picks_limit - 推荐条数
+        @param {int} records_limit - 选股记录条数
+        @returns {tuple} (ETag, 数据)
+        @raises {ValueError} 未知字段
+        """
+        projection = parse_fields(fields)
+        picks_limit = max(0, min(picks_limit, MAX_PICKS_LIMIT))
+        records_limit = max(0, min(records_limit, MAX_RECORDS_LIMIT))
+        etag, data = self.snapshot()
+
+        result = {}
+        for section, columns in projection.items():
+            value = data[section]
+            if section == 'picks' and value is not None:
+                items = value['items'][:picks_limit]
+                if columns:
+                    items = [{k: v for k, v in item.items() if k in columns} for item in items]
+                value = dict(value, items=items)
+            elif section == 'records':
+                value = value[:records_limit]
+            result[section] = value
+
+        params = f"{sorted((s, sorted(c) if c else None) for s, c in projection.items())}|{picks_limit}|{records_limit}"
+        return f"{etag}-{hashlib.sha1(params.encode('utf-8')).hexdigest()[:8]}", result
+
+    def _build(self):
+        from stock_screener.screener import StockScreener
+
+        snapshot = get_picks_snapshot_service(self.db_path).current()
+        picks = None
+        if snapshot is not None:
+            picks = {
+                'version': snapshot['version'],
+                'analysis_date': snapshot['analysis_date'],
+                'analysis_time': snapshot['analysis_time'],
+                'total': len(snapshot['recommendations']),
+                'items': snapshot['recommendations'][:MAX_PICKS_LIMIT],
+            }
+
+        return {
+            'status': self.status_loader(),
+            'picks': picks,
+            'strategy_config': get_strategy_config_service(self.db_path).snapshot(),
+            'presets': StockScreener.get_preset_list(),
+            'records': self._records.get_records(limit=MAX_RECORDS_LIMIT),
+        }
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 数据库连接管理
+统一管理 SQLite 连接与表结构
+
+- 每个线程复用一条连接（按数据库路径区分），避免每次操作重新打开文件
+- WAL 日志模式：分析任务写入时仪表盘读取不再被阻塞
+- busy_timeout：写锁竞争时等待而不是立即抛出 "database is locked"
+- 新建库使用增量 auto_vacuum，归档后的空间由维护任务回收（见 services.maintenance）
+- 全部建表语句与结构迁移集中在本模块，在进程内首次连接时执行（导入与创建服务对象不触发 DDL）
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+DEFAULT_DB_PATH = "data/cchan_web.db"
+
+# 连接参数
+BUSY_TIMEOUT_MS = 10000
+CACHE_SIZE_KB = 20000
+
+# auto_vacuum 只对尚未建表的新库生效，须在建表前设置
+PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# ----------------------------------------------------------------------
+# 表结构
+# ----------------------------------------------------------------------
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS stock_recommendations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        stock_name TEXT,
+        market TEXT,
+        current_price REAL,
+        total_score REAL,
+        tech_score REAL,
+        auction_score REAL,
+        auction_ratio REAL,
+        gap_type TEXT,
+        confidence TEXT,
+        strategy TEXT,
+        entry_price REAL,
+        stop_loss REAL,
+        target_price REAL,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS system_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        config_key TEXT UNIQUE NOT NULL,
+        config_value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS system_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        level TEXT NOT NULL,
+        message TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS stock_analysis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL,
+        stock_name TEXT,
+        analysis_date TEXT,
+        total_score REAL,
+        tech_score REAL,
+        auction_score REAL,
+        confidence TEXT,
+        entry_price REAL,
+        stop_loss REAL,
+        target_price REAL,
+        explanation TEXT,
+        explain_html TEXT,
+        mini_prices TEXT,
+        explain_hash TEXT,
+        prices_hash TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (symbol, analysis_date)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS explain_blobs (
+        hash TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS screener_records (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        name        TEXT NOT NULL,
+        conditions  TEXT NOT NULL,
+        result_count INTEGER DEFAULT 0,
+        result_symbols TEXT,
+        result_summary TEXT,
+        result_data TEXT,
+        preset_key  TEXT,
+        created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS deep_analysis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL,
+        stock_name TEXT,
+        analysis_date TEXT,
+
+        -- 基础数据
+        current_price REAL,
+        price_change_pct REAL,
+        volume_ratio REAL,
+        market_cap_billion REAL,
+
+        -- 技术指标详细数据
+        rsi_14 REAL,
+        macd_signal TEXT,
+        ma5 REAL,
+        ma10 REAL,
+        ma20 REAL,
+        ma60 REAL,
+        bollinger_position REAL,
+
+        -- 资金流向数据
+        main_inflow REAL,
+        retail_inflow REAL,
+        institutional_inflow REAL,
+        net_inflow REAL,
+
+        -- 竞价分析
+        auction_ratio REAL,
+        auction_volume_ratio REAL,
+        gap_type TEXT,
+
+        -- LLM分析结果
+        llm_analysis_text TEXT,
+        investment_rating TEXT,
+        confidence_level TEXT,
+        risk_assessment TEXT,
+
+        -- 投资建议
+        buy_point TEXT,
+        sell_point TEXT,
+        stop_loss_price REAL,
+        target_price REAL,
+        expected_return_pct REAL,
+        holding_period_days INTEGER,
+        position_suggestion REAL,
+
+        -- 评分
+        technical_score REAL,
+        fundamental_score REAL,
+        sentiment_score REAL,
+        total_score REAL,
+
+        -- 完整报告（JSON），供详情页直接渲染
+        report_json TEXT,
+
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # 最近一次完整分析的推荐结果（见 services.picks_snapshot），只保留最新一行
+    '''
+    CREATE TABLE IF NOT EXISTS picks_snapshot (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_date TEXT,
+        analysis_time TEXT,
+        payload TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # 本地日线行情库（见 services.bar_store），按 (symbol, date) 聚簇存放
+    '''
+    CREATE TABLE IF NOT EXISTS daily_bars (
+        symbol TEXT NOT NULL,
+        date TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (symbol, date)
+    ) WITHOUT ROWID
+    ''',
+)
+
+# 旧库补列：(表名, 列名, 列定义)
+COLUMNS = (
+    ('screener_records', 'result_data', 'TEXT'),
+    ('stock_analysis', 'explanation', 'TEXT'),
+    ('stock_analysis', 'explain_html', 'TEXT'),
+    ('stock_analysis', 'mini_prices', 'TEXT'),
+    ('stock_analysis', 'explain_hash', 'TEXT'),
+    ('stock_analysis', 'prices_hash', 'TEXT'),
+    ('deep_analysis', 'report_json', 'TEXT'),
+)
+
+INDEXES = (
+    '''
+    CREATE INDEX IF NOT EXISTS idx_screener_records_created
+    ON screener_records (created_at DESC, id DESC)
+    ''',
+)
+
+# 版本化迁移：(版本号, 语句列表)，按版本号递增执行，当前版本记录在 PRAGMA user_version
+MIGRATIONS = (
+    # 1: 推荐表查询索引（按日期取当日推荐 / 按股票查历史 / 最近更新时间）
+    (1, (
+        '''
+        CREATE INDEX IF NOT EXISTS idx_recommendations_date_score
+        ON stock_recommendations (date, total_score DESC)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_recommendations_symbol_created
+        ON stock_recommendations (symbol, created_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_recommendations_created
+        ON stock_recommendations (created_at)
+        ''',
+    )),
+    # 2: 深度报告按 (股票, 交易日) 读取缓存
+    (2, (
+        '''
+        CREATE INDEX IF NOT EXISTS idx_deep_analysis_symbol_date
+        ON deep_analysis (symbol, analysis_date)
+        ''',
+    )),
+    # 3: 深度报告每只股票每个交易日只保留一条（保留最新写入），此后 INSERT OR REPLACE 按该键覆盖
+    (3, (
+        '''
+        DELETE FROM deep_analysis
+        WHERE id NOT IN (SELECT MAX(id) FROM deep_analysis GROUP BY symbol, analysis_date)
+        ''',
+        'DROP INDEX IF EXISTS idx_deep_analysis_symbol_date',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_deep_analysis_symbol_date
+        ON deep_analysis (symbol, analysis_date)
+        ''',
+    )),
+)
+
+
+def ensure_schema(conn):
+    """
+    建表、补列、建索引并执行未完成的迁移（幂等）
+
+    @param {sqlite3.Connection} conn
+    """
+    for statement in SCHEMA:
+        conn.execute(statement)
+    for table, column, decl in COLUMNS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    for statement in INDEXES:
+        conn.execute(statement)
+    conn.commit()
+    migrate(conn)
+
+
+def migrate(conn):
+    """
+    执行尚未应用的版本化迁移，每个版本单独提交
+
+    @param {sqlite3.Connection} conn
+    @returns {int} 迁移后的版本号
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute(f"PRAGMA user_version={int(target)}")
+        conn.commit()
+        print(f"🗄️ 数据库迁移至版本 {target}")
+        version = target
+    return version
+
+
+# ----------------------------------------------------------------------
+# 连接管理
+# ----------------------------------------------------------------------
+class Database:
+    """单个数据库文件的连接管理器（每线程一条连接）"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connect(self):
+        """
+        获取当前线程的连接，首次调用时创建并设置 PRAGMA；进程内首个连接负责建表
+
+        @returns {sqlite3.Connection}
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        if not self._schema_ready:
+            self._create_schema(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        写事务：正常结束时提交，异常时回滚
+
+        用法:
+            with db.transaction() as conn:
+                conn.execute(...)
+        """
+        conn = self.connect()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def query(self, sql, params=()):
+        """
+        执行查询并以字典列表返回
+
+        @returns {list[dict]}
+        """
+        cursor = self.connect().execute(sql, params)
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def ensure_schema(self):
+        """确保表结构已创建（每个进程只执行一次，通常由首次连接自动完成）"""
+        self.connect()
+
+    def _create_schema(self, conn):
+        with self._schema_lock:
+            if not self._schema_ready:
+                ensure_schema(conn)
+                self._schema_ready = True
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_registry_lock = threading.Lock()
+_databases = {}
+
+
+def get_database(db_path=DEFAULT_DB_PATH):
+    """
+    获取数据库管理器（同一路径在进程内共享）
+
+    @param {str} db_path - 数据库路径
+    @returns {Database}
+    """
+    key = os.path.abspath(db_path)
+    db = _databases.get(key)
+    if db is None:
+        with _registry_lock:
+            db = _databases.setdefault(key, Database(key))
+    return db
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 深度报告缓存
+详情页按 (股票, 交易日) 读取已生成的深度分析报告，不再每次访问都重新分析
+
+- 读取顺序：进程内 LRU → deep_analysis.report_json（当日报告）→ 现场生成
+- 每日分析完成后，后台为当日全部推荐股票预先生成报告
+- 报告的落库仍由 DeepStockAnalyzer 经持久化队列完成，这里只在内存中登记
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.trading_calendar import trading_date
+
+
+MEMORY_SIZE = 256
+
+
+def _json_default(value):
+    # 报告中混有 numpy 标量与 pandas 时间戳
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def report_json(report):
+    """
+    序列化完整报告（写入 deep_analysis.report_json）
+
+    @param {dict} report - generate_deep_analysis_report 的返回值
+    @returns {str}
+    """
+    return json.dumps(report, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+class DeepReportCache:
+    """按 (股票, 交易日) 缓存的深度报告"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, memory_size=MEMORY_SIZE):
+        """
+        @param {str} db_path - 数据库路径
+        @param {int} memory_size - 进程内缓存的报告数
+        """
+        self.db = get_database(db_path)
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol, date=None):
+        """
+        读取缓存的报告
+
+        @param {str} symbol - 股票代码
+        @param {str} date - 交易日，缺省为当前交易日
+        @returns {dict|None}
+        """
+        key = (symbol, date or trading_date())
+        with self._lock:
+            report = self._memory.get(key)
+            if report is not None:
+                self._memory.move_to_end(key)
+                return report
+
+        row = self.db.connect().execute('''
+            SELECT report_json FROM deep_analysis
+            WHERE symbol = ? AND analysis_date = ? AND report_json IS NOT NULL
+            ORDER BY id DESC LIMIT 1
+        ''', key).fetchone()
+        if not row:
+            return None
+        report = json.loads(row[0])
+        self._remember(key, report)
+        return report
+
+    def put(self, report):
+        """登记刚生成的报告（落库由分析器的持久化队列完成）"""
+        if report and report.get('symbol'):
+            self._remember((report['symbol'], report.get('analysis_date') or trading_date()), report)
+
+    def get_or_generate(self, symbol, analyzer=None):
+        """
+        读取当日报告，没有时现场生成
+
+        @param {str} symbol - 股票代码
+        @param {DeepStockAnalyzer} analyzer - 复用的分析器实例
+        @returns {dict} 报告，生成失败时为空字典
+        """
+        report = self.get(symbol)
+        if report is not None:
+            return report
+        if analyzer is None:
+            from analysis.deep_stock_analyzer import DeepStockAnalyzer
+            analyzer = DeepStockAnalyzer()
+        report = analyzer.generate_deep_analysis_report(symbol)
+        self.put(report)
+        return report
+
+    def precompute(self, job, symbols):
+        """
+        为一组股票预先生成当日报告（后台任务执行函数）
+
+        @param {Job} job - 用于上报进度
+        @param {list} symbols - 股票代码
+        @returns {dict} {generated, cached, failed}
+        """
+        from analysis.deep_stock_analyzer import DeepStockAnalyzer
+        analyzer = None
+        result = {'generated': 0, 'cached': 0, 'failed': 0}
+        job.progress(stage='预生成深度报告', processed=0, total=len(symbols))
+        for i, symbol in enumerate(symbols, 1):
+            try:
+                if self.get(symbol) is not None:
+                    result['cached'] += 1
+                else:
+                    analyzer = analyzer or DeepStockAnalyzer()
+                    report = self.get_or_generate(symbol, analyzer)
+                    result['generated' if report else 'failed'] += 1
+            except Exception as e:
+                result['failed'] += 1
+                print(f"⚠️ 预生成 {symbol} 深度报告失败: {e}")
+            job.progress(processed=i)
+        print(f"🔬 深度报告预生成完成: {result}")
+        return result
+
+    def _remember(self, key, report):
+        with self._lock:
+            self._memory[key] = report
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+
+_caches_lock = threading.Lock()
+_caches = {}
+
+
+def get_deep_report_cache(db_path=DEFAULT_DB_PATH):
+    """
+    获取深度报告缓存（同一数据库在进程内共享）
+
+    @returns {DeepReportCache}
+    """
+    key = get_database(db_path).db_path
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(key, DeepReportCache(key))
+    return cache
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 进程内事件总线
+后台任务进度、新落库的推荐与竞价信号变化通过总线发布，/api/events 以 SSE 推送给浏览器
+
+- 主题：job（任务进度）、recommendations（推荐已保存）、auction（竞价信号变化）
+- 每个订阅者一个有界队列，慢客户端积压超过 MAX_PENDING 时丢弃其最早的事件，不阻塞发布方
+- 保留最近 REPLAY_SIZE 个事件，断线重连时按 Last-Event-ID 补发
+- 多 worker 部署时事件同时追加到进程间共享缓存的事件日志（事件 id 全局递增），
+  每个进程的转发线程每 RELAY_INTERVAL 秒读取其他进程发布的事件并推送给本进程的订阅者
+"""
+
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from backend.services.shared_cache import get_shared_cache
+
+
+TOPICS = ('job', 'recommendations', 'auction')
+REPLAY_SIZE = 200
+MAX_PENDING = 500
+RELAY_INTERVAL = 0.5
+
+
+def _json_default(value):
+    # 事件数据中可能混有 numpy 标量
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def format_sse(event):
+    """
+    编码为一条 SSE 消息
+
+    @param {dict} event - {id, topic, data, ts}
+    @returns {str}
+    """
+    data = json.dumps(event['data'], ensure_ascii=False, separators=(',', ':'), default=_json_default)
+    return f"id: {event['id']}\nevent: {event['topic']}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """一个订阅者的事件队列"""
+
+    def __init__(self, bus, topics, max_pending=MAX_PENDING):
+        self.bus = bus
+        self.topics = set(topics)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def get(self, timeout=None):
+        """
+        取下一个事件
+
+        @param {float} timeout - 等待秒数
+        @returns {dict|None} 超时返回 None
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """取消订阅"""
+        self.bus.unsubscribe(self)
+
+    def _offer(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """进程内发布/订阅"""
+
+    def __init__(self, replay_size=REPLAY_SIZE, store=None, relay_interval=RELAY_INTERVAL):
+        """
+        @param {int} replay_size - 保留用于断线补发的事件数
+        @param {SharedCache} store - 进程间共享的事件日志，为 None 时只在进程内发布
+        @param {float} relay_interval - 转发其他进程事件的轮询间隔（秒）
+        """
+        self.store = store
+        self.relay_interval = relay_interval
+        self._ids = itertools.count(1)
+        self._recent = deque(maxlen=replay_size)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._relay = None
+
+    def publish(self, topic, data):
+        """
+        发布事件（线程安全，不阻塞）
+
+        @param {str} topic - 主题
+        @param {dict} data - 事件数据
+        @returns {dict} 事件 {id, topic, data, ts}
+        """
+        ts = time.time()
+        event_id = self.store.append_event(topic, data, ts) if self.store else None
+        with self._lock:
+            event = {'id': event_id or next(self._ids), 'topic': topic, 'data': data, 'ts': ts}
+            self._deliver(event)
+        return event
+
+    def _deliver(self, event):
+        # 调用方持有 self._lock
+        self._recent.append(event)
+        for subscription in self._subscribers:
+            if event['topic'] in subscription.topics:
+                subscription._offer(event)
+
+    def subscribe(self, topics=TOPICS, last_event_id=None, max_pending=MAX_PENDING):
+        """
+        订阅主题
+
+        @param {iterable} topics - 订阅的主题
+        @param {int} last_event_id - 客户端收到的最后一个事件 id，之后的事件先行补发
+        @param {int} max_pending - 积压上限，超出时丢弃最早的事件
+        @returns {Subscription}
+        """
+        subscription = Subscription(self, topics, max_pending)
+        with self._lock:
+            if last_event_id is not None:
+                # 客户端可能重连到另一个 worker，有共享日志时以日志为准
+                recent = self.store.events_after(last_event_id, self._recent.maxlen) if self.store else self._recent
+                for event in recent:
+                    if event['id'] > last_event_id and event['topic'] in subscription.topics:
+                        subscription._offer(event)
+            self._subscribers.append(subscription)
+            # 先登记订阅者再检查转发线程：正在退出的线程已在同一把锁下置空 _relay，不会留下无人转发的订阅者
+            if self.store and self._relay is None:
+                self._relay = threading.Thread(target=self._relay_loop, args=(self.store.last_event_id(),),
+                                               name='event-relay', daemon=True)
+                self._relay.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _relay_loop(self, cursor):
+        """转发其他进程发布到共享日志的事件；没有订阅者时退出，下次订阅时重新启动"""
+        while True:
+            time.sleep(self.relay_interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._relay = None
+                    return
+            try:
+                events = self.store.events_after(cursor)
+            except Exception as e:
+                print(f"⚠️ 读取共享事件日志失败: {e}")
+                continue
+            pid = os.getpid()
+            with self._lock:
+                for event in events:
+                    cursor = event['id']
+                    if event.pop('origin') != pid:
+                        self._deliver(event)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """
+    获取进程内共享的事件总线（事件同时写入数据目录下的共享事件日志）
+
+    @returns {EventBus}
+    """
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = EventBus(store=get_shared_cache())
+    return _bus
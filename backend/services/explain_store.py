@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 解释内容存储
+stock_analysis 只保存解释字段与价格序列的内容哈希，内容本身按哈希去重存放在 explain_blobs
+
+- 解释 HTML 不再落库，读取时用 explain_builder 的编译模板按结构化字段渲染
+- 相同内容（同一字段组合 / 同一价格序列）只存一份
+- 旧版直接保存 explain_html / mini_prices 的记录仍可读取
+- 新记录只保存解释字段，走势缩略图由 services.mini_charts 按本地日线生成
+- 已归档的记录内嵌解释内容（explain_data / prices_data），库中无记录时可从归档读取
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+
+from backend.explain_builder import render_explain_html
+
+
+BLOB_INSERT = '''
+    INSERT OR IGNORE INTO explain_blobs (hash, data) VALUES (?, ?)
+'''
+
+
+def dumps(value):
+    """紧凑、键有序的 JSON，保证相同内容得到相同哈希"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def content_hash(data):
+    """
+    内容哈希
+
+    @param {str} data - 序列化后的内容
+    @returns {str} sha1 十六进制
+    """
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def blob_writes(fields, prices=None):
+    """
+    生成解释字段与价格序列的存储语句
+
+    @param {dict} fields - build_explain_fields 返回的结构化字段
+    @param {list} prices - 价格序列；新记录不再保存（走势图取自本地日线，见 services.mini_charts），为 None 时 prices_hash 为 None
+    @returns {tuple} (explain_hash, prices_hash, [(statement, params), ...])
+    """
+    writes = []
+    hashes = []
+    for value in (fields, prices):
+        if value is None:
+            hashes.append(None)
+            continue
+        data = dumps(value)
+        digest = content_hash(data)
+        writes.append((BLOB_INSERT, (digest, data)))
+        hashes.append(digest)
+    return hashes[0], hashes[1], writes
+
+
+@lru_cache(maxsize=1024)
+def _render(explain_hash, data):
+    return render_explain_html(json.loads(data))
+
+
+def load_latest_detail(conn, symbol, archive=None):
+    """
+    读取股票最近一次分析的解释 HTML 与价格序列
+
+    @param {sqlite3.Connection} conn
+    @param {str} symbol - 股票代码
+    @param {ArchiveStore} archive - 归档存储，库中没有记录时从归档查找
+    @returns {tuple|None} (html, prices)，没有记录时返回 None
+    """
+    row = conn.execute('''
+        SELECT a.explain_html, a.mini_prices, a.explain_hash, f.data, p.data
+        FROM stock_analysis a
+        LEFT JOIN explain_blobs f ON f.hash = a.explain_hash
+        LEFT JOIN explain_blobs p ON p.hash = a.prices_hash
+        WHERE a.symbol = ?
+        ORDER BY a.created_at DESC LIMIT 1
+    ''', (symbol,)).fetchone()
+    if not row and archive is not None:
+        archived = archive.find('stock_analysis', symbol=symbol)
+        if archived:
+            row = tuple(archived.get(key) for key in
+                        ('explain_html', 'mini_prices', 'explain_hash', 'explain_data', 'prices_data'))
+    if not row:
+        return None
+
+    legacy_html, legacy_prices, explain_hash, fields_data, prices_data = row
+    if fields_data:
+        html = _render(explain_hash, fields_data)
+    else:
+        html = legacy_html
+    if not html:
+        return None
+
+    try:
+        prices = json.loads(prices_data or legacy_prices or "[]")
+    except ValueError:
+        prices = []
+    return html, prices
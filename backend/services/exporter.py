@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 历史数据批量导出
+按日期范围把推荐、深度分析与选股记录以 CSV / NDJSON / Parquet 流式导出，内存占用与导出行数无关
+
+- 独立的只读连接（mode=ro）上逐批 fetchmany，不一次性取出结果集，也不占用共享的事务连接
+- 已归档到 archive/ 的记录按月读取、先于库内记录输出（归档记录一定更早）
+- 选股记录的压缩列解码为 JSON（CSV / Parquet 中为 JSON 文本）
+- Parquet 需要可选依赖 pyarrow：逐批写入行组并随写随发，未安装时报错提示
+
+命令行:
+    python -m backend.services.exporter stock_recommendations --format ndjson --start 2024-01-01 --end 2024-03-31 -o recs.ndjson
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+from backend.services.database import BUSY_TIMEOUT_MS, DEFAULT_DB_PATH
+from backend.services.maintenance import get_archive_store
+from stock_screener.models import ScreenerRecordManager
+
+
+# 可导出的表及其日期筛选列
+EXPORT_TABLES = {
+    'stock_recommendations': 'date',
+    'deep_analysis': 'analysis_date',
+    'screener_records': 'created_at',
+}
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+BATCH_ROWS = 1000
+
+# 存为压缩 BLOB 或 JSON 文本的列，导出时解码
+JSON_COLUMNS = {
+    'screener_records': ('conditions', 'result_symbols', 'result_summary', 'result_data'),
+}
+
+
+class ExportError(ValueError):
+    """导出参数无效或缺少依赖"""
+
+
+def _parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ExportError(f'{name} 日期格式应为 YYYY-MM-DD: {value}')
+
+
+def _json_default(value):
+    # 数据中可能混有 numpy 标量
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def open_readonly(db_path=DEFAULT_DB_PATH):
+    """
+    打开只读连接（导出、统计等长时间读取使用，不影响共享连接上的事务）
+
+    @returns {sqlite3.Connection}
+    """
+    path = os.path.abspath(db_path)
+    if not os.path.exists(path):
+        raise ExportError(f'数据库不存在: {db_path}')
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    return conn
+
+
+class Exporter:
+    """单次导出任务：校验参数，逐批产出记录"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, table='stock_recommendations', fmt='csv',
+                 start=None, end=None, batch_rows=BATCH_ROWS):
+        """
+        @param {str} db_path - 数据库路径
+        @param {str} table - 导出的表，见 EXPORT_TABLES
+        @param {str} fmt - csv / ndjson / parquet
+        @param {str} start - 起始日期 YYYY-MM-DD（含），为空不限
+        @param {str} end - 结束日期 YYYY-MM-DD（含），为空不限
+        @param {int} batch_rows - 每批读取行数
+        @raises {ExportError} 参数无效或缺少 pyarrow
+        """
+        if table not in EXPORT_TABLES:
+            raise ExportError(f"不支持导出 {table}，可选: {', '.join(EXPORT_TABLES)}")
+        if fmt not in FORMATS:
+            raise ExportError(f"不支持的格式 {fmt}，可选: {', '.join(FORMATS)}")
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ExportError('导出 Parquet 需要安装 pyarrow（pip install pyarrow），或改用 csv / ndjson')
+
+        start_date = _parse_date(start, 'start')
+        end_date = _parse_date(end, 'end')
+        self.db_path = db_path
+        self.table = table
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.date_column = EXPORT_TABLES[table]
+        self.start = start_date.strftime('%Y-%m-%d') if start_date else None
+        self.end = end_date.strftime('%Y-%m-%d') if end_date else None
+        # 结束日期含当天：created_at 为时间戳，按“小于次日”比较
+        self.end_before = (end_date + timedelta(days=1)).strftime('%Y-%m-%d') if end_date else None
+        self.conn = open_readonly(db_path)
+        self.columns = self._columns()
+
+    @property
+    def content_type(self):
+        return FORMATS[self.fmt]
+
+    @property
+    def filename(self):
+        parts = [self.table] + [part for part in (self.start, self.end) if part]
+        return f"{'_'.join(parts)}.{self.fmt}"
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def _columns(self):
+        """[(列名, 声明类型)]"""
+        return [(row[1], (row[2] or '').upper()) for row in self.conn.execute(f'PRAGMA table_info({self.table})')]
+
+    def _in_range(self, value):
+        value = str(value or '')
+        return (not self.start or value >= self.start) and (not self.end_before or value < self.end_before)
+
+    def iter_batches(self):
+        """
+        逐批产出记录（先归档后库内）
+
+        @returns {generator} 每次产出 list[dict]，列顺序与表结构一致
+        """
+        names = [name for name, _ in self.columns]
+        decode = JSON_COLUMNS.get(self.table, ())
+        try:
+            for batch in self._archived_batches(names):
+                yield [self._decode(row, decode) for row in batch]
+
+            clauses, params = [], []
+            if self.start:
+                clauses.append(f'{self.date_column} >= ?')
+                params.append(self.start)
+            if self.end_before:
+                clauses.append(f'{self.date_column} < ?')
+                params.append(self.end_before)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            # 按主键顺序扫描，避免为排序物化整个结果集
+            cursor = self.conn.execute(f'SELECT * FROM {self.table} {where} ORDER BY id', params)
+            while True:
+                rows = cursor.fetchmany(self.batch_rows)
+                if not rows:
+                    break
+                yield [self._decode(dict(zip(names, row)), decode) for row in rows]
+        finally:
+            self.conn.close()
+
+    def _archived_batches(self, names):
+        """归档按 created_at 的月份存放，逐月读取并按日期列过滤"""
+        archive = get_archive_store(self.db_path)
+        first = self.start[:7] if self.start else None
+        # 记录通常在推荐日当天或稍后写入，结束月份放宽到结束日次日所在月份
+        last = self.end_before[:7] if self.end_before else None
+        for month in sorted(archive.months(self.table)):
+            if (first and month < first) or (last and month > last):
+                continue
+            rows = [row for row in archive.read_month(self.table, month) if self._in_range(row.get(self.date_column))]
+            rows.sort(key=lambda row: row.get('id') or 0)
+            for i in range(0, len(rows), self.batch_rows):
+                yield [{name: row.get(name) for name in names} for row in rows[i:i + self.batch_rows]]
+
+    @staticmethod
+    def _decode(row, columns):
+        for column in columns:
+            try:
+                row[column] = ScreenerRecordManager._unpack(row.get(column), None)
+            except (ValueError, TypeError):
+                pass
+        return row
+
+    # ------------------------------------------------------------------
+    # 编码
+    # ------------------------------------------------------------------
+    def stream(self):
+        """
+        按格式编码的输出块
+
+        @returns {generator} CSV / NDJSON 产出 str，Parquet 产出 bytes
+        """
+        if self.fmt == 'csv':
+            return self._stream_csv()
+        if self.fmt == 'ndjson':
+            return self._stream_ndjson()
+        return self._stream_parquet()
+
+    def _stream_csv(self):
+        names = [name for name, _ in self.columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        yield buffer.getvalue()
+        for batch in self.iter_batches():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in batch:
+                writer.writerow([_dumps(v) if isinstance(v, (dict, list)) else v for v in row.values()])
+            yield buffer.getvalue()
+
+    def _stream_ndjson(self):
+        for batch in self.iter_batches():
+            yield ''.join(_dumps(row) + '\n' for row in batch)
+
+    def _stream_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        def arrow_type(declared):
+            if 'INT' in declared:
+                return pa.int64()
+            if any(t in declared for t in ('REAL', 'FLOA', 'DOUB', 'NUMERIC')):
+                return pa.float64()
+            return pa.string()
+
+        schema = pa.schema([(name, arrow_type(declared)) for name, declared in self.columns])
+        text_columns = [name for name, _ in self.columns if schema.field(name).type == pa.string()]
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+            for batch in self.iter_batches():
+                for row in batch:
+                    for name in text_columns:
+                        value = row[name]
+                        if value is not None and not isinstance(value, str):
+                            row[name] = _dumps(value) if isinstance(value, (dict, list)) else str(value)
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        yield sink.drain()
+
+
+class _ChunkSink(io.RawIOBase):
+    """只追加的输出流：写入的字节在 drain() 时取走，Parquet 行组写完即可发送"""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CChanTrader-AI 历史数据导出')
+    parser.add_argument('table', choices=list(EXPORT_TABLES), help='导出的表')
+    parser.add_argument('--format', default='csv', choices=list(FORMATS), help='输出格式，默认 csv')
+    parser.add_argument('--start', help='起始日期 YYYY-MM-DD（含）')
+    parser.add_argument('--end', help='结束日期 YYYY-MM-DD（含）')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='数据库路径')
+    parser.add_argument('-o', '--output', help='输出文件，缺省写到标准输出')
+    args = parser.parse_args()
+
+    try:
+        exporter = Exporter(args.db, args.table, args.format, start=args.start, end=args.end)
+    except ExportError as e:
+        parser.error(str(e))
+
+    binary = args.format == 'parquet'
+    if args.output:
+        out = open(args.output, 'wb' if binary else 'w', encoding=None if binary else 'utf-8', newline=None if binary else '')
+    else:
+        out = sys.stdout.buffer if binary else sys.stdout
+    try:
+        for chunk in exporter.stream():
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    if args.output:
+        print(f"✅ 已导出 {args.table} 到 {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI HTTP 响应压缩与条件请求
+移动端在交易时段带宽有限，选股结果、记录详情等大体积 JSON 压缩后返回，数据未变时直接 304
+
+- 压缩：超过 MIN_COMPRESS_SIZE 的文本响应按 Accept-Encoding 选择 brotli（需安装可选依赖 brotli）或 gzip；
+  流式响应（/api/export、/api/events 等）与文件响应不压缩，保持边生成边发送
+- ETag：由数据版本号生成（不必先组装响应再求摘要）；压缩后的响应改为弱 ETag，
+  条件判断统一按弱比较，压缩与未压缩的表示共用同一个版本
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+from flask import current_app, request
+
+
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+# 兼顾压缩率与 CPU：brotli 4 级的压缩率与 gzip 9 级相当而速度更快
+BROTLI_QUALITY = 4
+COMPRESSIBLE_TYPES = (
+    'application/json', 'text/html', 'text/css', 'text/plain', 'text/csv',
+    'application/javascript', 'text/javascript', 'image/svg+xml',
+)
+
+
+def not_modified(etag):
+    """
+    请求的 If-None-Match 是否与当前版本一致（弱比较）
+
+    @param {str} etag - 当前版本的 ETag（不含引号）
+    @returns {bool}
+    """
+    return request.if_none_match.contains_weak(etag)
+
+
+def conditional(response_factory, etag):
+    """
+    按版本返回 304 或完整响应
+
+    @param {callable} response_factory - 版本变化时生成完整响应；调用方已确认未变化时可为 None
+    @param {str} etag - 当前版本的 ETag
+    @returns {Response}
+    """
+    response = current_app.response_class(status=304) if not_modified(etag) else response_factory()
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _choose_encoding(accept_encoding):
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """
+    after_request：按需压缩响应体
+
+    @param {Response} response
+    @returns {Response}
+    """
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    为应用注册响应压缩
+
+    @param {Flask} app
+    """
+    app.after_request(compress_response)
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 后台任务队列
+耗时的分析任务交给进程内的工作线程池执行，HTTP 请求只负责提交并立即返回任务 id
+
+- 任务执行函数的第一个参数为 Job，通过 job.progress(...) 上报阶段与处理进度
+- 同类任务已在排队或执行时直接返回已有任务，避免重复发起全市场扫描
+- 只保留最近 MAX_JOBS 个已结束的任务
+- 状态与进度变化发布到事件总线的 job 主题（进度事件最多每 PUBLISH_INTERVAL 秒一次）
+- 发布时同时写入进程间共享缓存，多 worker 部署下其他 worker 也能按 id 查询任务状态与结果
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from backend.services.events import get_event_bus
+from backend.services.shared_cache import get_shared_cache
+
+
+MAX_WORKERS = 2
+MAX_JOBS = 100
+PUBLISH_INTERVAL = 0.5
+# 共享缓存中任务状态的保留时间（秒）
+SHARED_TTL = 3600
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Job:
+    """单个后台任务的状态"""
+
+    def __init__(self, kind, params=None, store=None):
+        """
+        @param {str} kind - 任务类型，如 'analysis'
+        @param {dict} params - 提交参数（作为关键字参数传给执行函数）
+        @param {SharedCache} store - 写入任务状态的共享缓存，为 None 时只在进程内可见
+        """
+        self.store = store
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.status = QUEUED
+        self.stage = '排队中'
+        self.processed = 0
+        self.total = 0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._published_at = 0.0
+        self._lock = threading.Lock()
+
+    def progress(self, stage=None, processed=None, total=None, message=None):
+        """
+        上报进度（由任务执行函数调用，线程安全）
+
+        @param {str} stage - 当前阶段
+        @param {int} processed - 已处理数量
+        @param {int} total - 总数量
+        @param {str} message - 附加说明
+        """
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            if processed is not None:
+                self.processed = processed
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+        self.publish(force=stage is not None)
+
+    def publish(self, force=False):
+        """
+        发布当前状态到事件总线
+
+        @param {bool} force - 为 False 时距上次发布不足 PUBLISH_INTERVAL 秒则跳过
+        """
+        now = time.time()
+        if not force and now - self._published_at < PUBLISH_INTERVAL:
+            return
+        self._published_at = now
+        if self.store:
+            self.store.set(_shared_key(self.id), self.to_dict(include_result=self.finished), ttl=SHARED_TTL)
+        get_event_bus().publish('job', self.to_dict())
+
+    @property
+    def eta_seconds(self):
+        """按已处理速度估算的剩余秒数，无法估算时为 None"""
+        if self.status != RUNNING or not self._started or not self.processed or not self.total:
+            return None
+        elapsed = time.time() - self._started
+        remaining = max(self.total - self.processed, 0)
+        return round(elapsed / self.processed * remaining, 1)
+
+    def to_dict(self, include_result=False):
+        """
+        任务状态
+
+        @param {bool} include_result - 是否包含任务结果
+        @returns {dict}
+        """
+        with self._lock:
+            data = {
+                'id': self.id,
+                'kind': self.kind,
+                'params': self.params,
+                'status': self.status,
+                'stage': self.stage,
+                'processed': self.processed,
+                'total': self.total,
+                'percent': round(self.processed / self.total * 100, 1) if self.total else None,
+                'eta_seconds': self.eta_seconds,
+                'message': self.message,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+    @property
+    def finished(self):
+        return self.status not in ACTIVE_STATES
+
+
+def _shared_key(job_id):
+    return f'job:{job_id}'
+
+
+class SharedJobView:
+    """其他 worker 中任务的只读视图（来自共享缓存）"""
+
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def id(self):
+        return self._data['id']
+
+    @property
+    def error(self):
+        return self._data.get('error')
+
+    @property
+    def finished(self):
+        return self._data['status'] not in ACTIVE_STATES
+
+    def to_dict(self, include_result=False):
+        data = dict(self._data)
+        if not include_result:
+            data.pop('result', None)
+        return data
+
+
+class JobManager:
+    """进程内任务队列与工作线程池"""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_jobs=MAX_JOBS, store=None):
+        """
+        @param {int} max_workers - 工作线程数
+        @param {int} max_jobs - 保留的任务记录数上限
+        @param {SharedCache} store - 共享任务状态的缓存，为 None 时任务只在进程内可见
+        """
+        self.max_jobs = max_jobs
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, params=None, dedupe=True):
+        """
+        提交任务
+
+        @param {str} kind - 任务类型
+        @param {callable} func - 执行函数 func(job, **params)，返回值作为任务结果
+        @param {dict} params - 传给执行函数的关键字参数
+        @param {bool} dedupe - 同类任务未结束时是否直接返回该任务
+        @returns {tuple} (Job, 是否新提交)
+        """
+        with self._lock:
+            if dedupe:
+                for job in reversed(self._jobs.values()):
+                    if job.kind == kind and not job.finished:
+                        return job, False
+            job = Job(kind, params, store=self.store)
+            self._jobs[job.id] = job
+            self._prune()
+        job.publish(force=True)
+        self._executor.submit(self._run, job, func)
+        return job, True
+
+    def get(self, job_id):
+        """
+        按 id 查询任务；本进程没有时查共享缓存（任务由其他 worker 提交）
+
+        @returns {Job|SharedJobView|None}
+        """
+        job = self._jobs.get(job_id)
+        if job is None and self.store:
+            data = self.store.get(_shared_key(job_id))
+            job = SharedJobView(data) if data else None
+        return job
+
+    def list(self, kind=None, limit=20):
+        """
+        最近的任务（新的在前）
+
+        @returns {list[Job]}
+        """
+        with self._lock:
+            jobs = [job for job in reversed(self._jobs.values()) if kind is None or job.kind == kind]
+        return jobs[:limit]
+
+    def latest(self, kind):
+        """
+        某类型最近一次提交的任务
+
+        @returns {Job|None}
+        """
+        jobs = self.list(kind, limit=1)
+        return jobs[0] if jobs else None
+
+    def shutdown(self, wait=True):
+        """停止接收新任务"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, func):
+        job._started = time.time()
+        job.started_at = _now()
+        job.status = RUNNING
+        job.progress(stage='开始执行')
+        try:
+            job.result = func(job, **job.params)
+            job.status = SUCCEEDED
+            job.stage = '已完成'
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+            job.stage = '执行失败'
+        job.finished_at = _now()
+        job.publish(force=True)
+
+    def _prune(self):
+        """超出上限时丢弃最早的已结束任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[job_id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    获取进程内共享的任务队列
+
+    @returns {JobManager}
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager(store=get_shared_cache())
+    return _manager
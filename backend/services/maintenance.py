@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 数据保留与归档
+定期把过期记录移出业务库，按月压缩归档，并回收数据库空间
+
+- 保留天数按表配置（环境变量 RETENTION_DAYS_<表名> 可覆盖，0 表示永久保留）
+- 过期记录按 created_at 所在月份追加到 <数据目录>/archive/<表名>/<YYYY-MM>.jsonl.gz
+- 先写归档再删库，中途失败时最多在归档中留下重复行（读取时按 id 去重）
+- 每个月度归档旁有股票代码索引（<YYYY-MM>.symbols.json），按代码查找时只读取相关月份
+- stock_analysis 归档时内嵌解释内容，随后清理不再被引用的 explain_blobs
+- data/ 下带时间戳的 JSON 输出（竞价分析、日报）按月打包为 archive/files/<YYYY-MM>.zip
+- 归档后执行增量 VACUUM 与 ANALYZE
+
+命令行:
+    python -m backend.services.maintenance [--dry-run] [--db data/cchan_web.db]
+"""
+
+import base64
+import fnmatch
+import gzip
+import json
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+
+
+# 各表默认保留天数
+RETENTION_DEFAULTS = {
+    'system_logs': 90,
+    'screener_records': 180,
+    'stock_analysis': 180,
+    'deep_analysis': 365,
+}
+FILE_RETENTION_DAYS = 30
+FILE_PATTERNS = ('auction_analysis_*.json', 'daily_report_*.json')
+
+BATCH_ROWS = 2000
+# 月度归档旁的股票代码索引，按代码查找时跳过不含该股票的月份
+SYMBOL_INDEX_SUFFIX = '.symbols.json'
+VACUUM_PAGES = 5000
+ANALYSIS_LIMIT = 1000
+
+_FILE_DATE = re.compile(r'_(\d{8})')
+_run_lock = threading.Lock()
+
+
+def archive_dir_for(db_path):
+    """归档目录：与数据库文件同目录下的 archive/"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'archive')
+
+
+def retention_config(overrides=None):
+    """
+    当前生效的保留天数
+
+    @param {dict} overrides - {表名: 天数}，优先级最高
+    @returns {dict} {表名: 天数}，另含 'files' 表示 JSON 输出文件
+    """
+    config = dict(RETENTION_DEFAULTS, files=FILE_RETENTION_DAYS)
+    for key in config:
+        value = os.getenv(f'RETENTION_DAYS_{key.upper()}')
+        if value not in (None, ''):
+            try:
+                config[key] = int(value)
+            except ValueError:
+                print(f"⚠️ 无效的保留天数 RETENTION_DAYS_{key.upper()}={value}")
+    config.update(overrides or {})
+    return config
+
+
+# ----------------------------------------------------------------------
+# 归档存储
+# ----------------------------------------------------------------------
+def _encode(value):
+    # screener_records 的压缩列为 BLOB
+    if isinstance(value, (bytes, memoryview)):
+        return {'$b64': base64.b64encode(bytes(value)).decode('ascii')}
+    raise TypeError(f'无法序列化 {type(value).__name__}')
+
+
+def _decode(obj):
+    if len(obj) == 1 and '$b64' in obj:
+        return base64.b64decode(obj['$b64'])
+    return obj
+
+
+@lru_cache(maxsize=32)
+def _read_month(path, mtime_ns, size):
+    """读取并按 id 去重一个月度归档（按文件修改时间与大小缓存）"""
+    rows = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line, object_hook=_decode)
+                rows[row.get('id')] = row
+    return tuple(rows.values())
+
+
+class ArchiveStore:
+    """按表、按月组织的压缩归档"""
+
+    def __init__(self, archive_dir):
+        """
+        @param {str} archive_dir - 归档根目录
+        """
+        self.archive_dir = archive_dir
+
+    # ------------------------------------------------------------------
+    # 表记录
+    # ------------------------------------------------------------------
+    def append(self, table, month, rows):
+        """
+        追加记录到月度归档（gzip 多成员追加，已有内容无需重写）
+
+        @param {str} table - 表名
+        @param {str} month - YYYY-MM
+        @param {list[dict]} rows
+        """
+        directory = os.path.join(self.archive_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        # 先更新股票代码索引：中途失败时索引只会多出代码（多读一个月），不会漏掉记录
+        symbols = {row.get('symbol') for row in rows if row.get('symbol')}
+        if symbols:
+            self._write_symbols(table, month, self.month_symbols(table, month) | symbols)
+        with gzip.open(os.path.join(directory, f'{month}.jsonl.gz'), 'at', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=_encode))
+                f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def months(self, table):
+        """
+        已归档的月份（降序）
+
+        @returns {list[str]}
+        """
+        directory = os.path.join(self.archive_dir, table)
+        if not os.path.isdir(directory):
+            return []
+        return sorted((name[:-len('.jsonl.gz')] for name in os.listdir(directory)
+                       if name.endswith('.jsonl.gz')), reverse=True)
+
+    def read_month(self, table, month):
+        """
+        读取一个月的归档记录
+
+        @returns {list[dict]} 记录副本，调用方可自由修改
+        """
+        path = os.path.join(self.archive_dir, table, f'{month}.jsonl.gz')
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+        return [dict(row) for row in _read_month(path, stat.st_mtime_ns, stat.st_size)]
+
+    def iter_newest(self, table, before=None):
+        """
+        按 (created_at, id) 降序遍历归档记录，逐月读取
+
+        @param {tuple} before - (created_at, id)，只返回严格小于该位置的记录
+        """
+        for month in self.months(table):
+            if before and month > before[0][:7]:
+                continue
+            rows = self.read_month(table, month)
+            rows.sort(key=lambda r: (r.get('created_at') or '', r.get('id') or 0), reverse=True)
+            for row in rows:
+                if before and (row.get('created_at') or '', row.get('id') or 0) >= tuple(before):
+                    continue
+                yield row
+
+    def month_symbols(self, table, month):
+        """
+        月度归档中出现的股票代码（索引文件 <YYYY-MM>.symbols.json；缺失时由归档内容生成并保存）
+
+        @returns {set}
+        """
+        path = os.path.join(self.archive_dir, table, f'{month}{SYMBOL_INDEX_SUFFIX}')
+        try:
+            with open(path, encoding='utf-8') as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            pass
+        symbols = {row.get('symbol') for row in self.read_month(table, month) if row.get('symbol')}
+        if os.path.exists(os.path.join(self.archive_dir, table, f'{month}.jsonl.gz')):
+            self._write_symbols(table, month, symbols)
+        return symbols
+
+    def _write_symbols(self, table, month, symbols):
+        path = os.path.join(self.archive_dir, table, f'{month}{SYMBOL_INDEX_SUFFIX}')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(sorted(symbols), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def find(self, table, **equals):
+        """
+        查找最新一条字段全部相等的记录
+
+        按 symbol 查找时先查各月的股票代码索引，只读取包含该股票的月份
+
+        @returns {dict|None}
+        """
+        symbol = equals.get('symbol')
+        for month in self.months(table):
+            if symbol is not None and symbol not in self.month_symbols(table, month):
+                continue
+            rows = [row for row in self.read_month(table, month)
+                    if all(row.get(key) == value for key, value in equals.items())]
+            if rows:
+                return max(rows, key=lambda r: (r.get('created_at') or '', r.get('id') or 0))
+        return None
+
+    def summary(self):
+        """
+        各表归档月份与文件大小
+
+        @returns {dict} {表名: [{'month', 'bytes'}, ...]}
+        """
+        result = {}
+        if not os.path.isdir(self.archive_dir):
+            return result
+        for table in sorted(os.listdir(self.archive_dir)):
+            directory = os.path.join(self.archive_dir, table)
+            if not os.path.isdir(directory):
+                continue
+            result[table] = [
+                {'month': name.split('.')[0], 'bytes': os.path.getsize(os.path.join(directory, name))}
+                for name in sorted(os.listdir(directory), reverse=True)
+                if name.endswith(('.jsonl.gz', '.zip'))
+            ]
+        return result
+
+    # ------------------------------------------------------------------
+    # JSON 输出文件
+    # ------------------------------------------------------------------
+    def add_file(self, path, month):
+        """
+        把文件打包进月度 zip 后删除原文件
+
+        @param {str} path - 文件路径
+        @param {str} month - YYYY-MM
+        """
+        directory = os.path.join(self.archive_dir, 'files')
+        os.makedirs(directory, exist_ok=True)
+        name = os.path.basename(path)
+        with zipfile.ZipFile(os.path.join(directory, f'{month}.zip'), 'a', zipfile.ZIP_DEFLATED) as zf:
+            if name not in zf.namelist():
+                zf.write(path, arcname=name)
+        os.remove(path)
+
+    def read_file(self, name):
+        """
+        读取已归档的 JSON 输出文件
+
+        @param {str} name - 原文件名
+        @returns {str|None} 文件内容
+        """
+        directory = os.path.join(self.archive_dir, 'files')
+        if not os.path.isdir(directory):
+            return None
+        archives = sorted((n for n in os.listdir(directory) if n.endswith('.zip')), reverse=True)
+        # 文件名带日期时先查该月的压缩包（无日期的文件按修改时间归档，仍需逐月查找）
+        match = _FILE_DATE.search(name)
+        if match:
+            first = f'{match.group(1)[:4]}-{match.group(1)[4:6]}.zip'
+            if first in archives:
+                archives.remove(first)
+                archives.insert(0, first)
+        for archive in archives:
+            with zipfile.ZipFile(os.path.join(directory, archive)) as zf:
+                if name in zf.namelist():
+                    return zf.read(name).decode('utf-8')
+        return None
+
+
+def get_archive_store(db_path=DEFAULT_DB_PATH):
+    """
+    获取数据库对应的归档存储
+
+    @returns {ArchiveStore}
+    """
+    return ArchiveStore(archive_dir_for(db_path))
+
+
+# ----------------------------------------------------------------------
+# 维护任务
+# ----------------------------------------------------------------------
+class MaintenanceJob:
+    """保留期清理、归档与空间回收"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, data_dir=None, retention=None):
+        """
+        @param {str} db_path - 数据库路径
+        @param {str} data_dir - JSON 输出文件所在目录，缺省为数据库所在目录
+        @param {dict} retention - 保留天数覆盖，见 retention_config
+        """
+        self.db = get_database(db_path)
+        self.data_dir = data_dir or os.path.dirname(self.db.db_path)
+        self.retention = retention_config(retention)
+        self.archive = ArchiveStore(archive_dir_for(self.db.db_path))
+
+    def run(self, dry_run=False, now=None):
+        """
+        执行一次维护
+
+        @param {bool} dry_run - 只统计将被归档的记录与文件，不做修改
+        @param {datetime} now - 当前时间（测试用）
+        @returns {dict} 执行报告
+        """
+        now = now or datetime.now()
+        if not _run_lock.acquire(blocking=False):
+            return {'skipped': True, 'message': '维护任务正在执行'}
+        try:
+            report = {'dry_run': dry_run, 'tables': {}, 'files': 0}
+            for table in RETENTION_DEFAULTS:
+                days = self.retention.get(table, 0)
+                if days > 0:
+                    cutoff = (now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+                    report['tables'][table] = self.archive_table(table, cutoff, dry_run)
+            if self.retention.get('files', 0) > 0:
+                report['files'] = self.archive_files(now - timedelta(days=self.retention['files']), dry_run)
+            if not dry_run:
+                report['blobs_removed'] = self.prune_blobs()
+                report['vacuum'] = self.compact()
+            print(f"🧹 数据维护完成: {report}")
+            return report
+        finally:
+            _run_lock.release()
+
+    def archive_table(self, table, cutoff, dry_run=False):
+        """
+        归档并删除 created_at 早于 cutoff 的记录（分批，内存占用与表大小无关）
+
+        @returns {int} 归档行数
+        """
+        conn = self.db.connect()
+        if dry_run:
+            return conn.execute(f'SELECT COUNT(*) FROM {table} WHERE created_at < ?', (cutoff,)).fetchone()[0]
+
+        select = f'SELECT * FROM {table} WHERE created_at < ? ORDER BY id LIMIT ?'
+        if table == 'stock_analysis':
+            # 内嵌解释内容，归档记录不依赖 explain_blobs
+            select = '''
+                SELECT a.*, f.data AS explain_data, p.data AS prices_data
+                FROM stock_analysis a
+                LEFT JOIN explain_blobs f ON f.hash = a.explain_hash
+                LEFT JOIN explain_blobs p ON p.hash = a.prices_hash
+                WHERE a.created_at < ? ORDER BY a.id LIMIT ?
+            '''
+
+        archived = 0
+        while True:
+            cursor = conn.execute(select, (cutoff, BATCH_ROWS))
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if not rows:
+                break
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(str(row['created_at'])[:7], []).append(row)
+            for month, month_rows in by_month.items():
+                self.archive.append(table, month, month_rows)
+            with self.db.transaction() as tx:
+                tx.execute(f'DELETE FROM {table} WHERE created_at < ? AND id <= ?', (cutoff, rows[-1]['id']))
+            archived += len(rows)
+
+        if archived:
+            print(f"📦 {table}: 归档 {archived} 条早于 {cutoff} 的记录")
+        return archived
+
+    def archive_files(self, cutoff, dry_run=False):
+        """
+        打包早于 cutoff 的 JSON 输出文件（日期取文件名中的 YYYYMMDD，否则取修改时间）
+
+        @param {datetime} cutoff
+        @returns {int} 文件数
+        """
+        if not os.path.isdir(self.data_dir):
+            return 0
+        count = 0
+        for name in sorted(os.listdir(self.data_dir)):
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in FILE_PATTERNS):
+                continue
+            path = os.path.join(self.data_dir, name)
+            match = _FILE_DATE.search(name)
+            try:
+                stamp = datetime.strptime(match.group(1), '%Y%m%d') if match else None
+            except ValueError:
+                stamp = None
+            stamp = stamp or datetime.fromtimestamp(os.path.getmtime(path))
+            if stamp >= cutoff:
+                continue
+            if not dry_run:
+                self.archive.add_file(path, stamp.strftime('%Y-%m'))
+            count += 1
+        if count and not dry_run:
+            print(f"📦 已归档 {count} 个 JSON 输出文件")
+        return count
+
+    def prune_blobs(self):
+        """
+        删除不再被 stock_analysis 引用的解释内容
+
+        @returns {int} 删除数
+        """
+        with self.db.transaction() as conn:
+            cursor = conn.execute('''
+                DELETE FROM explain_blobs WHERE hash NOT IN (
+                    SELECT explain_hash FROM stock_analysis WHERE explain_hash IS NOT NULL
+                    UNION
+                    SELECT prices_hash FROM stock_analysis WHERE prices_hash IS NOT NULL
+                )
+            ''')
+        return cursor.rowcount
+
+    def compact(self):
+        """
+        回收空闲页并刷新统计信息
+
+        旧库的 auto_vacuum 为 NONE 时先做一次完整 VACUUM 切换到 INCREMENTAL，
+        之后每次只释放至多 VACUUM_PAGES 个空闲页。
+
+        @returns {dict} 回收前后的空闲页数
+        """
+        conn = self.db.connect()
+        conn.commit()
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM')
+        else:
+            conn.execute(f'PRAGMA incremental_vacuum({VACUUM_PAGES})').fetchall()
+        conn.execute(f'PRAGMA analysis_limit={ANALYSIS_LIMIT}')
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+        after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return {'freelist_before': before, 'freelist_after': after}
+
+
+def run_maintenance(db_path=DEFAULT_DB_PATH, dry_run=False, retention=None):
+    """
+    执行一次数据维护（调度器与管理接口共用入口）
+
+    @returns {dict} 执行报告
+    """
+    return MaintenanceJob(db_path, retention=retention).run(dry_run=dry_run)
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CChanTrader-AI 数据保留与归档')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='数据库路径')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不修改数据')
+    for table, days in retention_config().items():
+        parser.add_argument(f'--{table.replace("_", "-")}-days', type=int, dest=table,
+                            help=f'{table} 保留天数（当前 {days}，0 为永久保留）')
+    args = parser.parse_args()
+
+    overrides = {key: getattr(args, key) for key in retention_config() if getattr(args, key) is not None}
+    report = run_maintenance(args.db, dry_run=args.dry_run, retention=overrides)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
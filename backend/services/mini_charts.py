@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 走势缩略图
+详情弹窗的迷你走势图取自本地日线库（daily_bars），不再随分析生成、落库模拟价格
+
+- 收盘价序列用 LTTB（Largest-Triangle-Three-Buckets）降采样到固定点数，保留峰谷形态
+- 结果按 (股票, 区间, 点数, 最后一根日线的日期) 缓存：日线更新后键自然变化，无需失效
+- 返回紧凑的列式数组：t 为距起始日的天数（整数），c 为收盘价；
+  也可按 little-endian float32 交错数组 [t0, c0, t1, c1, ...] 返回二进制
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.services.bar_store import get_bar_store
+from backend.services.database import DEFAULT_DB_PATH, get_database
+
+
+# 区间 -> 自然日天数
+RANGES = {'1m': 31, '3m': 92, '6m': 183, '1y': 366}
+DEFAULT_RANGE = '3m'
+DEFAULT_POINTS = 60
+MIN_POINTS = 3
+MAX_POINTS = 240
+CACHE_SIZE = 1024
+
+
+def lttb(x, y, threshold):
+    """
+    LTTB 降采样
+
+    @param {array} x - 单调递增的横坐标
+    @param {array} y - 纵坐标
+    @param {int} threshold - 目标点数（>= 3），不少于原点数时原样返回
+    @returns {ndarray} 选中点的下标（含首尾）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    # 首尾之外的点均分到 threshold - 2 个桶，每个桶选与前一选中点、下一桶均值构成最大三角形的点
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+class MiniChartService:
+    """基于本地日线的走势缩略图"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, cache_size=CACHE_SIZE):
+        """
+        @param {str} db_path - 数据库路径
+        @param {int} cache_size - 缓存的序列数
+        """
+        self.bar_store = get_bar_store(db_path)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def series(self, symbol, range_=DEFAULT_RANGE, points=DEFAULT_POINTS):
+        """
+        降采样后的收盘价序列
+
+        @param {str} symbol - 股票代码（BaoStock 格式）
+        @param {str} range_ - 区间，见 RANGES
+        @param {int} points - 目标点数
+        @returns {dict} {symbol, range, start_date, last_date, bars, t, c}；本地没有日线时 t / c 为空
+        @raises {ValueError} 未知区间
+        """
+        if range_ not in RANGES:
+            raise ValueError(f"未知区间: {range_}，可选: {', '.join(RANGES)}")
+        points = max(MIN_POINTS, min(int(points), MAX_POINTS))
+        last_date = self.bar_store.last_dates([symbol]).get(symbol)
+        key = (symbol, range_, points, last_date)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        result = self._build(symbol, range_, points, last_date)
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _build(self, symbol, range_, points, last_date):
+        result = {'symbol': symbol, 'range': range_, 'start_date': None, 'last_date': last_date,
+                  'bars': 0, 't': [], 'c': []}
+        if not last_date:
+            return result
+
+        end = datetime.strptime(last_date, '%Y-%m-%d')
+        bars = self.bar_store.load_bars([symbol], (end - timedelta(days=RANGES[range_])).strftime('%Y-%m-%d'),
+                                        last_date).dropna(subset=['close'])
+        if bars.empty:
+            return result
+
+        start = datetime.strptime(bars['date'].iloc[0], '%Y-%m-%d')
+        offsets = np.array([(datetime.strptime(d, '%Y-%m-%d') - start).days for d in bars['date']])
+        closes = bars['close'].to_numpy(dtype=float)
+        keep = lttb(offsets, closes, points)
+        result.update({
+            'start_date': start.strftime('%Y-%m-%d'),
+            'bars': len(bars),
+            't': offsets[keep].tolist(),
+            'c': [round(float(v), 3) for v in closes[keep]],
+        })
+        return result
+
+    @staticmethod
+    def to_float32(series):
+        """
+        序列编码为 little-endian float32 交错数组 [t0, c0, t1, c1, ...]
+
+        @param {dict} series - series() 的返回值
+        @returns {bytes}
+        """
+        return np.column_stack([series['t'], series['c']]).astype('<f4').tobytes()
+
+
+_services_lock = threading.Lock()
+_services = {}
+
+
+def get_mini_chart_service(db_path=DEFAULT_DB_PATH):
+    """
+    获取走势缩略图服务（同一数据库在进程内共享）
+
+    @returns {MiniChartService}
+    """
+    key = get_database(db_path).db_path
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.setdefault(key, MiniChartService(key))
+    return service
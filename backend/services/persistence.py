@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 异步持久化队列
+分析结果先入队，由单个写线程批量合并到事务中写入 SQLite
+
+- 分析流程只做内存入队，不再等待磁盘 fsync
+- 同一批次内相同语句合并为 executemany，整批一次提交
+- 批量写入失败时逐条重试，只丢弃出错的记录
+- 进程退出时（atexit）自动刷新队列
+"""
+
+import atexit
+import queue
+import threading
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+
+
+# ----------------------------------------------------------------------
+# 写入语句
+# ----------------------------------------------------------------------
+# explain_html / mini_prices 只为兼容旧数据保留，新记录写入内容哈希（见 services.explain_store）
+STOCK_ANALYSIS_UPSERT = '''
+    INSERT OR REPLACE INTO stock_analysis
+    (symbol, stock_name, analysis_date, total_score, tech_score,
+     auction_score, confidence, entry_price, stop_loss, target_price,
+     explanation, explain_hash, prices_hash, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+'''
+
+# 按 (symbol, analysis_date) 唯一索引覆盖同日的旧报告
+DEEP_ANALYSIS_UPSERT = '''
+    INSERT OR REPLACE INTO deep_analysis (
+        symbol, stock_name, analysis_date,
+        current_price, price_change_pct, volume_ratio, market_cap_billion,
+        rsi_14, macd_signal, ma5, ma10, ma20, ma60, bollinger_position,
+        main_inflow, retail_inflow, institutional_inflow, net_inflow,
+        auction_ratio, auction_volume_ratio, gap_type,
+        llm_analysis_text, investment_rating, confidence_level, risk_assessment,
+        buy_point, sell_point, stop_loss_price, target_price,
+        expected_return_pct, holding_period_days, position_suggestion,
+        technical_score, fundamental_score, sentiment_score, total_score,
+        report_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5
+
+_STOP = object()
+
+
+class PersistenceQueue:
+    """单写线程的批量持久化队列"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        """
+        @param {str} db_path - 数据库路径
+        @param {int} batch_size - 单个事务最多写入的记录数
+        @param {float} flush_interval - 攒批等待时间（秒）
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # 生产者接口
+    # ------------------------------------------------------------------
+    def submit(self, statement, params):
+        """
+        提交一条写入
+
+        @param {str} statement - SQL 语句（建议使用本模块的语句常量）
+        @param {tuple} params - 语句参数
+        """
+        self._ensure_started()
+        self._queue.put((statement, tuple(params)))
+
+    def flush(self):
+        """阻塞直到此前提交的全部记录写入完成"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """刷新剩余记录并停止写线程"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    @property
+    def pending(self):
+        """队列中尚未写入的记录数（近似值）"""
+        return self._queue.qsize()
+
+    # ------------------------------------------------------------------
+    # 写线程
+    # ------------------------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name='persistence-writer', daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self):
+        db = get_database(self.db_path)
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 攒批：在 flush_interval 内尽量多取，直到批次上限
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            records = [entry for entry in batch if entry is not _STOP]
+            try:
+                if records:
+                    self._write(db, records)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                db.close()
+                return
+
+    def _write(self, db, records):
+        """整批写入；失败时逐条重试"""
+        try:
+            with db.transaction() as conn:
+                for statement, rows in self._group(records):
+                    conn.executemany(statement, rows)
+            self.written += len(records)
+        except Exception as e:
+            print(f"⚠️ 批量写入失败，逐条重试: {e}")
+            for statement, params in records:
+                try:
+                    with db.transaction() as conn:
+                        conn.execute(statement, params)
+                    self.written += 1
+                except Exception as row_error:
+                    self.failed += 1
+                    print(f"⚠️ 写入记录失败: {row_error}")
+
+    @staticmethod
+    def _group(records):
+        """按提交顺序把相邻的相同语句合并为一组"""
+        groups = []
+        for statement, params in records:
+            if groups and groups[-1][0] == statement:
+                groups[-1][1].append(params)
+            else:
+                groups.append((statement, [params]))
+        return groups
+
+
+_queues_lock = threading.Lock()
+_queues = {}
+
+
+def get_persistence_queue(db_path=DEFAULT_DB_PATH):
+    """
+    获取持久化队列（同一数据库在进程内共享一个写线程）
+
+    @param {str} db_path - 数据库路径
+    @returns {PersistenceQueue}
+    """
+    key = get_database(db_path).db_path
+    persistence = _queues.get(key)
+    if persistence is None:
+        with _queues_lock:
+            persistence = _queues.setdefault(key, PersistenceQueue(key))
+    return persistence
+
+
+@atexit.register
+def _flush_all_on_exit():
+    """进程退出前写完所有队列"""
+    for persistence in list(_queues.values()):
+        try:
+            persistence.stop()
+        except Exception as e:
+            print(f"⚠️ 退出时刷新写入队列失败: {e}")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 最新推荐快照
+/api/picks 读取最近一次完整分析物化下来的推荐结果，不再在请求中重新分析
+
+- 分析任务完成后 publish() 写入 picks_snapshot 表（只保留最新一行）并刷新内存快照
+- 读取走内存快照；发布时递增进程间共享缓存中的版本键，其他 worker 下次读取即发现并重新加载
+- 版本号即快照行 id，用于生成 ETag
+- 尚无快照时用推荐表最近一日的数据物化一次
+- 发布后在事件总线的 recommendations 主题通知新版本
+"""
+
+import json
+import threading
+from datetime import datetime
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.events import get_event_bus
+from backend.services.shared_cache import get_shared_cache
+
+
+# 共享缓存中的版本键
+CACHE_KEY = 'picks_snapshot'
+
+
+def _json_default(value):
+    # 分析结果中可能混有 numpy 标量
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def filter_picks(recommendations, confidence=None, market=None, min_score=None, limit=10):
+    """
+    在内存中筛选推荐（保持原有排序）
+
+    @param {list[dict]} recommendations
+    @param {str} confidence - 信心等级
+    @param {str} market - 市场
+    @param {float} min_score - 最低综合评分
+    @param {int} limit - 最大返回条数
+    @returns {list[dict]}
+    """
+    picks = recommendations
+    if confidence:
+        picks = [r for r in picks if r.get('confidence') == confidence]
+    if market:
+        picks = [r for r in picks if r.get('market') == market]
+    if min_score is not None:
+        picks = [r for r in picks if (r.get('total_score') or 0) >= min_score]
+    return picks[:limit]
+
+
+class PicksSnapshotService:
+    """最新推荐结果的物化快照"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        """
+        @param {str} db_path - 数据库路径
+        """
+        self.db = get_database(db_path)
+        self.cache = get_shared_cache(db_path)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._cache_version = None
+
+    def publish(self, report):
+        """
+        发布一次完整分析的结果
+
+        @param {dict} report - generate_optimized_recommendations 的返回值
+        @returns {int} 新版本号
+        """
+        recommendations = report.get('recommendations', [])
+        payload = json.dumps(recommendations, ensure_ascii=False, default=_json_default)
+        with self._lock:
+            with self.db.transaction() as conn:
+                version = conn.execute(
+                    'INSERT INTO picks_snapshot (analysis_date, analysis_time, payload) VALUES (?, ?, ?)',
+                    (report.get('date'), report.get('analysis_time'), payload)
+                ).lastrowid
+                conn.execute('DELETE FROM picks_snapshot WHERE id < ?', (version,))
+            self._snapshot = None
+            self.cache.invalidate(CACHE_KEY)
+        get_event_bus().publish('recommendations', {
+            'version': version,
+            'analysis_date': report.get('date'),
+            'analysis_time': report.get('analysis_time'),
+            'total': len(recommendations),
+            'symbols': [r.get('symbol') for r in recommendations[:10]],
+        })
+        return version
+
+    def current(self):
+        """
+        当前快照
+
+        @returns {dict|None} {version, analysis_date, analysis_time, created_at, recommendations}
+        """
+        cache_version = self.cache.version(CACHE_KEY)
+        if self._snapshot is not None and cache_version == self._cache_version:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or cache_version != self._cache_version:
+                self._snapshot = self._load()
+                self._cache_version = cache_version
+            return self._snapshot
+
+    def _load(self):
+        conn = self.db.connect()
+        row = conn.execute('SELECT MAX(id) FROM picks_snapshot').fetchone()
+        version = row[0] if row else None
+        if version is None:
+            version = self._materialize_from_recommendations(conn)
+            if version is None:
+                return None
+        if self._snapshot is not None and self._snapshot['version'] == version:
+            return self._snapshot
+
+        analysis_date, analysis_time, payload, created_at = conn.execute(
+            'SELECT analysis_date, analysis_time, payload, created_at FROM picks_snapshot WHERE id = ?',
+            (version,)
+        ).fetchone()
+        return {
+            'version': version,
+            'analysis_date': analysis_date,
+            'analysis_time': analysis_time,
+            'created_at': created_at,
+            'recommendations': json.loads(payload),
+        }
+
+    def _materialize_from_recommendations(self, conn):
+        """尚无快照时，用推荐表最近一日的记录生成首个快照"""
+        latest = conn.execute('SELECT MAX(date) FROM stock_recommendations').fetchone()[0]
+        if not latest:
+            return None
+        rows = self.db.query('''
+            SELECT r.*, a.explanation
+            FROM stock_recommendations r
+            LEFT JOIN stock_analysis a ON a.symbol = r.symbol AND a.analysis_date = r.date
+            WHERE r.date = ?
+            ORDER BY r.total_score DESC
+        ''', (latest,))
+        payload = json.dumps(rows, ensure_ascii=False, default=_json_default)
+        with self.db.transaction() as tx:
+            version = tx.execute(
+                'INSERT INTO picks_snapshot (analysis_date, analysis_time, payload) VALUES (?, ?, ?)',
+                (latest, datetime.now().strftime('%H:%M:%S'), payload)
+            ).lastrowid
+        print(f"📌 已用 {latest} 的推荐记录生成最新推荐快照")
+        return version
+
+
+_services_lock = threading.Lock()
+_services = {}
+
+
+def get_picks_snapshot_service(db_path=DEFAULT_DB_PATH):
+    """
+    获取最新推荐快照服务（同一数据库在进程内共享）
+
+    @returns {PicksSnapshotService}
+    """
+    key = get_database(db_path).db_path
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.setdefault(key, PicksSnapshotService(key))
+    return service
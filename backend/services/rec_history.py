@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 推荐历史与结果跟踪
+每日推荐按月分区保存（recommendation_history_YYYYMM），并回填之后几个交易日的表现
+
+- stock_recommendations 仍只保存当前推荐（按日整体重写），历史分区与其在同一事务中写入
+- 分区按 (date, symbol) 聚簇，跨月复盘时只扫描区间涉及的分区
+- 结果列（T+1/T+3/T+5 收益、止损/目标是否触及）由夜间任务按本地日线批量计算，
+  每个分区一次 executemany 更新
+- 视图 recommendation_history 合并全部分区，便于临时查询
+
+命令行:
+    python -m backend.services.rec_history [--no-sync] [--db data/cchan_web.db]
+"""
+
+import re
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.services.bar_store import get_bar_store
+from backend.services.database import DEFAULT_DB_PATH, get_database
+
+
+PARTITION_PREFIX = 'recommendation_history_'
+HISTORY_VIEW = 'recommendation_history'
+HORIZONS = (1, 3, 5)
+HIT_WINDOW = 5
+# 超过该天数仍缺行情（停牌、退市）的记录不再跟踪
+MAX_PENDING_DAYS = 30
+
+# 从推荐表复制的字段
+BASE_COLUMNS = (
+    'date', 'symbol', 'stock_name', 'market', 'current_price', 'total_score',
+    'tech_score', 'auction_score', 'gap_type', 'confidence', 'strategy',
+    'entry_price', 'stop_loss', 'target_price',
+)
+OUTCOME_COLUMNS = (
+    'base_price', 'ret_1d', 'ret_3d', 'ret_5d', 'max_high_5d', 'min_low_5d',
+    'hit_stop', 'hit_target', 'first_hit', 'outcome_status',
+)
+
+PARTITION_DDL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        date TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        stock_name TEXT,
+        market TEXT,
+        current_price REAL,
+        total_score REAL,
+        tech_score REAL,
+        auction_score REAL,
+        gap_type TEXT,
+        confidence TEXT,
+        strategy TEXT,
+        entry_price REAL,
+        stop_loss REAL,
+        target_price REAL,
+
+        -- 结果跟踪（夜间任务回填）
+        base_price REAL,
+        ret_1d REAL,
+        ret_3d REAL,
+        ret_5d REAL,
+        max_high_5d REAL,
+        min_low_5d REAL,
+        hit_stop INTEGER,
+        hit_target INTEGER,
+        first_hit TEXT,
+        outcome_status TEXT DEFAULT 'pending',
+        outcome_updated_at TEXT,
+
+        PRIMARY KEY (date, symbol)
+    ) WITHOUT ROWID
+'''
+
+_PARTITION_NAME = re.compile(rf'^{PARTITION_PREFIX}\d{{6}}$')
+
+
+def partition_name(date):
+    """
+    日期所在月份的分区表名
+
+    @param {str} date - YYYY-MM-DD
+    @returns {str}
+    """
+    return f"{PARTITION_PREFIX}{date[:4]}{date[5:7]}"
+
+
+def compute_outcomes(picks, bars, window=HIT_WINDOW):
+    """
+    按日线计算推荐之后的表现（纯函数，向量化）
+
+    T0 为推荐日；推荐日不是交易日时以推荐价为基准，之后第一个交易日记为 T+1。
+    同一交易日同时触及止损与目标时按先止损计（保守）。
+
+    @param {DataFrame} picks - 列: date, symbol, current_price, stop_loss, target_price
+    @param {DataFrame} bars - 列: symbol, date, high, low, close
+    @returns {DataFrame} 与 picks 同索引，列为 OUTCOME_COLUMNS
+    """
+    n = len(picks)
+    out = pd.DataFrame(index=picks.index, columns=list(OUTCOME_COLUMNS), dtype=object)
+    out['outcome_status'] = 'pending'
+    if n == 0 or bars.empty:
+        out['base_price'] = picks['current_price']
+        return out
+
+    close = bars.pivot(index='date', columns='symbol', values='close').sort_index()
+    high = bars.pivot(index='date', columns='symbol', values='high').reindex_like(close)
+    low = bars.pivot(index='date', columns='symbol', values='low').reindex_like(close)
+    dates = close.index.to_numpy().astype(str)
+    close_arr, high_arr, low_arr = (f.to_numpy(dtype=float) for f in (close, high, low))
+    rows = len(dates)
+
+    col = close.columns.get_indexer(picks['symbol'])
+    known = col >= 0
+    col = np.where(known, col, 0)
+    pick_dates = picks['date'].astype(str).to_numpy()
+    pos = np.searchsorted(dates, pick_dates)
+    on_day = (pos < rows) & (dates[np.minimum(pos, rows - 1)] == pick_dates)
+    t0 = np.where(on_day, pos, pos - 1)
+
+    def at(arr, idx):
+        valid = known & (idx >= 0) & (idx < rows)
+        values = arr[np.clip(idx, 0, rows - 1), col]
+        return np.where(valid, values, np.nan)
+
+    fallback = pd.to_numeric(picks['current_price'], errors='coerce').to_numpy(dtype=float)
+    base = np.where(on_day, at(close_arr, t0), np.nan)
+    base = np.where(np.isnan(base) | (base <= 0), fallback, base)
+    out['base_price'] = base
+
+    for h in HORIZONS:
+        out[f'ret_{h}d'] = np.round(at(close_arr, t0 + h) / base - 1, 6)
+
+    highs = np.column_stack([at(high_arr, t0 + k) for k in range(1, window + 1)])
+    lows = np.column_stack([at(low_arr, t0 + k) for k in range(1, window + 1)])
+    target = pd.to_numeric(picks['target_price'], errors='coerce').to_numpy(dtype=float)
+    stop = pd.to_numeric(picks['stop_loss'], errors='coerce').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        target_days = highs >= target[:, None]
+        stop_days = lows <= stop[:, None]
+    either = target_days | stop_days
+    first = np.argmax(either, axis=1)
+    hit_any = either.any(axis=1)
+    first_is_stop = stop_days[np.arange(n), first]
+
+    out['max_high_5d'] = pd.DataFrame(highs).max(axis=1).to_numpy()
+    out['min_low_5d'] = pd.DataFrame(lows).min(axis=1).to_numpy()
+    out['hit_target'] = target_days.any(axis=1).astype(int)
+    out['hit_stop'] = stop_days.any(axis=1).astype(int)
+    out['first_hit'] = np.where(hit_any, np.where(first_is_stop, 'stop', 'target'), 'none')
+
+    complete = ~np.isnan(at(close_arr, t0 + max(max(HORIZONS), window)))
+    complete &= ~np.isnan(highs).all(axis=1)
+    started = ~np.isnan(at(close_arr, t0 + 1))
+    out['outcome_status'] = np.where(complete, 'done', np.where(started, 'partial', 'pending'))
+    return out
+
+
+class RecommendationHistory:
+    """按月分区的推荐历史"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        """
+        @param {str} db_path - 数据库路径
+        """
+        self.db = get_database(db_path)
+
+    # ------------------------------------------------------------------
+    # 分区管理
+    # ------------------------------------------------------------------
+    def partitions(self, conn=None):
+        """
+        现有分区表名（升序）
+
+        @returns {list[str]}
+        """
+        rows = (conn or self.db.connect()).execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (PARTITION_PREFIX + '%',)
+        ).fetchall()
+        return sorted(name for (name,) in rows if _PARTITION_NAME.match(name))
+
+    def _ensure_partition(self, conn, name):
+        """创建分区并重建合并视图"""
+        if name in self.partitions(conn):
+            return
+        conn.execute(PARTITION_DDL.format(name=name))
+        conn.execute(f'DROP VIEW IF EXISTS {HISTORY_VIEW}')
+        conn.execute(f"CREATE VIEW {HISTORY_VIEW} AS "
+                     + ' UNION ALL '.join(f'SELECT * FROM {n}' for n in self.partitions(conn)))
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def record(self, conn, date, recommendations):
+        """
+        写入某日推荐（与推荐表的重写在同一事务中调用）
+
+        当日记录整体替换；被重写的历史日期由下一次夜间任务重新计算结果。
+
+        @param {sqlite3.Connection} conn - 调用方事务中的连接
+        @param {str} date - 推荐日期
+        @param {list[dict]} recommendations
+        """
+        name = partition_name(date)
+        self._ensure_partition(conn, name)
+        conn.execute(f'DELETE FROM {name} WHERE date = ?', (date,))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {name} ({', '.join(BASE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(BASE_COLUMNS))})",
+            [tuple(date if key == 'date' else stock.get(key) for key in BASE_COLUMNS)
+             for stock in recommendations]
+        )
+
+    def sync_from_recommendations(self):
+        """
+        把推荐表中尚未进入历史的日期补入分区（兼容旧数据与其他写入方）
+
+        @returns {int} 补入行数
+        """
+        conn = self.db.connect()
+        present = set()
+        for name in self.partitions():
+            present.update(d for (d,) in conn.execute(f'SELECT DISTINCT date FROM {name}'))
+        missing = [d for (d,) in conn.execute('SELECT DISTINCT date FROM stock_recommendations')
+                   if d and d not in present]
+        if not missing:
+            return 0
+
+        columns = ', '.join(BASE_COLUMNS)
+        added = 0
+        with self.db.transaction() as tx:
+            for date in missing:
+                name = partition_name(date)
+                self._ensure_partition(tx, name)
+                added += tx.execute(
+                    f'INSERT OR IGNORE INTO {name} ({columns}) '
+                    f'SELECT {columns} FROM stock_recommendations WHERE date = ?', (date,)
+                ).rowcount
+        print(f"🗂️ 推荐历史补入 {len(missing)} 个交易日，{added} 条记录")
+        return added
+
+    # ------------------------------------------------------------------
+    # 结果回填
+    # ------------------------------------------------------------------
+    def fill_outcomes(self, sync_bars=True, now=None):
+        """
+        回填未完成跟踪的推荐结果（夜间任务）
+
+        @param {bool} sync_bars - 计算前是否先从 BaoStock 补齐日线
+        @param {datetime} now - 当前时间（测试用）
+        @returns {dict} 各状态的记录数
+        """
+        now = now or datetime.now()
+        self.sync_from_recommendations()
+        since = (now - timedelta(days=MAX_PENDING_DAYS)).strftime('%Y-%m-%d')
+        conn = self.db.connect()
+
+        pending = []
+        expired = 0
+        with self.db.transaction() as tx:
+            for name in self.partitions():
+                expired += tx.execute(
+                    f"UPDATE {name} SET outcome_status = 'expired', outcome_updated_at = datetime('now') "
+                    f"WHERE outcome_status IN ('pending', 'partial') AND date < ?", (since,)
+                ).rowcount
+        for name in self.partitions():
+            if name < partition_name(since):
+                continue
+            frame = pd.read_sql_query(
+                f"SELECT date, symbol, current_price, stop_loss, target_price FROM {name} "
+                f"WHERE outcome_status IN ('pending', 'partial')", conn
+            )
+            if not frame.empty:
+                frame['partition'] = name
+                pending.append(frame)
+        if not pending:
+            return {'updated': 0, 'expired': expired}
+
+        picks = pd.concat(pending, ignore_index=True)
+        symbols = picks['symbol'].dropna().unique().tolist()
+        start = picks['date'].min()
+        bar_store = get_bar_store(self.db.db_path)
+        if sync_bars:
+            try:
+                bar_store.sync(symbols, start)
+            except Exception as e:
+                print(f"⚠️ 日线同步失败，使用本地已有行情: {e}")
+
+        outcomes = compute_outcomes(picks, bar_store.load_bars(symbols, start))
+        assignments = ', '.join(f'{col} = ?' for col in OUTCOME_COLUMNS)
+        with self.db.transaction() as tx:
+            for name, group in outcomes.groupby(picks['partition']):
+                keys = picks.loc[group.index, ['date', 'symbol']]
+                values = group[list(OUTCOME_COLUMNS)].astype(object).where(group.notna(), None)
+                tx.executemany(
+                    f"UPDATE {name} SET {assignments}, outcome_updated_at = datetime('now') "
+                    f"WHERE date = ? AND symbol = ?",
+                    [(*row, *key) for row, key in zip(values.itertuples(index=False, name=None),
+                                                       keys.itertuples(index=False, name=None))]
+                )
+
+        report = outcomes['outcome_status'].value_counts().to_dict()
+        report.update({'updated': len(outcomes), 'expired': expired})
+        print(f"🎯 推荐结果回填完成: {report}")
+        return report
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def query(self, start_date, end_date, symbol=None):
+        """
+        读取区间内的推荐历史（只扫描区间涉及的分区）
+
+        @returns {list[dict]}
+        """
+        names = [n for n in self.partitions()
+                 if partition_name(start_date) <= n <= partition_name(end_date)]
+        if not names:
+            return []
+        where = 'date BETWEEN ? AND ?' + (' AND symbol = ?' if symbol else '')
+        params = (start_date, end_date) + ((symbol,) if symbol else ())
+        sql = ' UNION ALL '.join(f'SELECT * FROM {n} WHERE {where}' for n in names)
+        return self.db.query(f'{sql} ORDER BY date DESC, total_score DESC', params * len(names))
+
+    def summary(self, start_date, end_date):
+        """
+        区间表现汇总
+
+        收益统计已开始跟踪的记录（尚未到达的持有期为空值，不计入）；
+        止损、目标命中率只统计 5 日窗口已完整的记录，避免新推荐以未命中计入
+
+        @returns {dict}
+        """
+        frame = pd.DataFrame(self.query(start_date, end_date))
+        if frame.empty:
+            return {'picks': 0}
+        tracked = frame[frame['outcome_status'].isin(['done', 'partial', 'expired'])]
+        complete = frame[frame['outcome_status'] == 'done']
+        result = {'picks': len(frame), 'tracked': len(tracked), 'complete': len(complete)}
+        for h in HORIZONS:
+            returns = pd.to_numeric(tracked[f'ret_{h}d'], errors='coerce').dropna()
+            result[f'avg_ret_{h}d'] = round(float(returns.mean()), 6) if len(returns) else None
+            result[f'win_rate_{h}d'] = round(float((returns > 0).mean()), 4) if len(returns) else None
+        for col in ('hit_target', 'hit_stop'):
+            hits = pd.to_numeric(complete[col], errors='coerce').dropna()
+            result[f'{col}_rate'] = round(float(hits.mean()), 4) if len(hits) else None
+        return result
+
+
+_histories_lock = threading.Lock()
+_histories = {}
+
+
+def get_recommendation_history(db_path=DEFAULT_DB_PATH):
+    """
+    获取推荐历史（同一数据库在进程内共享）
+
+    @returns {RecommendationHistory}
+    """
+    key = get_database(db_path).db_path
+    history = _histories.get(key)
+    if history is None:
+        with _histories_lock:
+            history = _histories.setdefault(key, RecommendationHistory(key))
+    return history
+
+
+def main():
+    """命令行入口：回填推荐结果"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CChanTrader-AI 推荐结果回填')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='数据库路径')
+    parser.add_argument('--no-sync', action='store_true', help='不从 BaoStock 补齐日线，只用本地行情')
+    args = parser.parse_args()
+    print(get_recommendation_history(args.db).fill_outcomes(sync_bars=not args.no_sync))
+
+
+if __name__ == '__main__':
+    main()
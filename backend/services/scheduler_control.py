@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 调度器进程控制
+交易日调度器运行在独立进程中（python run.py --scheduler，生产环境由 gunicorn 主进程拉起），
+Web worker 不再各自启动调度线程，只通过进程间共享缓存与调度器进程交互：
+
+- 启用开关：/api/start_scheduler、/api/stop_scheduler 只写开关，调度器进程下一次心跳时生效；
+  从未设置时取 AUTO_START_SCHEDULER 环境变量
+- 心跳：调度器进程每 HEARTBEAT_INTERVAL 秒写入一次状态，超过 HEARTBEAT_TIMEOUT 未更新视为进程不在运行
+- 进程锁：持有 locks/scheduler.lock 的 fcntl 排他锁，同一数据目录只会有一个调度器进程
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from backend.services.database import DEFAULT_DB_PATH
+from backend.services.shared_cache import get_shared_cache
+from backend.services.single_flight import lock_dir_for
+
+
+ENABLED_KEY = 'scheduler_enabled'
+HEARTBEAT_KEY = 'scheduler_heartbeat'
+HEARTBEAT_INTERVAL = 5
+HEARTBEAT_TIMEOUT = 3 * HEARTBEAT_INTERVAL
+
+
+def is_enabled(db_path=DEFAULT_DB_PATH):
+    """
+    调度是否启用
+
+    @returns {bool}
+    """
+    enabled = get_shared_cache(db_path).get(ENABLED_KEY)
+    if enabled is None:
+        return os.getenv('AUTO_START_SCHEDULER', 'false').lower() == 'true'
+    return bool(enabled)
+
+
+def set_enabled(enabled, db_path=DEFAULT_DB_PATH):
+    """
+    设置调度开关（对调度器进程下一次心跳生效）
+
+    @param {bool} enabled - 是否启用
+    """
+    get_shared_cache(db_path).set(ENABLED_KEY, bool(enabled))
+
+
+def get_status(db_path=DEFAULT_DB_PATH):
+    """
+    调度器状态
+
+    @returns {dict} {enabled, process_alive, running, pid, heartbeat_at, next_execution}
+    """
+    heartbeat = get_shared_cache(db_path).get(HEARTBEAT_KEY) or {}
+    alive = bool(heartbeat) and time.time() - heartbeat.get('ts', 0) < HEARTBEAT_TIMEOUT
+    enabled = is_enabled(db_path)
+    return {
+        'enabled': enabled,
+        'process_alive': alive,
+        'running': enabled and alive,
+        'pid': heartbeat.get('pid'),
+        'heartbeat_at': heartbeat.get('heartbeat_at'),
+        'next_execution': heartbeat.get('next_execution') if enabled else None,
+    }
+
+
+def _acquire_process_lock(db_path):
+    """获取调度器进程锁，已有其他调度器进程时返回 None"""
+    lock_dir = lock_dir_for(db_path)
+    os.makedirs(lock_dir, exist_ok=True)
+    handle = open(os.path.join(lock_dir, 'scheduler.lock'), 'w')
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def run_scheduler_process(db_path=DEFAULT_DB_PATH, stop_event=None):
+    """
+    调度器进程主循环：按开关执行到期任务并写入心跳
+
+    @param {str} db_path - 数据库路径
+    @param {threading.Event} stop_event - 设置后退出循环
+    @returns {bool} 因已有调度器进程而未启动时返回 False
+    """
+    lock = _acquire_process_lock(db_path)
+    if lock is None:
+        print("⚠️ 已有调度器进程在运行，本进程不再启动调度器")
+        return False
+
+    import schedule
+    from analysis.trading_day_scheduler import TradingDayScheduler
+
+    stop_event = stop_event or threading.Event()
+    cache = get_shared_cache(db_path)
+    scheduler = TradingDayScheduler()
+    print(f"🟢 调度器进程已启动 (pid={os.getpid()})")
+
+    try:
+        while not stop_event.is_set():
+            enabled = is_enabled(db_path)
+            if enabled != scheduler.is_running:
+                # 停用期间不保留任务，重新启用时重新排程，避免补跑停用期间错过的时间点
+                schedule.clear()
+                if enabled:
+                    scheduler.setup_schedule()
+                print(f"{'🟢 调度已启用' if enabled else '🔴 调度已停用'}")
+                scheduler.is_running = enabled
+            if enabled:
+                schedule.run_pending()
+            cache.set(HEARTBEAT_KEY, {
+                'pid': os.getpid(),
+                'ts': time.time(),
+                'heartbeat_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'next_execution': scheduler._get_next_execution_time(),
+            })
+            stop_event.wait(HEARTBEAT_INTERVAL)
+    finally:
+        schedule.clear()
+        cache.invalidate(HEARTBEAT_KEY)
+        lock.close()
+        print("🔴 调度器进程已退出")
+    return True
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 进程间共享缓存
+多 worker 部署时各进程的内存缓存互不可见，状态快照、推荐快照版本、选股结果与配置版本
+统一放在数据目录下的独立 SQLite 文件（shared_cache.db）中，所有 worker 与调度器进程共享
+
+- 键值：JSON 编码，可设 TTL；每次写入或失效都递增该键的版本号，读方比较版本号即可判断是否需要刷新
+- 事件日志：事件总线把事件追加到日志，其他进程的总线轮询后转发给本进程的 SSE 订阅者
+- 与业务库分开存放，高频的小写入不与推荐落库争用写锁
+"""
+
+import json
+import os
+import threading
+import time
+
+from backend.services.database import DEFAULT_DB_PATH, Database
+
+
+CACHE_FILENAME = 'shared_cache.db'
+# 事件日志保留条数（超过后删除最早的事件）
+EVENT_RETENTION = 2000
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        version INTEGER NOT NULL DEFAULT 0,
+        expires_at REAL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS event_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT NOT NULL,
+        data TEXT NOT NULL,
+        origin INTEGER NOT NULL,
+        ts REAL NOT NULL
+    )
+    ''',
+)
+
+
+def _json_default(value):
+    # 缓存值中可能混有 numpy 标量
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+class SharedCache(Database):
+    """进程间共享的键值缓存与事件日志"""
+
+    def _create_schema(self, conn):
+        with self._schema_lock:
+            if not self._schema_ready:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+                self._schema_ready = True
+
+    # ------------------------------------------------------------------
+    # 键值
+    # ------------------------------------------------------------------
+    def get(self, key, default=None):
+        """
+        读取未过期的值
+
+        @param {str} key - 键
+        @param {*} default - 不存在或已过期时的返回值
+        @returns {*}
+        """
+        entry = self.entry(key)
+        return default if entry is None else entry[0]
+
+    def entry(self, key):
+        """
+        读取未过期的值及其版本号
+
+        @returns {tuple|None} (值, 版本号)
+        """
+        row = self.connect().execute(
+            'SELECT value, version, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[0] is None or (row[2] is not None and row[2] <= time.time()):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl=None):
+        """
+        写入值并递增版本号
+
+        @param {str} key - 键
+        @param {*} value - 可 JSON 序列化的值
+        @param {float} ttl - 有效期（秒），None 表示不过期
+        @returns {int} 新版本号
+        """
+        expires_at = time.time() + ttl if ttl else None
+        return self._write(key, _dumps(value), expires_at)
+
+    def invalidate(self, key):
+        """
+        使值失效（保留并递增版本号，读方据此得知需要刷新）
+
+        @returns {int} 新版本号
+        """
+        return self._write(key, None, None)
+
+    def version(self, key):
+        """
+        键的当前版本号（从未写入为 0）
+
+        @returns {int}
+        """
+        row = self.connect().execute(
+            'SELECT version FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _write(self, key, payload, expires_at):
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO cache_entries (key, value, version, expires_at) VALUES (?, ?, 1, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    version = cache_entries.version + 1,
+                    expires_at = excluded.expires_at
+            ''', (key, payload, expires_at))
+            version = conn.execute('SELECT version FROM cache_entries WHERE key = ?', (key,)).fetchone()[0]
+            if version == 1:
+                # 新键写入时顺带清理已过期的条目（如旧的选股结果、任务状态）
+                conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (time.time(),))
+            return version
+
+    # ------------------------------------------------------------------
+    # 事件日志
+    # ------------------------------------------------------------------
+    def append_event(self, topic, data, ts=None):
+        """
+        追加一条事件
+
+        @param {str} topic - 主题
+        @param {dict} data - 事件数据
+        @param {float} ts - 事件时间戳
+        @returns {int} 事件 id（所有进程共用同一序列）
+        """
+        with self.transaction() as conn:
+            event_id = conn.execute(
+                'INSERT INTO event_log (topic, data, origin, ts) VALUES (?, ?, ?, ?)',
+                (topic, _dumps(data), os.getpid(), ts or time.time())
+            ).lastrowid
+            if event_id % 100 == 0:
+                conn.execute('DELETE FROM event_log WHERE id <= ?', (event_id - EVENT_RETENTION,))
+        return event_id
+
+    def events_after(self, after_id, limit=500):
+        """
+        读取 id 大于 after_id 的事件（按 id 升序）
+
+        @returns {list[dict]} [{id, topic, data, ts, origin}]
+        """
+        rows = self.connect().execute(
+            'SELECT id, topic, data, ts, origin FROM event_log WHERE id > ? ORDER BY id LIMIT ?',
+            (after_id, limit)
+        ).fetchall()
+        return [
+            {'id': event_id, 'topic': topic, 'data': json.loads(data), 'ts': ts, 'origin': origin}
+            for event_id, topic, data, ts, origin in rows
+        ]
+
+    def last_event_id(self):
+        """事件日志中最大的 id"""
+        return self.connect().execute('SELECT COALESCE(MAX(id), 0) FROM event_log').fetchone()[0]
+
+
+_caches_lock = threading.Lock()
+_caches = {}
+
+
+def shared_cache_path(db_path=DEFAULT_DB_PATH):
+    """
+    与业务库同目录的共享缓存文件路径
+
+    @param {str} db_path - 业务数据库路径
+    @returns {str}
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), CACHE_FILENAME)
+
+
+def get_shared_cache(db_path=DEFAULT_DB_PATH):
+    """
+    获取共享缓存（同一数据目录在进程内共享）
+
+    @param {str} db_path - 业务数据库路径
+    @returns {SharedCache}
+    """
+    path = shared_cache_path(db_path)
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(path, SharedCache(path))
+    return cache
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 单飞协调器
+同一 (分析类型, 交易日) 同时只执行一次分析，并发的调用方挂到正在执行的那一次上并拿到它的结果
+
+- 进程内：第一个调用方执行，其余线程等待同一次调用的结果（或异常）
+- 跨进程：执行期间持有 locks/<类型>.lock 的 fcntl 排他锁，结果写入 locks/<类型>.json；
+  等锁的进程拿到锁后若发现结果是自己开始等待之后写入的同一交易日结果，直接复用，不再重复分析
+- 只合并并发的调用；上一次已结束后的新调用照常重新执行
+- 没有 fcntl 的平台（Windows）只做进程内合并
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from backend.services.database import DEFAULT_DB_PATH
+from backend.services.trading_calendar import trading_date
+
+
+def _json_default(value):
+    # 分析结果中混有 numpy 标量与 pandas 时间戳
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def lock_dir_for(db_path):
+    """锁与结果文件目录：与数据库文件同目录下的 locks/"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'locks')
+
+
+class _Call:
+    """进程内一次正在执行的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """按 (类型, 交易日) 合并并发分析的协调器"""
+
+    def __init__(self, lock_dir):
+        """
+        @param {str} lock_dir - 锁文件与结果文件目录
+        """
+        self.lock_dir = lock_dir
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, kind, func, date=None, on_wait=None):
+        """
+        执行或挂到正在执行的同一分析上
+
+        @param {str} kind - 分析类型，如 'optimized_analysis'
+        @param {callable} func - 无参执行函数，返回值需可 JSON 序列化（跨进程共享）
+        @param {str} date - 交易日，缺省为当前交易日
+        @param {callable} on_wait - 需要等待他人执行时回调一次 on_wait(来源)，来源为 'thread' 或 'process'
+        @returns {tuple} (结果, 是否由本次调用执行)
+        """
+        key = (kind, date or trading_date())
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if on_wait:
+                on_wait('thread')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result, executed = self._run_exclusive(key, func, on_wait)
+            return call.result, executed
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self, kind, date=None):
+        """
+        本进程内该分析是否正在执行
+
+        @returns {bool}
+        """
+        return (kind, date or trading_date()) in self._calls
+
+    def _run_exclusive(self, key, func, on_wait):
+        """持有跨进程文件锁执行；等锁期间他人完成同一交易日的分析时直接复用结果"""
+        if fcntl is None:
+            return func(), True
+
+        kind, date = key
+        os.makedirs(self.lock_dir, exist_ok=True)
+        waiting_since = time.time()
+        with open(os.path.join(self.lock_dir, f'{kind}.lock'), 'a+') as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print(f"⏳ 其他进程正在执行 {kind} ({date})，等待其结果...")
+                if on_wait:
+                    on_wait('process')
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                shared = self._read_result(kind)
+                if shared and shared.get('date') == date and shared.get('finished_at', 0) >= waiting_since:
+                    return shared.get('result'), False
+            try:
+                result = func()
+                self._write_result(kind, date, result)
+                return result, True
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _result_path(self, kind):
+        return os.path.join(self.lock_dir, f'{kind}.json')
+
+    def _read_result(self, kind):
+        try:
+            with open(self._result_path(kind), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, kind, date, result):
+        """结果先写临时文件再原子替换，读方不会看到半个文件"""
+        path = self._result_path(kind)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'date': date, 'finished_at': time.time(), 'result': result},
+                          f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ 写入 {kind} 共享结果失败: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+_flights_lock = threading.Lock()
+_flights = {}
+
+
+def get_single_flight(db_path=DEFAULT_DB_PATH):
+    """
+    获取单飞协调器（同一数据库在进程内共享）
+
+    @returns {SingleFlight}
+    """
+    key = lock_dir_for(db_path)
+    flight = _flights.get(key)
+    if flight is None:
+        with _flights_lock:
+            flight = _flights.setdefault(key, SingleFlight(key))
+    return flight
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 策略配置服务
+system_config 表中 strategy_* 配置的进程内快照
+
+- 首次读取时从数据库加载并解析，之后直接返回内存快照
+- save() 写库后立即刷新快照并递增版本号（写穿透）
+- 版本号保存在进程间共享缓存中：任一 worker 写入后，其他 worker 下次读取即发现版本变化并重新加载
+"""
+
+import threading
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.shared_cache import get_shared_cache
+
+
+# Web 配置页默认值
+STRATEGY_DEFAULTS = {
+    'tech_weight': 0.65,
+    'auction_weight': 0.35,
+    'score_threshold': 0.65,
+    'max_recommendations': 15,
+    'min_price': 2.0,  # 包含低价股
+    'max_price': 300.0,
+    'updated_at': '从未设置'
+}
+
+FLOAT_KEYS = {'tech_weight', 'auction_weight', 'score_threshold', 'min_price', 'max_price'}
+INT_KEYS = {'max_recommendations'}
+
+KEY_PREFIX = 'strategy_'
+# 共享缓存中的版本键
+CACHE_KEY = 'strategy_config'
+
+
+class StrategyConfigService:
+    """策略配置快照"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.cache = get_shared_cache(db_path)
+        self._stored = None
+        self._loaded_version = None
+
+    @property
+    def version(self):
+        """配置版本号，任一进程写入或失效后递增"""
+        return self.cache.version(CACHE_KEY)
+
+    def snapshot(self, defaults=None):
+        """
+        获取配置快照
+
+        @param {dict} defaults - 默认值，缺省为 STRATEGY_DEFAULTS；只返回默认值中存在的键
+        @returns {dict} 新的字典副本，调用方可自由修改
+        """
+        stored = self._stored
+        if stored is None or self.version != self._loaded_version:
+            stored = self._reload()
+
+        config = dict(STRATEGY_DEFAULTS if defaults is None else defaults)
+        for key in config:
+            if key in stored:
+                config[key] = stored[key]
+        return config
+
+    def save(self, config):
+        """
+        保存配置并刷新快照
+
+        @param {dict} config - 配置项（不含 strategy_ 前缀）
+        """
+        db = get_database(self.db_path)
+        with self._lock:
+            with db.transaction() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO system_config (config_key, config_value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                ''', [(f'{KEY_PREFIX}{key}', str(value)) for key, value in config.items()])
+            self._stored = self._load(db)
+            self._loaded_version = self.cache.invalidate(CACHE_KEY)
+
+    def invalidate(self):
+        """丢弃快照，下次读取时重新加载"""
+        with self._lock:
+            self._stored = None
+            self.cache.invalidate(CACHE_KEY)
+
+    def _reload(self):
+        with self._lock:
+            version = self.version
+            if self._stored is None or version != self._loaded_version:
+                self._stored = self._load(get_database(self.db_path))
+                self._loaded_version = version
+            return self._stored
+
+    @staticmethod
+    def _load(db):
+        """读取并解析全部 strategy_* 配置，无法解析的值跳过"""
+        rows = db.connect().execute(
+            "SELECT config_key, config_value FROM system_config WHERE config_key LIKE ?",
+            (f'{KEY_PREFIX}%',)
+        ).fetchall()
+
+        stored = {}
+        for key, value in rows:
+            name = key[len(KEY_PREFIX):]
+            try:
+                if name in FLOAT_KEYS:
+                    stored[name] = float(value)
+                elif name in INT_KEYS:
+                    stored[name] = int(value)
+                else:
+                    stored[name] = value
+            except (TypeError, ValueError):
+                pass
+        return stored
+
+
+_services_lock = threading.Lock()
+_services = {}
+
+
+def get_strategy_config_service(db_path=DEFAULT_DB_PATH):
+    """
+    获取策略配置服务（同一数据库在进程内共享）
+
+    @param {str} db_path - 数据库路径
+    @returns {StrategyConfigService}
+    """
+    db = get_database(db_path)
+    service = _services.get(db.db_path)
+    if service is None:
+        with _services_lock:
+            service = _services.setdefault(db.db_path, StrategyConfigService(db.db_path))
+    return service
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 系统状态服务
+为仪表盘轮询提供低开销的状态快照
+
+- .env 仅在文件修改时间变化时重新加载
+- 当日推荐数使用 COUNT(*)，本进程写入后直接更新计数
+- 快照存放在进程间共享缓存中，STATUS_TTL 秒内所有 worker 直接复用；任一进程写入推荐后立即失效
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from backend.services.database import DEFAULT_DB_PATH, get_database
+from backend.services.shared_cache import get_shared_cache
+
+
+STATUS_TTL = 5
+# 共享缓存中的快照键
+CACHE_KEY = 'system_status'
+EMAIL_KEYS = ('SENDER_EMAIL', 'SENDER_PASSWORD', 'RECIPIENT_EMAILS')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SystemStatusService:
+    """系统状态快照"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, env_path=None, ttl=STATUS_TTL):
+        """
+        @param {str} db_path - 数据库路径
+        @param {str} env_path - .env 文件路径，缺省为项目根目录
+        @param {float} ttl - 快照有效期（秒）
+        """
+        self.db_path = db_path
+        self.env_path = env_path or os.path.join(PROJECT_ROOT, '.env')
+        self.ttl = ttl
+        self.cache = get_shared_cache(db_path)
+        self._lock = threading.Lock()
+        self._env_mtime = -1
+        self._email_configured = None
+        # 本进程写入后维护的计数：{date: count}，_counts_fresh 为 True 时构建快照不再查询
+        self._counts = {}
+        self._counts_fresh = False
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def snapshot(self):
+        """
+        获取状态快照（不含调度器运行状态等进程内实时字段）
+
+        @returns {dict} 新的字典副本
+        """
+        snapshot = self.cache.get(CACHE_KEY)
+        if snapshot is None:
+            with self._lock:
+                snapshot = self.cache.get(CACHE_KEY)
+                if snapshot is None:
+                    snapshot = self._build()
+                    self.cache.set(CACHE_KEY, snapshot, ttl=self.ttl)
+        return dict(snapshot)
+
+    def email_configured(self):
+        """邮件是否已配置（.env 修改后才重新加载）"""
+        self._reload_env_if_changed()
+        configured = all(os.getenv(key, '') for key in EMAIL_KEYS)
+        if configured != self._email_configured:
+            print(f"📧 邮件配置状态: {'已配置' if configured else '未配置'}")
+            self._email_configured = configured
+        return configured
+
+    # ------------------------------------------------------------------
+    # 写入通知
+    # ------------------------------------------------------------------
+    def record_recommendations_saved(self, date, count):
+        """
+        推荐写入后更新计数并使共享快照失效，所有 worker 的下一次读取立即反映这次写入
+
+        @param {str} date - 推荐日期
+        @param {int} count - 当日推荐数
+        """
+        with self._lock:
+            self._counts = {date: count}
+            self._counts_fresh = True
+            self.cache.invalidate(CACHE_KEY)
+
+    def invalidate(self):
+        """丢弃快照与 .env 缓存，下次读取时全部重新计算"""
+        with self._lock:
+            self._env_mtime = -1
+            self._counts = {}
+            self._counts_fresh = False
+            self.cache.invalidate(CACHE_KEY)
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+    def _build(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        conn = get_database(self.db_path).connect()
+
+        # 本进程刚写入时直接使用维护的计数，否则以数据库为准（其他进程也可能写入）
+        if not self._counts_fresh or today not in self._counts:
+            self._counts = {today: conn.execute(
+                'SELECT COUNT(*) FROM stock_recommendations WHERE date = ?', (today,)
+            ).fetchone()[0]}
+        self._counts_fresh = False
+        last_update = conn.execute(
+            'SELECT MAX(created_at) FROM stock_recommendations'
+        ).fetchone()[0] or "从未更新"
+
+        return {
+            'auto_start_enabled': os.getenv('AUTO_START_SCHEDULER', 'false').lower() == 'true',
+            'last_update': last_update,
+            'today_recommendations': self._counts.get(today, 0),
+            'email_configured': self.email_configured(),
+            'system_health': 'good',  # 简化版
+            'trading_mode': os.getenv('TRADING_MODE', 'short_term'),
+        }
+
+    def _reload_env_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.env_path)
+        except OSError:
+            mtime = None
+        if mtime != self._env_mtime:
+            if mtime is not None:
+                load_dotenv(self.env_path, override=True)
+            self._env_mtime = mtime
+
+
+_services_lock = threading.Lock()
+_services = {}
+
+
+def get_system_status_service(db_path=DEFAULT_DB_PATH):
+    """
+    获取系统状态服务（同一数据库在进程内共享）
+
+    @returns {SystemStatusService}
+    """
+    key = get_database(db_path).db_path
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.setdefault(key, SystemStatusService(key))
+    return service
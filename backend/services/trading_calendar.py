@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 交易日工具
+按交易日（而不是自然日）为缓存与任务分组
+
+本地没有节假日数据，只按周末回退：周六、周日归到上一个周五。
+"""
+
+from datetime import datetime, timedelta
+
+
+def trading_date(now=None):
+    """
+    当前所属的交易日
+
+    @param {datetime} now - 时间，缺省为当前时间
+    @returns {str} YYYY-MM-DD
+    """
+    now = now or datetime.now()
+    weekday = now.weekday()
+    if weekday >= 5:
+        now -= timedelta(days=weekday - 4)
+    return now.strftime('%Y-%m-%d')
@@ -9,17 +9,19 @@ import sys
 import subprocess
 import time
 import webbrowser
+import importlib.util
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 def check_dependencies():
     """检查依赖包"""
     required_packages = ['flask', 'pandas', 'numpy', 'akshare', 'baostock', 'schedule']
     missing_packages = []
     
     for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
+        # 只检查是否已安装，不实际导入（akshare 导入耗时数秒）
+        if importlib.util.find_spec(package) is None:
             missing_packages.append(package)
     
     if missing_packages:
@@ -46,7 +48,7 @@ def check_environment():
 def create_sample_data():
     """创建示例数据"""
     try:
-        from web_app import WebAppManager
+        from backend.app import WebAppManager
         
         manager = WebAppManager()
         
@@ -133,8 +135,8 @@ def start_web_app():
     try:
         print("🚀 启动 CChanTrader-AI Web管理平台...")
         
-        # 启动Flask应用
-        import web_app
+        # 统一入口：导入应用并启动服务
+        from run import serve
         
         # 创建示例数据
         create_sample_data()
@@ -154,7 +156,7 @@ def start_web_app():
         browser_thread.start()
         
         # 启动应用
-        web_app.app.run(debug=False, host='0.0.0.0', port=8080)
+        serve(port=8080)
         
     except KeyboardInterrupt:
         print("\n🛑 服务已停止")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试统计分析服务
+SQLite 直查与 DuckDB 增量镜像（已安装时）结果一致
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import analytics
+from backend.services.analytics import AnalyticsService, QUERIES
+from backend.services.database import get_database
+from backend.services.exporter import ExportError
+from backend.services.rec_history import get_recommendation_history, partition_name
+
+
+def _save_day(db, date, scores, price):
+    with db.transaction() as conn:
+        conn.execute('DELETE FROM stock_recommendations WHERE date = ?', (date,))
+        conn.executemany(
+            'INSERT INTO stock_recommendations (date, symbol, market, current_price, total_score, confidence) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(date, f'sz.30000{i}', '创业板' if i % 2 else '深圳主板', price + i, score,
+              'very_high' if score > 0.8 else 'high') for i, score in enumerate(scores)]
+        )
+
+
+def _track_outcomes(db_path, date, outcomes, status='done'):
+    """写入推荐历史并回填结果列；outcomes 为 [(symbol, confidence, hit_target, ret_1d)]，hit_target 为 None 表示未跟踪"""
+    history = get_recommendation_history(db_path)
+    name = partition_name(date)
+    with history.db.transaction() as conn:
+        history.record(conn, date, [{'symbol': symbol, 'confidence': confidence, 'current_price': 10.0}
+                                    for symbol, confidence, _, _ in outcomes])
+        for symbol, _, hit, ret_1d in outcomes:
+            if hit is not None:
+                conn.execute(
+                    f"UPDATE {name} SET hit_target = ?, hit_stop = ?, ret_1d = ?, outcome_status = ?, "
+                    f"outcome_updated_at = datetime('now') WHERE date = ? AND symbol = ?",
+                    (hit, 1 - hit, ret_1d, status, date, symbol)
+                )
+
+
+def _sqlite_service(db_path, tmp):
+    saved = analytics.duckdb
+    analytics.duckdb = None
+    try:
+        return AnalyticsService(db_path, os.path.join(tmp, 'unused.duckdb'))
+    finally:
+        analytics.duckdb = saved
+
+
+def test_sqlite_queries():
+    """SQLite 后端聚合结果正确"""
+    print("=== 统计分析服务测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        db = get_database(db_path)
+        _save_day(db, '2024-03-04', [0.9, 0.7], 10.0)
+        _save_day(db, '2024-03-05', [0.85, 0.6], 11.0)
+
+        service = _sqlite_service(db_path, tmp)
+        assert service.backend == 'sqlite'
+        weekly = service.query('score_by_market_week', '2024-03-01', '2024-03-31')
+        assert {row['week'] for row in weekly} == {'2024-03-04'}
+        assert sum(row['picks'] for row in weekly) == 4
+
+        # 尚无推荐历史时返回空结果
+        assert service.query('confidence_hit_rate', '2024-03-01', '2024-03-31') == []
+
+        _track_outcomes(db_path, '2024-03-04', [('sz.300000', 'very_high', 1, 0.02),
+                                                ('sz.300001', 'high', 0, -0.01)])
+        _track_outcomes(db_path, '2024-03-05', [('sz.300000', 'very_high', 0, 0.0),
+                                                ('sz.300001', 'high', None, None)])
+        # 5 日窗口未完整的记录暂未触及目标，不计入命中率，只计入次日收益
+        _track_outcomes(db_path, '2024-03-06', [('sz.300002', 'very_high', 0, 0.04)], status='partial')
+        hit = {row['confidence']: row for row in service.query('confidence_hit_rate', '2024-03-01', '2024-03-31')}
+        assert hit['very_high']['picks'] == 3 and hit['very_high']['samples'] == 2
+        assert hit['very_high']['hit_rate'] == 0.5 and hit['very_high']['stop_rate'] == 0.5
+        assert hit['very_high']['avg_ret_1d'] == 0.02
+        # 未开始跟踪的记录不计入
+        assert hit['high']['picks'] == 1 and hit['high']['hit_rate'] == 0.0 and hit['high']['stop_rate'] == 1.0
+        for name in QUERIES:
+            service.query(name, '2024-03-01', '2024-03-31')
+        print("✅ SQLite 聚合查询正常")
+
+
+def test_sqlite_fallback_is_read_only():
+    """SQLite 直查使用独立的只读连接，不会写入业务库"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        get_database(db_path).connect()
+        service = _sqlite_service(db_path, tmp)
+        QUERIES['_write_probe'] = {'title': '写入探测', 'sql': "CREATE TABLE probe AS SELECT ? AS a, ? AS b"}
+        try:
+            service.query('_write_probe', '2024-03-01', '2024-03-31')
+            assert False, '只读连接不应允许写入'
+        except Exception as exc:
+            assert 'readonly' in str(exc).lower()
+        finally:
+            QUERIES.pop('_write_probe')
+
+        missing = _sqlite_service(os.path.join(tmp, 'missing.db'), tmp)
+        try:
+            missing.query('daily_summary', '2024-03-01', '2024-03-31')
+            assert False, '数据库不存在时应报错'
+        except ExportError:
+            pass
+        assert not os.path.exists(os.path.join(tmp, 'missing.db'))
+
+
+def test_duckdb_mirror_matches_sqlite():
+    """DuckDB 镜像增量同步，按日重写的数据整体替换"""
+    if analytics.duckdb is None:
+        print("⏭️ 未安装 duckdb，跳过镜像测试")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        db = get_database(db_path)
+        _save_day(db, '2024-03-04', [0.9, 0.7], 10.0)
+        _track_outcomes(db_path, '2024-03-04', [('sz.300000', 'very_high', 1, 0.02)])
+
+        mirror = AnalyticsService(db_path, os.path.join(tmp, 'mirror.duckdb'), sync_interval=3600)
+        assert mirror.backend == 'duckdb'
+        assert mirror.sync()['stock_recommendations'] == 2
+
+        # 重写当日并新增一天
+        _save_day(db, '2024-03-04', [0.95, 0.75, 0.5], 10.0)
+        _save_day(db, '2024-03-05', [0.85], 11.0)
+        assert mirror.sync()['stock_recommendations'] == 4
+        assert mirror.sync()['stock_recommendations'] == 0
+
+        # 夜间任务原地回填结果列后，整月重新镜像
+        assert mirror.sync()['recommendation_history'] == 0
+        _track_outcomes(db_path, '2024-03-05', [('sz.300000', 'very_high', 0, -0.01),
+                                                ('sz.300001', 'high', 1, 0.03)])
+        assert mirror.sync()['recommendation_history'] == 3
+
+        reference = _sqlite_service(db_path, tmp)
+        for name in ('score_by_market_week', 'confidence_hit_rate', 'daily_summary'):
+            expected = reference.query(name, '2024-03-01', '2024-03-31')
+            actual = mirror.query(name, '2024-03-01', '2024-03-31')
+            assert [{k: (float(v) if isinstance(v, (int, float)) else v) for k, v in r.items()} for r in actual] == \
+                   [{k: (float(v) if isinstance(v, (int, float)) else v) for k, v in r.items()} for r in expected], name
+        print("✅ DuckDB 镜像与 SQLite 结果一致")
+
+
+if __name__ == "__main__":
+    test_sqlite_queries()
+    test_sqlite_fallback_is_read_only()
+    test_duckdb_mirror_matches_sqlite()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试仪表盘首屏数据：按版本缓存的快照、写入后失效与字段投影
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.dashboard import DashboardService
+from backend.services.picks_snapshot import get_picks_snapshot_service
+from backend.services.strategy_config import get_strategy_config_service
+from stock_screener.models import ScreenerRecordManager
+
+RECS = [
+    {'symbol': f'sz.00000{i}', 'stock_name': f'股票{i}', 'total_score': 0.9 - i * 0.05, 'confidence': 'high'}
+    for i in range(5)
+]
+
+
+def test_snapshot_cached_until_versions_change():
+    """版本不变时复用快照；推荐、配置或选股记录写入后重新组装"""
+    print("=== 仪表盘首屏数据测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        builds = []
+        service = DashboardService(db_path, status_loader=lambda: builds.append(1) or {'system_health': 'good'}, ttl=60)
+
+        etag, data = service.snapshot()
+        assert data['picks'] is None and data['records'] == [] and data['presets']
+        for _ in range(20):
+            assert service.snapshot()[0] == etag
+        assert len(builds) == 1
+
+        get_picks_snapshot_service(db_path).publish({'date': '2024-03-01', 'recommendations': RECS})
+        etag_picks, data = service.snapshot()
+        assert etag_picks != etag and data['picks']['total'] == 5
+
+        get_strategy_config_service(db_path).save({'max_recommendations': 30})
+        assert service.snapshot()[1]['strategy_config']['max_recommendations'] == 30
+
+        ScreenerRecordManager(db_path).save_record('测试', {'price_min': 5}, RECS[:2])
+        assert [r['name'] for r in service.snapshot()[1]['records']] == ['测试']
+        assert len(builds) == 4
+        print(f"✅ 快照组装 {len(builds)} 次")
+
+
+def test_field_projection():
+    """只返回请求的部分与推荐列，条数限制与投影参与 ETag"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        get_picks_snapshot_service(db_path).publish({'date': '2024-03-01', 'recommendations': RECS})
+        service = DashboardService(db_path, status_loader=dict)
+
+        etag, data = service.render(fields='status,picks.symbol,picks.total_score', picks_limit=2)
+        assert set(data) == {'status', 'picks'}
+        assert data['picks']['items'] == [{'symbol': r['symbol'], 'total_score': r['total_score']} for r in RECS[:2]]
+        assert data['picks']['total'] == 5
+
+        other_etag, _ = service.render(fields='status,picks.symbol,picks.total_score', picks_limit=3)
+        assert other_etag != etag
+        assert service.render(fields='picks.total_score,picks.symbol,status', picks_limit=2)[0] == etag
+
+        try:
+            service.render(fields='unknown')
+            assert False, '未知字段应报错'
+        except ValueError:
+            pass
+        print("✅ 字段投影与 ETag")
+
+
+if __name__ == "__main__":
+    test_snapshot_cached_until_versions_change()
+    test_field_projection()
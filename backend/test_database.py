@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据库连接管理
+验证 WAL 模式、线程内连接复用、并发读写与旧表补列
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.database import get_database, migrate
+
+
+def test_wal_and_thread_local_connections():
+    """同一线程复用连接，不同线程使用独立连接"""
+    print("=== 数据库连接管理测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = get_database(os.path.join(tmp, 'test.db'))
+        conn = db.connect()
+        assert conn is db.connect()
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] > 0
+
+        other = []
+        t = threading.Thread(target=lambda: other.append(db.connect()))
+        t.start()
+        t.join()
+        assert other[0] is not conn
+        print("✅ WAL 模式与线程内连接复用正常")
+
+
+def test_concurrent_reads_during_write():
+    """写事务进行中并发读取不报 database is locked"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = get_database(os.path.join(tmp, 'test.db'))
+        errors = []
+        stop = threading.Event()
+
+        def writer():
+            try:
+                for day in range(30):
+                    with db.transaction() as conn:
+                        conn.executemany(
+                            'INSERT INTO stock_recommendations (date, symbol, total_score) VALUES (?, ?, ?)',
+                            [(f'2024-01-{day + 1:02d}', f'sz.{300000 + i}', 0.5) for i in range(200)]
+                        )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                stop.set()
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    db.query('SELECT COUNT(*) AS n FROM stock_recommendations')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors, errors
+        assert db.query('SELECT COUNT(*) AS n FROM stock_recommendations')[0]['n'] == 6000
+        print("✅ 并发读写无锁冲突")
+
+
+def test_legacy_table_gets_missing_columns():
+    """旧版 screener_records 表自动补齐 result_data 列"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'legacy.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE screener_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                conditions TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+        db = get_database(db_path)
+        columns = {row[1] for row in db.connect().execute('PRAGMA table_info(screener_records)')}
+        assert 'result_data' in columns
+        print("✅ 旧表补列正常")
+
+
+def test_recommendation_indexes_used():
+    """迁移创建的索引被推荐表常用查询使用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = get_database(os.path.join(tmp, 'test.db'))
+        conn = db.connect()
+        assert conn.execute('PRAGMA user_version').fetchone()[0] >= 1
+
+        queries = {
+            'idx_recommendations_date_score':
+                "SELECT * FROM stock_recommendations WHERE date = '2024-01-02' ORDER BY total_score DESC LIMIT 50",
+            'idx_recommendations_created':
+                'SELECT MAX(created_at) FROM stock_recommendations',
+            'idx_recommendations_symbol_created':
+                "SELECT * FROM stock_recommendations WHERE symbol = 'sz.300001' ORDER BY created_at DESC",
+        }
+        for index, sql in queries.items():
+            plan = ' '.join(str(row[-1]) for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+            assert index in plan, plan
+        print("✅ 推荐表查询均命中索引")
+
+
+def test_deep_analysis_deduplicated_by_symbol_and_date():
+    """迁移去除同股票同交易日的重复深度报告（保留最新一条），之后同键写入覆盖旧报告"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'legacy.db')
+        get_database(db_path).connect()
+        # 模拟迁移前的库：没有唯一索引，同一天写入了多次
+        conn = sqlite3.connect(db_path)
+        conn.execute('DROP INDEX uq_deep_analysis_symbol_date')
+        conn.execute('PRAGMA user_version=2')
+        conn.executemany(
+            'INSERT INTO deep_analysis (symbol, analysis_date, investment_rating) VALUES (?, ?, ?)',
+            [('sz.300001', '2024-03-01', '持有'), ('sz.300001', '2024-03-01', '买入'),
+             ('sz.300001', '2024-03-04', '持有'), ('sz.300002', '2024-03-01', '卖出')]
+        )
+        conn.commit()
+        assert migrate(conn) >= 3
+        rows = conn.execute('SELECT symbol, analysis_date, investment_rating FROM deep_analysis ORDER BY id').fetchall()
+        assert rows == [('sz.300001', '2024-03-01', '买入'), ('sz.300001', '2024-03-04', '持有'),
+                        ('sz.300002', '2024-03-01', '卖出')]
+
+        conn.execute("INSERT OR REPLACE INTO deep_analysis (symbol, analysis_date, investment_rating) "
+                     "VALUES ('sz.300001', '2024-03-01', '强烈买入')")
+        ratings = conn.execute("SELECT investment_rating FROM deep_analysis "
+                               "WHERE symbol = 'sz.300001' AND analysis_date = '2024-03-01'").fetchall()
+        assert ratings == [('强烈买入',)]
+        conn.close()
+        print("✅ 深度报告按股票与交易日去重")
+
+
+if __name__ == "__main__":
+    test_wal_and_thread_local_connections()
+    test_concurrent_reads_during_write()
+    test_legacy_table_gets_missing_columns()
+    test_recommendation_indexes_used()
+    test_deep_analysis_deduplicated_by_symbol_and_date()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试深度报告按 (股票, 交易日) 缓存
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backend.services.database import get_database
+from backend.services.deep_reports import DeepReportCache, report_json
+from backend.services.jobs import Job
+from backend.services.trading_calendar import trading_date
+
+
+class CountingAnalyzer:
+    """记录调用次数的分析器替身"""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_deep_analysis_report(self, symbol):
+        self.calls.append(symbol)
+        return {'symbol': symbol, 'analysis_date': trading_date(), 'total_score': np.float64(0.8)}
+
+
+def test_trading_date_rolls_back_weekends():
+    """周末归到上一个周五"""
+    assert trading_date(datetime(2024, 3, 8, 10)) == '2024-03-08'
+    assert trading_date(datetime(2024, 3, 9, 10)) == '2024-03-08'
+    assert trading_date(datetime(2024, 3, 10, 23)) == '2024-03-08'
+    assert trading_date(datetime(2024, 3, 11, 0)) == '2024-03-11'
+
+
+def test_reports_served_from_table_and_memory():
+    """当日报告从 deep_analysis 读取；缺失时只生成一次"""
+    print("=== 深度报告缓存测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        today = trading_date()
+        report = {'symbol': 'sz.000001', 'analysis_date': today, 'basic_info': {'code_name': '平安银行'},
+                  'technical_indicators': {'rsi_14': np.float64(55.5)}}
+        with get_database(db_path).transaction() as conn:
+            conn.execute('''
+                INSERT INTO deep_analysis (symbol, analysis_date, total_score, report_json)
+                VALUES (?, ?, 0.7, ?), ('sz.000001', '2000-01-03', 0.5, '{"symbol": "old"}')
+            ''', ('sz.000001', today, report_json(report)))
+
+        cache = DeepReportCache(db_path)
+        analyzer = CountingAnalyzer()
+        cached = cache.get_or_generate('sz.000001', analyzer)
+        assert cached['basic_info']['code_name'] == '平安银行'
+        assert cached['technical_indicators']['rsi_14'] == 55.5
+        assert cache.get('sz.000001', '2000-01-03') == {'symbol': 'old'}
+        assert analyzer.calls == []
+
+        for _ in range(3):
+            cache.get_or_generate('sz.000002', analyzer)
+        assert analyzer.calls == ['sz.000002']
+
+        small = DeepReportCache(db_path, memory_size=1)
+        small.put({'symbol': 'a', 'analysis_date': today})
+        small.put({'symbol': 'b', 'analysis_date': today})
+        assert small.get('a') is None and small.get('b') is not None
+        print("✅ 当日报告命中缓存，未命中时只生成一次")
+
+
+def test_precompute_skips_cached_symbols():
+    """预生成时已有当日报告的股票直接跳过"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DeepReportCache(os.path.join(tmp, 'test.db'))
+        for symbol in ('sh.600000', 'sz.000001'):
+            cache.put({'symbol': symbol, 'analysis_date': trading_date()})
+        job = Job('deep_precompute')
+        result = cache.precompute(job, ['sh.600000', 'sz.000001'])
+        assert result == {'generated': 0, 'cached': 2, 'failed': 0}
+        assert job.processed == job.total == 2
+
+
+if __name__ == "__main__":
+    test_trading_date_rolls_back_weekends()
+    test_reports_served_from_table_and_memory()
+    test_precompute_skips_cached_symbols()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试进程内事件总线：主题过滤、断线补发、慢订阅者丢弃与任务进度事件
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.events import EventBus, format_sse, get_event_bus
+from backend.services.jobs import JobManager
+from backend.services.shared_cache import SharedCache
+
+
+def _publish_from_other_worker(path):
+    EventBus(store=SharedCache(path)).publish('recommendations', {'version': 2})
+
+
+def test_topics_replay_and_overflow():
+    """订阅者只收到所订阅主题；重连按 Last-Event-ID 补发；积压时丢弃最早事件"""
+    print("=== 事件总线测试 ===")
+    bus = EventBus(replay_size=3)
+    with bus.subscribe(['job']) as jobs_only:
+        first = bus.publish('job', {'id': 'a'})
+        bus.publish('auction', {'symbol': '000001'})
+        assert jobs_only.get(timeout=1) == first
+        assert jobs_only.get(timeout=0.01) is None
+    assert bus.subscriber_count == 0
+
+    for i in range(3):
+        bus.publish('recommendations', {'total': i})
+    resumed = bus.subscribe(['recommendations'], last_event_id=3)
+    assert [resumed.get(timeout=1)['data']['total'] for _ in range(2)] == [1, 2]
+    resumed.close()
+
+    slow = bus.subscribe(['job'], max_pending=2)
+    for i in range(5):
+        bus.publish('job', {'n': i})
+    assert [slow.get(timeout=1)['data']['n'] for _ in range(2)] == [3, 4]
+    assert slow.dropped == 3
+
+    message = format_sse({'id': 7, 'topic': 'job', 'data': {'stage': '逐只分析'}})
+    assert message == 'id: 7\nevent: job\ndata: {"stage":"逐只分析"}\n\n'
+    print("✅ 主题过滤、断线补发与积压丢弃")
+
+
+def test_job_progress_events_are_throttled():
+    """任务状态变化必定发布，密集的进度上报按间隔合并"""
+    manager = JobManager(max_workers=1)
+    with get_event_bus().subscribe(['job']) as subscription:
+        def work(job):
+            job.progress(stage='逐只分析', processed=0, total=1000)
+            for i in range(1, 1001):
+                job.progress(processed=i)
+            return 'ok'
+
+        job, _ = manager.submit('analysis', work)
+        seen = []
+        while True:
+            event = subscription.get(timeout=5)
+            assert event is not None
+            seen.append(event['data'])
+            if event['data']['status'] == 'succeeded':
+                break
+
+    assert seen[0]['status'] == 'queued' and seen[0]['id'] == job.id
+    assert any(e['stage'] == '逐只分析' for e in seen)
+    assert len(seen) < 20
+    print(f"✅ 1000 次进度上报合并为 {len(seen)} 个事件")
+
+
+def test_events_relayed_across_workers():
+    """其他进程发布的事件经共享事件日志转发给本进程订阅者，重连可从日志补发"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'shared_cache.db')
+        bus = EventBus(store=SharedCache(path), relay_interval=0.05)
+        with bus.subscribe(['recommendations']) as subscription:
+            local = bus.publish('recommendations', {'version': 1})
+            assert subscription.get(timeout=1) == local
+
+            worker = multiprocessing.get_context('fork').Process(target=_publish_from_other_worker, args=(path,))
+            worker.start()
+            worker.join(10)
+            relayed = subscription.get(timeout=5)
+            assert relayed['data'] == {'version': 2} and relayed['id'] > local['id']
+            assert subscription.get(timeout=0.2) is None
+
+        # 重连到另一个 worker：按 Last-Event-ID 从共享日志补发
+        other = EventBus(store=SharedCache(path), relay_interval=0.05)
+        with other.subscribe(['recommendations'], last_event_id=local['id']) as resumed:
+            assert resumed.get(timeout=1)['data'] == {'version': 2}
+        print("✅ 跨 worker 事件转发与补发")
+
+
+class _PausingLock:
+    """包装总线的锁：指定线程每次释放后停顿，放大两次加锁之间的窗口"""
+
+    def __init__(self, lock, pause):
+        self._inner = lock
+        self.pause = pause
+        self.thread = threading.get_ident()
+
+    def __enter__(self):
+        return self._inner.__enter__()
+
+    def __exit__(self, *exc):
+        self._inner.__exit__(*exc)
+        if threading.get_ident() == self.thread:
+            time.sleep(self.pause)
+
+
+def test_resubscribe_right_after_unsubscribe():
+    """最后一个订阅者退出后立即重连，即使旧转发线程恰好在此时检查订阅者，新订阅者仍能收到转发事件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'shared_cache.db')
+        bus = EventBus(store=SharedCache(path), relay_interval=0.1)
+        bus.subscribe(['recommendations']).close()
+        # 旧线程会在订阅过程中醒来检查订阅者
+        bus._lock = _PausingLock(bus._lock, pause=0.3)
+        with bus.subscribe(['recommendations']) as subscription:
+            bus._lock.pause = 0
+            assert bus._relay is not None and bus._relay.is_alive()
+            worker = multiprocessing.get_context('fork').Process(target=_publish_from_other_worker, args=(path,))
+            worker.start()
+            worker.join(10)
+            relayed = subscription.get(timeout=5)
+            assert relayed is not None and relayed['data'] == {'version': 2}
+        print("✅ 退订后立即重连仍能收到转发事件")
+
+
+if __name__ == "__main__":
+    test_topics_replay_and_overflow()
+    test_job_progress_events_are_throttled()
+    test_events_relayed_across_workers()
+    test_resubscribe_right_after_unsubscribe()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试解释内容的哈希去重存储与按需渲染
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.explain_builder import build_explain_fields, render_explain_html
+from backend.services.database import get_database
+from backend.services.explain_store import blob_writes, load_latest_detail
+from backend.services.persistence import PersistenceQueue, STOCK_ANALYSIS_UPSERT
+
+
+REC = {
+    'stock_name': '平安银行', 'current_price': 12.34, 'total_score': 0.789,
+    'tech_score': 0.765, 'auction_score': 0.823, 'confidence': 'high',
+    'entry_price': 12.5, 'stop_loss': 11.8, 'target_range': [13.5, 14.2],
+    'expected_rr': '1.8', 'market': '深圳主板',
+}
+
+
+def _save(persistence, symbol, date, fields, prices):
+    explain_hash, prices_hash, writes = blob_writes(fields, prices)
+    for statement, params in writes:
+        persistence.submit(statement, params)
+    persistence.submit(STOCK_ANALYSIS_UPSERT, (symbol, fields['stock_name'], date, 0.8, 0.7, 0.6, 'high',
+                                               12.5, 11.8, 14.2, '', explain_hash, prices_hash))
+
+
+def test_dedup_and_render_on_demand():
+    """相同内容只存一份，读取时渲染结果与直接渲染一致"""
+    print("=== 解释内容存储测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        persistence = PersistenceQueue(db_path, flush_interval=0.01)
+        fields = build_explain_fields('sz.000001', REC, {'30m': {'vol_stats': {'volume_factor': 1.5}}})
+        prices = [12.1, 12.3, 12.2]
+
+        for date in ('2024-03-01', '2024-03-04', '2024-03-05'):
+            _save(persistence, 'sz.000001', date, fields, prices)
+        persistence.stop()
+
+        conn = get_database(db_path).connect()
+        assert conn.execute('SELECT COUNT(*) FROM explain_blobs').fetchone()[0] == 2
+        row_bytes = conn.execute(
+            'SELECT MAX(LENGTH(explain_hash) + LENGTH(prices_hash)) FROM stock_analysis').fetchone()[0]
+        assert row_bytes == 80
+
+        html, loaded_prices = load_latest_detail(conn, 'sz.000001')
+        assert html == render_explain_html(fields)
+        assert '平安银行' in html and '¥12.34' in html and '¥13.50 - ¥14.20' in html
+        assert loaded_prices == prices
+        assert load_latest_detail(conn, 'sz.999999') is None
+        print(f"✅ 3 条记录共享 2 个内容块，HTML {len(html)} 字节按需渲染")
+
+
+def test_legacy_rows_still_readable():
+    """旧版直接保存 HTML 的记录仍可读取"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = get_database(os.path.join(tmp, 'test.db'))
+        with db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO stock_analysis (symbol, analysis_date, explain_html, mini_prices)
+                VALUES ('sz.000002', '2024-03-01', '<div>旧版</div>', '[1.0, 2.0]')
+            ''')
+        assert load_latest_detail(db.connect(), 'sz.000002') == ('<div>旧版</div>', [1.0, 2.0])
+        print("✅ 旧版记录兼容")
+
+
+if __name__ == "__main__":
+    test_dedup_and_render_on_demand()
+    test_legacy_rows_still_readable()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试历史数据流式导出：日期范围、归档记录、分批读取与各输出格式
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.database import get_database
+from backend.services.exporter import ExportError, Exporter
+from backend.services.maintenance import get_archive_store
+from stock_screener.models import ScreenerRecordManager
+
+
+def _seed(db_path):
+    with get_database(db_path).transaction() as conn:
+        conn.executemany(
+            'INSERT INTO stock_recommendations (date, symbol, stock_name, total_score) VALUES (?, ?, ?, ?)',
+            [(f'2024-03-{day:02d}', f'sz.{300000 + day}', f'股票{day}', day / 100) for day in range(1, 11)]
+        )
+    # 早于库内记录的归档
+    get_archive_store(db_path).append('stock_recommendations', '2024-02', [
+        {'id': 0, 'date': '2024-02-28', 'symbol': 'sh.600000', 'stock_name': '浦发银行',
+         'total_score': 0.5, 'created_at': '2024-02-28 09:30:00'},
+    ])
+
+
+def test_csv_and_ndjson_date_range():
+    """CSV 与 NDJSON 按日期范围导出，归档记录在前，分批读取不影响结果"""
+    print("=== 历史数据导出测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        _seed(db_path)
+
+        exporter = Exporter(db_path, 'stock_recommendations', 'ndjson', start='2024-02-01', end='2024-03-03',
+                            batch_rows=2)
+        chunks = list(exporter.stream())
+        rows = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        assert [r['date'] for r in rows] == ['2024-02-28', '2024-03-01', '2024-03-02', '2024-03-03']
+        assert rows[0]['stock_name'] == '浦发银行' and len(chunks) == 3
+        assert exporter.filename == 'stock_recommendations_2024-02-01_2024-03-03.ndjson'
+
+        text = ''.join(Exporter(db_path, 'stock_recommendations', 'csv', start='2024-03-09').stream())
+        table = list(csv.reader(io.StringIO(text)))
+        header, body = table[0], table[1:]
+        assert header[:3] == ['id', 'date', 'symbol']
+        assert [row[1] for row in body] == ['2024-03-09', '2024-03-10']
+        print(f"✅ NDJSON {len(rows)} 行 / CSV {len(body)} 行")
+
+
+def test_screener_records_decoded_and_errors():
+    """选股记录的压缩列解码为 JSON；参数无效时报错"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        ScreenerRecordManager(db_path).save_record('低价股', {'price_max': 10}, [
+            {'symbol': 'sz.000001', 'stock_name': '平安银行', 'current_price': 9.5},
+        ])
+        rows = [json.loads(line) for line in ''.join(Exporter(db_path, 'screener_records', 'ndjson').stream()).splitlines()]
+        assert rows[0]['conditions'] == {'price_max': 10}
+        assert rows[0]['result_symbols'] == ['sz.000001']
+        assert rows[0]['result_data'][0]['stock_name'] == '平安银行'
+
+        text = ''.join(Exporter(db_path, 'screener_records', 'csv').stream())
+        record = list(csv.DictReader(io.StringIO(text)))[0]
+        assert json.loads(record['conditions']) == {'price_max': 10}
+
+        for kwargs in ({'table': 'system_config'}, {'fmt': 'xlsx'}, {'start': '2024/03/01'}):
+            try:
+                Exporter(db_path, **dict({'table': 'screener_records'}, **kwargs))
+                assert False, f'{kwargs} 应报错'
+            except ExportError:
+                pass
+        print("✅ 选股记录解码与参数校验")
+
+
+if __name__ == "__main__":
+    test_csv_and_ndjson_date_range()
+    test_screener_records_decoded_and_errors()
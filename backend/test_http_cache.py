@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试响应压缩与按版本的条件请求
+"""
+
+import gzip
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, stream_with_context
+
+from backend.services.http_cache import MIN_COMPRESS_SIZE, conditional, init_compression
+
+
+def _make_app():
+    app = Flask(__name__)
+    init_compression(app)
+    state = {'version': 1, 'builds': 0}
+
+    @app.route('/big')
+    def big():
+        def build():
+            state['builds'] += 1
+            return jsonify({'success': True, 'data': [{'symbol': f'sh.{i:06d}', 'score': i} for i in range(200)]})
+        return conditional(build, f"big-{state['version']}")
+
+    @app.route('/small')
+    def small():
+        return jsonify({'success': True})
+
+    @app.route('/stream')
+    def stream():
+        def rows():
+            for i in range(500):
+                yield f'{i},' + 'x' * 20 + '\n'
+        return app.response_class(stream_with_context(rows()), mimetype='text/csv')
+
+    return app, state
+
+
+def test_compress_large_json_only():
+    """超过阈值的 JSON 压缩，小响应与流式响应原样返回"""
+    print("=== 响应压缩测试 ===")
+    app, _ = _make_app()
+    client = app.test_client()
+
+    plain = client.get('/big')
+    assert plain.headers.get('Content-Encoding') is None and len(plain.data) > MIN_COMPRESS_SIZE
+
+    packed = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in packed.headers['Vary']
+    assert int(packed.headers['Content-Length']) == len(packed.data) < len(plain.data) // 3
+    assert json.loads(gzip.decompress(packed.data)) == plain.get_json()
+    assert packed.headers['ETag'] == 'W/"big-1"'
+
+    assert client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers.get('Content-Encoding') is None
+    streamed = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert streamed.is_streamed and streamed.headers.get('Content-Encoding') is None
+    assert streamed.data.count(b'\n') == 500
+    print(f"✅ {len(plain.data)} 字节压缩到 {len(packed.data)} 字节，流式响应不压缩")
+
+
+def test_not_modified_by_version():
+    """压缩后的弱 ETag 与未压缩的强 ETag 都能命中 304，版本变化后重新生成"""
+    app, state = _make_app()
+    client = app.test_client()
+
+    packed = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    for etag in (packed.headers['ETag'], '"big-1"'):
+        response = client.get('/big', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+        assert response.status_code == 304 and response.data == b''
+    assert state['builds'] == 1
+
+    state['version'] = 2
+    response = client.get('/big', headers={'If-None-Match': packed.headers['ETag']})
+    assert response.status_code == 200 and response.headers['ETag'] == '"big-2"'
+    assert state['builds'] == 2
+
+
+if __name__ == "__main__":
+    test_compress_large_json_only()
+    test_not_modified_by_version()
+    print("测试完成 ✅")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试后台任务队列：提交即返回、进度上报、同类任务去重与失败记录
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.jobs import FAILED, SUCCEEDED, JobManager
+from backend.services.shared_cache import SharedCache
+
+
+def _wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def test_progress_and_dedupe():
+    """任务在后台执行并上报进度，执行期间重复提交返回同一任务"""
+    print("=== 后台任务队列测试 ===")
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+    seen = []
+
+    def work(job, count):
+        job.progress(stage='逐只分析', processed=0, total=count)
+        for i in range(1, count + 1):
+            if i == 2:
+                release.wait(5)
+            job.progress(processed=i)
+            seen.append(job.to_dict())
+        return {'analyzed': count}
+
+    job, created = manager.submit('analysis', work, params={'count': 4})
+    assert created
+    again, created_again = manager.submit('analysis', work, params={'count': 4})
+    assert again is job and not created_again
+
+    deadline = time.time() + 5
+    while job.processed < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    status = job.to_dict()
+    assert status['status'] == 'running' and status['stage'] == '逐只分析'
+    assert status['total'] == 4 and status['percent'] == 25.0 and status['eta_seconds'] is not None
+
+    release.set()
+    _wait(job)
+    assert job.status == SUCCEEDED and job.result == {'analyzed': 4}
+    assert job.to_dict(include_result=True)['result'] == {'analyzed': 4}
+    assert job.to_dict()['eta_seconds'] is None
+
+    # 上一个任务结束后可以提交新任务
+    _, created_new = manager.submit('analysis', work, params={'count': 1})
+    assert created_new and manager.latest('analysis') is not job
+    manager.shutdown()
+    print(f"✅ 进度上报 {len(seen)} 次，重复提交被合并")
+
+
+def test_failure_and_pruning():
+    """执行异常记录为失败；超过上限时丢弃最早的已结束任务"""
+    manager = JobManager(max_workers=1, max_jobs=3)
+
+    def boom(job):
+        raise RuntimeError('数据源不可用')
+
+    failed, _ = manager.submit('analysis', boom)
+    _wait(failed)
+    assert failed.status == FAILED and failed.error == '数据源不可用'
+
+    jobs = [manager.submit('export', lambda job: 1, dedupe=False)[0] for _ in range(4)]
+    for job in jobs:
+        _wait(job)
+    manager.submit('export', lambda job: 1, dedupe=False)
+    assert manager.get(failed.id) is None
+    assert len(manager.list(limit=100)) <= 4
+    manager.shutdown()
+    print("✅ 失败任务与记录上限")
+
+
+def test_job_visible_to_other_workers():
+    """任务状态与结果写入共享缓存，其他 worker 可按 id 查询"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedCache(os.path.join(tmp, 'shared_cache.db'))
+        manager = JobManager(max_workers=1, store=store)
+        other_worker = JobManager(max_workers=1, store=store)
+
+        job, _ = manager.submit('analysis', lambda job: {'total_count': 12})
+        deadline = time.time() + 5
+        view = other_worker.get(job.id)
+        while not (view and view.finished) and time.time() < deadline:
+            time.sleep(0.01)
+            view = other_worker.get(job.id)
+        assert view.finished and view.error is None
+        assert view.to_dict()['status'] == SUCCEEDED and 'result' not in view.to_dict()
+        assert view.to_dict(include_result=True)['result'] == {'total_count': 12}
+        assert other_worker.get('missing') is None
+        manager.shutdown()
+        other_worker.shutdown()
+        print("✅ 任务状态跨 worker 可查")
+
+
+if __name__ == "__main__":
+    test_progress_and_dedupe()
+    test_failure_and_pruning()
+    test_job_visible_to_other_workers()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据保留期归档：过期记录移入月度归档，查询接口仍可读取
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.explain_builder import build_explain_fields, render_explain_html
+from backend.services.database import get_database
+from backend.services.explain_store import blob_writes, load_latest_detail
+from backend.services.maintenance import ArchiveStore, MaintenanceJob, get_archive_store
+from stock_screener.models import ScreenerRecordManager
+
+
+NOW = datetime(2024, 9, 1, 3, 0, 0)
+
+
+def test_archive_screener_records_and_files():
+    """过期选股记录与 JSON 输出被归档，分页与详情接口透明读取归档"""
+    print("=== 数据归档测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        mgr = ScreenerRecordManager(db_path)
+        results = [{'symbol': 'sh.600000', 'stock_name': '浦发银行', 'total_score': 0.8,
+                    'current_price': 10.0, 'market': '上海主板', 'confidence': 'high'}]
+        ids = [mgr.save_record(f'记录{i}', {'_preset_key': 'test'}, results) for i in range(4)]
+        with mgr.db.transaction() as conn:
+            for record_id, created_at in zip(ids, ('2024-01-05 10:00:00', '2024-01-20 10:00:00',
+                                                   '2024-02-10 10:00:00', '2024-08-30 10:00:00')):
+                conn.execute('UPDATE screener_records SET created_at = ? WHERE id = ?', (created_at, record_id))
+            conn.execute("INSERT INTO system_logs (level, message, created_at) VALUES ('INFO', 'old', '2023-01-01')")
+
+        for name in ('auction_analysis_20240101_092500.json', 'daily_report_20240830_150000.json'):
+            with open(os.path.join(tmp, name), 'w') as f:
+                json.dump({'name': name}, f)
+
+        job = MaintenanceJob(db_path, retention={'screener_records': 60})
+        preview = job.run(dry_run=True, now=NOW)
+        assert preview['tables']['screener_records'] == 3 and preview['files'] == 1
+        assert mgr.db.connect().execute('SELECT COUNT(*) FROM screener_records').fetchone()[0] == 4
+
+        report = job.run(now=NOW)
+        assert report['tables'] == {'system_logs': 1, 'screener_records': 3, 'stock_analysis': 0, 'deep_analysis': 0}
+        assert mgr.db.connect().execute('SELECT COUNT(*) FROM screener_records').fetchone()[0] == 1
+        archive = get_archive_store(db_path)
+        assert archive.months('screener_records') == ['2024-02', '2024-01']
+        assert not os.path.exists(os.path.join(tmp, 'auction_analysis_20240101_092500.json'))
+        assert os.path.exists(os.path.join(tmp, 'daily_report_20240830_150000.json'))
+        assert json.loads(archive.read_file('auction_analysis_20240101_092500.json'))['name']
+
+        page1 = mgr.get_records(limit=2)
+        assert [r['id'] for r in page1] == [ids[3], ids[2]]
+        page2 = mgr.get_records(limit=2, cursor=mgr.make_cursor(page1[-1]))
+        assert [r['id'] for r in page2] == [ids[1], ids[0]]
+        assert page2[0]['result_symbols'] == ['sh.600000']
+
+        detail = mgr.get_record_by_id(ids[0])
+        assert detail['result_data'][0]['stock_name'] == '浦发银行'
+        assert detail['conditions'] == {'_preset_key': 'test'}
+        print(f"✅ 归档 {report['tables']}，{report['files']} 个文件，分页与详情可读取归档")
+
+
+def test_archived_analysis_detail_self_contained():
+    """stock_analysis 归档内嵌解释内容，内容块清理后仍可渲染"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        db = get_database(db_path)
+        fields = build_explain_fields('sz.000001', {'stock_name': '平安银行', 'current_price': 12.34}, {})
+        explain_hash, prices_hash, writes = blob_writes(fields, [1.0, 2.0])
+        with db.transaction() as conn:
+            for statement, params in writes:
+                conn.execute(statement, params)
+            conn.execute('''
+                INSERT INTO stock_analysis (symbol, analysis_date, explain_hash, prices_hash, created_at)
+                VALUES ('sz.000001', '2024-01-02', ?, ?, '2024-01-02 09:30:00')
+            ''', (explain_hash, prices_hash))
+
+        report = MaintenanceJob(db_path, retention={'stock_analysis': 30}).run(now=NOW)
+        assert report['tables']['stock_analysis'] == 1 and report['blobs_removed'] == 2
+        conn = db.connect()
+        assert conn.execute('SELECT COUNT(*) FROM explain_blobs').fetchone()[0] == 0
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+        assert load_latest_detail(conn, 'sz.000001') is None
+        html, prices = load_latest_detail(conn, 'sz.000001', archive=get_archive_store(db_path))
+        assert html == render_explain_html(fields) and prices == [1.0, 2.0]
+        print("✅ 归档的分析详情可独立渲染")
+
+
+def test_find_reads_only_months_with_symbol():
+    """按股票代码查找只读取索引中包含该股票的月份，旧归档缺索引时自动补建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ArchiveStore(os.path.join(tmp, 'archive'))
+        for month in ('2024-01', '2024-02', '2024-03', '2024-04'):
+            archive.append('stock_analysis', month, [
+                {'id': int(month[-2:]) * 10 + i, 'symbol': f'sh.60000{i}', 'created_at': f'{month}-0{i + 1} 09:30:00'}
+                for i in range(3)
+            ])
+        archive.append('stock_analysis', '2024-02', [
+            {'id': 99, 'symbol': 'sz.000001', 'created_at': '2024-02-01 09:30:00'},
+            {'id': 98, 'symbol': 'sz.000001', 'created_at': '2024-02-20 09:30:00'},
+        ])
+        # 模拟索引功能上线前的归档
+        os.remove(os.path.join(tmp, 'archive', 'stock_analysis', '2024-01.symbols.json'))
+
+        reads = []
+        read_month = archive.read_month
+        archive.read_month = lambda table, month: reads.append(month) or read_month(table, month)
+
+        assert archive.find('stock_analysis', symbol='sz.000001')['id'] == 98
+        assert reads == ['2024-02']
+        assert archive.find('stock_analysis', symbol='sz.999999') is None
+        assert reads == ['2024-02', '2024-01']
+        assert archive.month_symbols('stock_analysis', '2024-01') == {'sh.600000', 'sh.600001', 'sh.600002'}
+        assert archive.find('stock_analysis', symbol='sh.600001', id=41)['created_at'] == '2024-04-02 09:30:00'
+        assert [m['month'] for m in archive.summary()['stock_analysis']] == ['2024-04', '2024-03', '2024-02', '2024-01']
+
+
+if __name__ == "__main__":
+    test_archive_screener_records_and_files()
+    test_archived_analysis_detail_self_contained()
+    test_find_reads_only_months_with_symbol()
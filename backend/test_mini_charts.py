@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试走势缩略图：LTTB 降采样与按最后交易日的缓存
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from backend.services.bar_store import BarStore
+from backend.services.mini_charts import MiniChartService, lttb
+
+
+def _bars(start, days, base=10.0):
+    dates = pd.bdate_range(start, periods=days).strftime('%Y-%m-%d')
+    closes = base + np.sin(np.arange(days) / 5.0)
+    return pd.DataFrame({'date': dates, 'open': closes, 'high': closes, 'low': closes,
+                         'close': closes, 'volume': 1000.0})
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """降采样到固定点数，保留首尾与尖峰"""
+    print("=== LTTB 降采样测试 ===")
+    x = np.arange(500)
+    y = np.sin(x / 20.0)
+    y[321] = 5.0
+    keep = lttb(x, y, 40)
+    assert len(keep) == 40
+    assert keep[0] == 0 and keep[-1] == 499
+    assert np.all(np.diff(keep) > 0)
+    assert 321 in keep
+    assert len(lttb(x[:10], y[:10], 40)) == 10
+    print("✅ 500 点降到 40 点，首尾与尖峰保留")
+
+
+def test_series_cached_per_last_bar_date():
+    """序列取自本地日线；新日线写入后重新生成"""
+    print("=== 走势缩略图缓存测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        store = BarStore(db_path)
+        store.write('sh.600000', _bars('2024-01-01', 120))
+        service = MiniChartService(db_path)
+
+        chart = service.series('sh.600000', '3m', 30)
+        assert len(chart['t']) == len(chart['c']) == 30
+        assert chart['t'][0] == 0 and chart['start_date'] == '2024-03-14'
+        assert chart['last_date'] == '2024-06-14' and chart['bars'] > 30
+        assert service.series('sh.600000', '3m', 30) is chart
+
+        store.write('sh.600000', _bars('2024-06-17', 1, base=20.0))
+        updated = service.series('sh.600000', '3m', 30)
+        assert updated is not chart
+        assert updated['last_date'] == '2024-06-17' and updated['c'][-1] == 20.0
+
+        payload = MiniChartService.to_float32(updated)
+        assert len(payload) == 30 * 2 * 4
+        assert np.frombuffer(payload, dtype='<f4')[-1] == 20.0
+
+        empty = service.series('sz.000001')
+        assert empty['t'] == [] and empty['last_date'] is None
+        try:
+            service.series('sh.600000', '5y')
+            assert False, '未知区间应报错'
+        except ValueError:
+            pass
+        print(f"✅ {chart['bars']} 根日线降到 30 点，新日线写入后重新生成")
+
+
+def test_date_ranges_for_sync():
+    """本地日线起止日期，用于判断是否需要回补更早的区间"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BarStore(os.path.join(tmp, 'test.db'))
+        store.write('sh.600000', _bars('2024-05-01', 20))
+        assert store.date_ranges(['sh.600000', 'sz.000001']) == {'sh.600000': ('2024-05-01', '2024-05-28')}
+
+
+if __name__ == "__main__":
+    test_lttb_keeps_endpoints_and_extremes()
+    test_series_cached_per_last_bar_date()
+    test_date_ranges_for_sync()
+    print("测试完成 ✅")
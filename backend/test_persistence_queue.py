@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试异步持久化队列的批量写入、错误隔离与退出刷新
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.database import get_database
+from backend.services.persistence import PersistenceQueue, STOCK_ANALYSIS_UPSERT, DEEP_ANALYSIS_UPSERT
+
+
+def _analysis_row(i, date='2024-03-01'):
+    return (f'sz.{300000 + i}', f'股票{i}', date, 0.8, 0.7, 0.6, 'high',
+            10.0, 9.0, 12.0, '解释', 'explain-hash', 'prices-hash')
+
+
+def test_batched_writes_and_flush():
+    """大量提交在 flush 后全部落库，同键记录按提交顺序覆盖"""
+    print("=== 持久化队列测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        persistence = PersistenceQueue(db_path, batch_size=100, flush_interval=0.01)
+        for i in range(1000):
+            persistence.submit(STOCK_ANALYSIS_UPSERT, _analysis_row(i))
+        persistence.submit(STOCK_ANALYSIS_UPSERT, _analysis_row(0)[:10] + ('最新解释', 'explain-hash', 'prices-hash'))
+        persistence.flush()
+
+        db = get_database(db_path)
+        assert db.query('SELECT COUNT(*) AS n FROM stock_analysis')[0]['n'] == 1000
+        latest = db.query("SELECT explanation FROM stock_analysis WHERE symbol = 'sz.300000'")
+        assert latest[0]['explanation'] == '最新解释'
+        assert persistence.written == 1001 and persistence.failed == 0
+        persistence.stop()
+        print("✅ 批量写入与刷新正常")
+
+
+def test_bad_record_isolated_and_stop_flushes():
+    """单条错误记录不影响同批其他记录，stop 时写完剩余记录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        persistence = PersistenceQueue(db_path, batch_size=50, flush_interval=0.01)
+        persistence.submit(STOCK_ANALYSIS_UPSERT, _analysis_row(1))
+        persistence.submit(STOCK_ANALYSIS_UPSERT, (None,) + _analysis_row(2)[1:])  # symbol NOT NULL
+        persistence.submit(DEEP_ANALYSIS_UPSERT, ('sz.300003', '股票3', '2024-03-01') + (None,) * 34)
+        # 同一股票同一交易日重新生成的报告覆盖旧报告
+        persistence.submit(DEEP_ANALYSIS_UPSERT, ('sz.300003', '股票3新', '2024-03-01') + (None,) * 34)
+        persistence.stop()
+
+        db = get_database(db_path)
+        assert db.query('SELECT COUNT(*) AS n FROM stock_analysis')[0]['n'] == 1
+        assert db.query('SELECT stock_name FROM deep_analysis') == [{'stock_name': '股票3新'}]
+        assert persistence.failed == 1
+        print("✅ 错误记录隔离与停止刷新正常")
+
+
+if __name__ == "__main__":
+    test_batched_writes_and_flush()
+    test_bad_record_isolated_and_stop_flushes()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试最新推荐快照：发布、版本号与内存筛选
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backend.services.database import get_database
+from backend.services.picks_snapshot import PicksSnapshotService, filter_picks
+
+
+RECS = [
+    {'symbol': 'sh.600000', 'market': '上海主板', 'confidence': 'very_high', 'total_score': np.float64(0.91)},
+    {'symbol': 'sz.000001', 'market': '深圳主板', 'confidence': 'high', 'total_score': 0.82},
+    {'symbol': 'sz.300750', 'market': '创业板', 'confidence': 'very_high', 'total_score': 0.64,
+     'volume': np.int64(1200)},
+]
+
+
+def test_publish_and_versions():
+    """发布后立即可读，新版本替换旧版本，其他 worker 的实例立即看到新版本"""
+    print("=== 最新推荐快照测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        service = PicksSnapshotService(db_path)
+        assert service.current() is None
+
+        v1 = service.publish({'date': '2024-03-01', 'analysis_time': '09:30:00', 'recommendations': RECS})
+        snapshot = service.current()
+        assert snapshot['version'] == v1 and snapshot['analysis_date'] == '2024-03-01'
+        assert snapshot['recommendations'][2]['volume'] == 1200
+
+        other = PicksSnapshotService(db_path)
+        assert other.current()['version'] == v1
+        v2 = service.publish({'date': '2024-03-04', 'recommendations': RECS[:1]})
+        assert v2 > v1 and service.current()['version'] == v2
+        assert other.current()['recommendations'] == [{**RECS[0], 'total_score': 0.91}]
+        count = get_database(db_path).connect().execute('SELECT COUNT(*) FROM picks_snapshot').fetchone()[0]
+        assert count == 1
+        print(f"✅ 快照版本 {v1} -> {v2}")
+
+
+def test_materialize_from_recommendations_and_filters():
+    """尚无快照时从推荐表最近一日生成；筛选在内存中完成"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        with get_database(db_path).transaction() as conn:
+            conn.executemany(
+                'INSERT INTO stock_recommendations (date, symbol, total_score, confidence) VALUES (?, ?, ?, ?)',
+                [('2024-03-01', 'sh.600000', 0.7, 'high'), ('2024-03-04', 'sz.000001', 0.8, 'high'),
+                 ('2024-03-04', 'sz.000002', 0.9, 'very_high')]
+            )
+        snapshot = PicksSnapshotService(db_path).current()
+        assert snapshot['analysis_date'] == '2024-03-04'
+        assert [r['symbol'] for r in snapshot['recommendations']] == ['sz.000002', 'sz.000001']
+
+    assert [r['symbol'] for r in filter_picks(RECS, confidence='very_high')] == ['sh.600000', 'sz.300750']
+    assert [r['symbol'] for r in filter_picks(RECS, market='深圳主板')] == ['sz.000001']
+    assert len(filter_picks(RECS, min_score=0.8)) == 2 and len(filter_picks(RECS, limit=1)) == 1
+    print("✅ 推荐表物化与内存筛选")
+
+
+if __name__ == "__main__":
+    test_publish_and_versions()
+    test_materialize_from_recommendations_and_filters()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按月分区的推荐历史与 T+N 结果回填
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from backend.services.bar_store import BarStore
+from backend.services.rec_history import RecommendationHistory, partition_name
+
+
+DATES = ['2024-01-29', '2024-01-30', '2024-01-31', '2024-02-01', '2024-02-02',
+         '2024-02-05', '2024-02-06', '2024-02-07']
+
+
+def _bars(closes, highs=None, lows=None):
+    return pd.DataFrame({
+        'date': DATES[:len(closes)], 'open': closes, 'close': closes,
+        'high': highs or closes, 'low': lows or closes, 'volume': [1000] * len(closes),
+    })
+
+
+def test_partitions_and_outcomes():
+    """推荐写入月度分区，夜间任务按本地日线回填收益与止损/目标"""
+    print("=== 推荐历史测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        history = RecommendationHistory(db_path)
+        bars = BarStore(db_path)
+        # A: 稳步上涨，T+4 触及目标；B: T+2 跌破止损；C: 只有 2 根后续日线
+        bars.write('sh.600000', _bars([10, 10.5, 10.8, 11, 11.2, 11.6, 11.8, 12]))
+        bars.write('sz.000001', _bars([20, 19.5, 18, 18.5, 19, 19.5, 20, 21],
+                                      lows=[20, 19.4, 17.5, 18.4, 18.9, 19.4, 19.9, 20.9]))
+        bars.write('sz.000002', _bars([5, 5.1, 5.2]))
+
+        picks = [
+            {'symbol': 'sh.600000', 'stock_name': 'A', 'current_price': 10.0, 'total_score': 0.9,
+             'stop_loss': 9.5, 'target_price': 11.5},
+            {'symbol': 'sz.000001', 'stock_name': 'B', 'current_price': 20.0, 'total_score': 0.8,
+             'stop_loss': 18.0, 'target_price': 22.0},
+            {'symbol': 'sz.000002', 'stock_name': 'C', 'current_price': 5.0, 'total_score': 0.7,
+             'stop_loss': 4.5, 'target_price': 6.0},
+        ]
+        with history.db.transaction() as conn:
+            history.record(conn, '2024-01-29', picks)
+        assert history.partitions() == [partition_name('2024-01-29')] == ['recommendation_history_202401']
+
+        # 旧版直接写入推荐表的数据由夜间任务补入对应分区
+        with history.db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO stock_recommendations (date, symbol, stock_name, current_price, stop_loss, target_price)
+                VALUES ('2024-02-01', 'sh.600000', 'A', 11.0, 10.0, 13.0)
+            ''')
+
+        report = history.fill_outcomes(sync_bars=False, now=datetime(2024, 2, 8))
+        assert history.partitions() == ['recommendation_history_202401', 'recommendation_history_202402']
+        assert report['updated'] == 4 and report['done'] == 2 and report['partial'] == 2
+
+        rows = {(r['date'], r['symbol']): r for r in history.query('2024-01-01', '2024-02-29')}
+        a = rows[('2024-01-29', 'sh.600000')]
+        assert abs(a['ret_1d'] - 0.05) < 1e-9 and abs(a['ret_5d'] - 0.16) < 1e-9
+        assert a['hit_target'] == 1 and a['hit_stop'] == 0 and a['first_hit'] == 'target'
+        b = rows[('2024-01-29', 'sz.000001')]
+        assert b['hit_stop'] == 1 and b['first_hit'] == 'stop' and b['min_low_5d'] == 17.5
+        c = rows[('2024-01-29', 'sz.000002')]
+        assert c['outcome_status'] == 'partial' and c['ret_5d'] is None
+        assert rows[('2024-02-01', 'sh.600000')]['outcome_status'] == 'partial'
+
+        view_count = history.db.connect().execute('SELECT COUNT(*) FROM recommendation_history').fetchone()[0]
+        assert view_count == 4
+        summary = history.summary('2024-01-01', '2024-02-29')
+        # 两条部分跟踪的记录不计入命中率，只计入已有的收益
+        assert summary['picks'] == 4 and summary['tracked'] == 4 and summary['complete'] == 2
+        assert summary['hit_stop_rate'] == 0.5 and summary['hit_target_rate'] == 0.5
+        assert summary['avg_ret_1d'] is not None
+        print(f"✅ 结果回填: {report}，汇总: {summary}")
+
+
+def test_stale_pending_rows_expire():
+    """长期缺少行情的记录标记为 expired，不再参与回填"""
+    with tempfile.TemporaryDirectory() as tmp:
+        history = RecommendationHistory(os.path.join(tmp, 'test.db'))
+        with history.db.transaction() as conn:
+            history.record(conn, '2024-01-02', [{'symbol': 'sh.600999', 'current_price': 8.0}])
+        report = history.fill_outcomes(sync_bars=False, now=datetime(2024, 6, 1))
+        assert report == {'updated': 0, 'expired': 1}
+        print("✅ 过期记录不再跟踪")
+
+
+if __name__ == "__main__":
+    test_partitions_and_outcomes()
+    test_stale_pending_rows_expire()
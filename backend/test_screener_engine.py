@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试条件选股引擎的列式批量筛选
+验证 screen_many 与逐只匹配的参考实现结果一致
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+
+from stock_screener.screener import StockScreener
+from stock_screener.expression import compile_rule, RuleCompileError
+
+
+def _sample_pool(size=300):
+    """生成固定随机种子的候选池"""
+    rng = random.Random(7)
+    markets = ['上海主板', '深圳主板', '中小板', '创业板']
+    pool = []
+    for i in range(size):
+        pool.append({
+            'symbol': f'sz.{300000 + i:06d}',
+            'stock_name': f'测试股票{i}',
+            'market': rng.choice(markets),
+            'current_price': round(rng.uniform(2, 150), 2),
+            'total_score': round(rng.uniform(0.3, 0.95), 3),
+            'tech_score': round(rng.uniform(0.3, 0.95), 3),
+            'auction_score': round(rng.uniform(0.3, 0.95), 3),
+            'auction_ratio': round(rng.uniform(-2, 4), 2),
+            'gap_type': rng.choice(['gap_up', 'flat', 'gap_down']),
+            'confidence': rng.choice(['very_high', 'high', 'medium']),
+            'rsi': rng.uniform(30, 80),
+            'market_cap_billion': rng.uniform(20, 900),
+        })
+    return pool
+
+
+# 逐只匹配的参考实现（引擎旧版的逐行解释逻辑，仅作为列式筛选的对照）
+def _eval_rule(stock, rule):
+    """逐只评估旧版 {field, op, value} 规则"""
+    field = rule.get('field', '')
+    op = rule.get('op', '')
+    target = rule.get('value')
+    if not field or not op or target is None:
+        return True
+    actual = stock.get(field)
+    if actual is None:
+        return False
+    try:
+        if op == 'contains':
+            return str(target) in str(actual)
+        actual, target = float(actual), float(target)
+    except (ValueError, TypeError):
+        return False
+    return {
+        'gt': actual > target, 'gte': actual >= target, 'lt': actual < target,
+        'lte': actual <= target, 'eq': actual == target, 'neq': actual != target,
+    }.get(op, True)
+
+
+def _match(stock, conditions):
+    """逐项检查条件是否全部满足"""
+    for prefix, (field, default) in StockScreener.RANGE_FIELDS.items():
+        value = stock.get(field, default)
+        if conditions.get(f'{prefix}_min') is not None and value < conditions[f'{prefix}_min']:
+            return False
+        if conditions.get(f'{prefix}_max') is not None and value > conditions[f'{prefix}_max']:
+            return False
+    for cond_key, field in StockScreener.SET_FIELDS.items():
+        values = conditions.get(cond_key)
+        if values and stock.get(field) not in values:
+            return False
+    keyword = conditions.get('keyword', '').strip()
+    if keyword and keyword not in stock.get('symbol', '') and keyword not in stock.get('stock_name', ''):
+        return False
+    return all(_eval_rule(stock, rule) for rule in conditions.get('custom_rules', []))
+
+
+def _reference_screen(pool, conditions):
+    """逐只匹配后按综合评分排序"""
+    results = [s for s in pool if _match(s, conditions)]
+    results.sort(key=lambda x: x.get('total_score', 0), reverse=True)
+    return results
+
+
+def test_screen_presets_match_reference():
+    """全部预置模板单次扫描结果与逐只匹配一致"""
+    print("=== 批量预置模板筛选测试 ===")
+    engine = StockScreener()
+    pool = _sample_pool()
+
+    batch = engine.screen_presets(pool)
+    assert set(batch.keys()) == set(StockScreener.PRESET_TEMPLATES.keys())
+
+    for key, tpl in StockScreener.PRESET_TEMPLATES.items():
+        expected = _reference_screen(pool, tpl['conditions'])
+        assert batch[key] == expected, f"模板 {key} 结果不一致"
+        print(f"✅ {tpl['name']}: {len(batch[key])} 只")
+
+
+def test_screen_many_custom_sets():
+    """自定义条件组（关键词、自定义规则）与单组 screen 结果一致"""
+    engine = StockScreener()
+    pool = _sample_pool()
+    condition_sets = {
+        'keyword': {'keyword': '股票1'},
+        'rules': {'custom_rules': [{'field': 'rsi', 'op': 'gte', 'value': 60}]},
+        'empty': {},
+    }
+
+    batch = engine.screen_many(pool, condition_sets)
+    for key, conditions in condition_sets.items():
+        assert batch[key] == _reference_screen(pool, conditions)
+        assert engine.screen(pool, conditions) == batch[key]
+
+    assert engine.screen_many([], condition_sets) == {key: [] for key in condition_sets}
+    print("✅ 自定义条件组批量筛选一致")
+
+
+def test_set_conditions_tolerate_loose_json():
+    """枚举条件中混有 null、或直接传入字符串时与逐只匹配一致"""
+    engine = StockScreener()
+    pool = _sample_pool()
+    del pool[0]['market']
+    pool[1]['market'] = None
+    condition_sets = {
+        'with_null': {'markets': ['创业板', None]},
+        'mixed': {'markets': ['创业板', 1], 'confidence_levels': ['high', None, 'high']},
+    }
+    batch = engine.screen_many(pool, condition_sets)
+    for key, conditions in condition_sets.items():
+        assert batch[key] == _reference_screen(pool, conditions), key
+    assert {s['symbol'] for s in pool[:2]} <= {s['symbol'] for s in batch['with_null']}
+
+    pool = _sample_pool()
+    bare = engine.screen(pool, {'markets': '创业板'})
+    assert bare and bare == _reference_screen(pool, {'markets': ['创业板']})
+    print("✅ 枚举条件兼容 null 与字符串")
+
+
+def test_compiled_rules_match_legacy():
+    """旧版 {field, op, value} 规则编译后与逐只解释执行一致"""
+    engine = StockScreener()
+    pool = _sample_pool()
+    pool[0]['rsi'] = None
+    rules = [
+        {'field': 'rsi', 'op': op, 'value': 55} for op in ('gt', 'gte', 'lt', 'lte', 'eq', 'neq')
+    ] + [
+        {'field': 'stock_name', 'op': 'contains', 'value': '股票2'},
+        {'field': 'current_price', 'op': 'lte', 'value': '20'},
+    ]
+    for rule in rules:
+        expected = [s for s in pool if _eval_rule(s, rule)]
+        actual = engine.screen_many(pool, {'r': {'custom_rules': [rule]}})['r']
+        assert sorted(s['symbol'] for s in actual) == sorted(s['symbol'] for s in expected), rule
+    print("✅ 旧版规则编译结果一致")
+
+
+def test_formula_and_field_compare():
+    """公式表达式与字段间比较"""
+    engine = StockScreener()
+    pool = _sample_pool()
+
+    formula = {'expr': 'tech_score * 0.6 + auction_score * 0.4 > 0.7 and market != "创业板"'}
+    expected = [s for s in pool
+                if s['tech_score'] * 0.6 + s['auction_score'] * 0.4 > 0.7 and s['market'] != '创业板']
+    actual = engine.screen_many(pool, {'f': {'custom_rules': [formula]}})['f']
+    assert sorted(s['symbol'] for s in actual) == sorted(s['symbol'] for s in expected)
+
+    compare = {'field': 'tech_score', 'op': 'gt', 'value_field': 'auction_score'}
+    actual = engine.screen_many(pool, {'c': {'custom_rules': [compare]}})['c']
+    assert all(s['tech_score'] > s['auction_score'] for s in actual)
+    assert len(actual) == len([s for s in pool if s['tech_score'] > s['auction_score']])
+    print("✅ 公式与字段间比较正确")
+
+
+def test_invalid_rules_rejected():
+    """未知字段、非法语法在编译期拒绝"""
+    bad_rules = [
+        {'expr': 'unknown_field > 1'},
+        {'expr': '__import__("os").system("ls")'},
+        {'expr': 'tech_score +'},
+        {'expr': 'tech_score * 2'},
+        {'field': 'nope', 'op': 'gt', 'value': 1},
+        {'field': 'rsi', 'op': 'gt', 'value_field': 'nope'},
+        {'field': 'rsi', 'op': 'gt', 'value': 'abc'},
+    ]
+    for rule in bad_rules:
+        try:
+            compile_rule(rule)
+        except RuleCompileError:
+            continue
+        raise AssertionError(f"规则应被拒绝: {rule}")
+    assert compile_rule({'field': 'rsi', 'op': 'gt'}) is None
+    print("✅ 非法规则已拒绝")
+
+
+if __name__ == "__main__":
+    test_screen_presets_match_reference()
+    test_screen_many_custom_sets()
+    test_set_conditions_tolerate_loose_json()
+    test_compiled_rules_match_legacy()
+    test_formula_and_field_compare()
+    test_invalid_rules_rejected()
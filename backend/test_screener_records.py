@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试选股记录的压缩存储、旧数据兼容与键集分页
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stock_screener.models import ScreenerRecordManager
+
+
+def _results(n):
+    return [{'symbol': f'sz.{300000 + i}', 'stock_name': f'股票{i}', 'total_score': 0.5 + i / 1000,
+             'current_price': 10.0 + i, 'confidence': 'high'} for i in range(n)]
+
+
+def test_compressed_roundtrip_and_legacy_rows():
+    """压缩写入可正确读回，旧版明文 JSON 行仍可读取"""
+    print("=== 选股记录存储测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        mgr = ScreenerRecordManager(db_path)
+
+        record_id = mgr.save_record('测试', {'price_max': 20}, _results(50))
+        record = mgr.get_record_by_id(record_id)
+        assert record['conditions'] == {'price_max': 20}
+        assert len(record['result_symbols']) == 50
+        assert record['result_data'][0]['symbol'] == 'sz.300000'
+        assert 'result_data' not in mgr.get_record_by_id(record_id, include_data=False)
+
+        conn = sqlite3.connect(db_path)
+        raw = conn.execute('SELECT result_data FROM screener_records WHERE id = ?', (record_id,)).fetchone()[0]
+        assert isinstance(raw, bytes)
+        conn.execute('''
+            INSERT INTO screener_records (name, conditions, result_count, result_symbols,
+                                          result_summary, result_data, preset_key, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ('旧记录', json.dumps({'keyword': '银行'}), 1, json.dumps(['sh.600036']),
+              json.dumps({'count': 1}), json.dumps([{'symbol': 'sh.600036'}]), '', '2020-01-01 09:30:00'))
+        conn.commit()
+        legacy_id = conn.execute('SELECT MAX(id) FROM screener_records').fetchone()[0]
+        conn.close()
+
+        legacy = mgr.get_record_by_id(legacy_id)
+        assert legacy['result_symbols'] == ['sh.600036']
+        assert legacy['result_data'] == [{'symbol': 'sh.600036'}]
+        print("✅ 压缩存储与旧数据兼容")
+
+
+def test_keyset_pagination():
+    """游标翻页覆盖全部记录且无重复"""
+    with tempfile.TemporaryDirectory() as tmp:
+        mgr = ScreenerRecordManager(os.path.join(tmp, 'test.db'))
+        for i in range(7):
+            mgr.save_record(f'记录{i}', {}, _results(3))
+
+        seen = []
+        cursor = None
+        while True:
+            page = mgr.get_records(limit=3, cursor=cursor)
+            seen.extend(r['id'] for r in page)
+            if len(page) < 3:
+                break
+            cursor = mgr.make_cursor(page[-1])
+
+        assert seen == sorted(seen, reverse=True)
+        assert len(seen) == len(set(seen)) == 7
+        assert mgr.parse_cursor('not-a-cursor') is None
+        print("✅ 键集分页正确")
+
+
+if __name__ == "__main__":
+    test_compressed_roundtrip_and_legacy_rows()
+    test_keyset_pagination()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试条件选股历史回放
+验证每日命中与逐日单独筛选一致，T+N 收益按交易日轴计算
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from backend.services.bar_store import BAR_UPSERT
+from backend.services.database import get_database
+from stock_screener.screener import StockScreener
+from stock_screener.replay import ScreenerReplay
+
+
+DATES = ['2024-03-01', '2024-03-04', '2024-03-05', '2024-03-06']
+
+
+def _build_db(db_path, missing=()):
+    """
+    写入 4 个交易日、每日 3 只股票的候选池与本地日线，价格每日递增 10%
+
+    @param {tuple} missing - 没有日线的 (date, symbol)，模拟停牌
+    """
+    with get_database(db_path).transaction() as conn:
+        for day, date in enumerate(DATES):
+            for i, score in enumerate([0.9, 0.75, 0.6]):
+                symbol, price = f'sz.30000{i}', 10.0 * (1.1 ** day)
+                conn.execute(
+                    'INSERT INTO stock_recommendations (date, symbol, stock_name, market, current_price, '
+                    'total_score, confidence) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (date, symbol, f'股票{i}', '创业板', price, score, 'high')
+                )
+                if (date, symbol) not in missing:
+                    conn.execute(BAR_UPSERT, (symbol, date, price, price, price, price, 1000.0))
+
+
+def test_replay_matches_and_forward_returns():
+    """多组条件一次回放，命中数与收益正确"""
+    print("=== 条件选股历史回放测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        _build_db(db_path)
+
+        replay = ScreenerReplay(db_path)
+        condition_sets = {'high': {'total_score_min': 0.7}, 'top': {'total_score_min': 0.85}}
+        results = replay.replay(condition_sets, start_date=DATES[0], end_date=DATES[-1], horizons=(1, 3))
+
+        history = replay.load_history(DATES[0], DATES[-1])
+        for key, conditions in condition_sets.items():
+            expected = sum(len(StockScreener().screen(day.to_dict('records'), conditions))
+                           for _, day in history.groupby('date'))
+            assert results[key]['summary']['match_count'] == expected
+
+        summary = results['top']['summary']
+        assert summary['matched_days'] == 4
+        # 最后一个交易日没有 T+1 价格，前三天每日 +10%
+        assert summary['samples_ret_1d'] == 3
+        assert abs(summary['avg_ret_1d'] - 0.1) < 1e-4
+        assert summary['samples_ret_3d'] == 1
+        assert abs(summary['avg_ret_3d'] - 0.331) < 1e-4
+        assert results['top']['matches'][-1]['ret_1d'] is None
+        print(f"✅ 回放命中 {summary['match_count']} 条，T+1 平均收益 {summary['avg_ret_1d']}")
+
+
+def test_replay_price_provider_and_empty_range():
+    """自定义价格来源与空区间"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        _build_db(db_path)
+
+        def provider(symbols, start_date):
+            return pd.DataFrame({s: [10.0, 12.0, 12.0, 12.0] for s in symbols}, index=DATES)
+
+        results = ScreenerReplay(db_path, price_provider=provider).replay(
+            {'all': {}}, start_date=DATES[0], end_date=DATES[0], horizons=(1,))
+        assert results['all']['summary']['match_count'] == 3
+        assert abs(results['all']['summary']['avg_ret_1d'] - 0.2) < 1e-9
+
+        empty = ScreenerReplay(db_path).replay({'all': {}}, start_date='2020-01-01', end_date='2020-01-31')
+        assert empty['all']['summary']['match_count'] == 0
+        assert empty['all']['matches'] == []
+        print("✅ 价格来源与空区间处理正确")
+
+
+def test_replay_with_symbols_missing_on_some_days():
+    """本地日线缺失（停牌）的日期不计入收益样本，不影响其他股票"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        _build_db(db_path, missing={('2024-03-04', 'sz.300001'), ('2024-03-05', 'sz.300002')})
+
+        results = ScreenerReplay(db_path).replay({'all': {}}, start_date=DATES[0], end_date=DATES[-1],
+                                                 horizons=(1, 2))
+        returns = {(m['date'], m['symbol']): (m['ret_1d'], m['ret_2d']) for m in results['all']['matches']}
+        assert abs(returns[('2024-03-01', 'sz.300000')][0] - 0.1) < 1e-9
+        # 停牌日作为基准或 T+N 目标时均无收益
+        assert returns[('2024-03-01', 'sz.300001')][0] is None
+        assert returns[('2024-03-04', 'sz.300001')] == (None, None)
+        assert abs(returns[('2024-03-01', 'sz.300001')][1] - 0.21) < 1e-9
+        assert returns[('2024-03-04', 'sz.300002')][0] is None
+        assert abs(returns[('2024-03-04', 'sz.300002')][1] - 0.21) < 1e-9
+
+        summary = results['all']['summary']
+        assert summary['match_count'] == 12
+        assert summary['samples_ret_1d'] == 9 - 4
+        assert abs(summary['avg_ret_1d'] - 0.1) < 1e-4
+        print(f"✅ 停牌日缺失时 T+1 样本 {summary['samples_ret_1d']} 个，收益不受影响")
+
+
+if __name__ == "__main__":
+    test_replay_matches_and_forward_returns()
+    test_replay_price_provider_and_empty_range()
+    test_replay_with_symbols_missing_on_some_days()
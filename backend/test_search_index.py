@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试选股搜索索引：代码前缀、名称子串、拼音首字母
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.database import get_database
+from stock_screener import search_index
+from stock_screener.search_index import StockSearchIndex, get_search_index, save_universe
+from stock_screener.screener import StockScreener
+
+UNIVERSE = [
+    ('sz.300750', '宁德时代'),
+    ('sz.300760', '迈瑞医疗'),
+    ('sz.000725', '京东方A'),
+    ('sh.600519', '贵州茅台'),
+    ('sz.002475', '立讯精密'),
+]
+
+
+def test_code_and_name_lookup():
+    """代码前缀与名称子串"""
+    print("=== 搜索索引测试 ===")
+    index = StockSearchIndex(UNIVERSE)
+
+    codes = [r['code'] for r in index.search('3007')]
+    assert codes == ['300750', '300760']
+    assert index.search('300750')[0]['match'] == 'code_exact'
+
+    assert [r['symbol'] for r in index.search('德时')] == ['sz.300750']
+    assert [r['symbol'] for r in index.search('茅')] == ['sh.600519']
+    assert index.search('不存在') == []
+    print("✅ 代码前缀与名称子串查询正确")
+
+
+def test_pinyin_initials():
+    """拼音首字母（未安装 pypinyin 时跳过）"""
+    try:
+        import pypinyin  # noqa: F401
+    except ImportError:
+        print("⚠️ 未安装 pypinyin，跳过拼音测试")
+        return
+    index = StockSearchIndex(UNIVERSE)
+    result = index.search('ndsd')
+    assert result and result[0]['stock_name'] == '宁德时代'
+    assert result[0]['match'] == 'pinyin_prefix'
+    assert index.match_symbols('gzmt') == {'sh.600519'}
+    print("✅ 拼音首字母查询正确")
+
+
+def test_screener_keyword_uses_index():
+    """选股关键词过滤：索引内外的股票结果都与子串匹配一致"""
+    index = StockSearchIndex(UNIVERSE)
+    pool = [{'symbol': s, 'stock_name': n, 'total_score': 0.7} for s, n in UNIVERSE]
+    pool.append({'symbol': 'sz.300999', 'stock_name': '新股时代', 'total_score': 0.6})
+
+    plain = StockScreener()
+    indexed = StockScreener(search_index=index)
+    for keyword in ['300', '时代', '600519', '京东方']:
+        expected = plain.screen(pool, {'keyword': keyword})
+        assert indexed.screen(pool, {'keyword': keyword}) == expected, keyword
+    print("✅ 选股关键词过滤结果一致")
+
+
+def test_rebuild_in_background_on_universe_change():
+    """推荐表写入不触发重建；股票列表变化后后台重建，期间返回旧索引"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        universe_path = os.path.join(tmp, 'stock_universe.json')
+        save_universe(UNIVERSE[:2], universe_path)
+        db = get_database(db_path)
+
+        first = get_search_index(db_path, universe_path)
+        assert len(first) == 2
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO stock_recommendations (date, symbol, stock_name) "
+                         "VALUES ('2024-03-04', 'sz.000725', '京东方A')")
+        assert get_search_index(db_path, universe_path) is first
+
+        save_universe(UNIVERSE, universe_path)
+        os.utime(universe_path, ns=(0, os.stat(universe_path).st_mtime_ns + 1))
+        assert get_search_index(db_path, universe_path) is first
+        worker = search_index._rebuilding.get((db_path, universe_path))
+        if worker is not None:
+            worker.join(timeout=10)
+        rebuilt = get_search_index(db_path, universe_path)
+        assert rebuilt is not first and len(rebuilt) == len(UNIVERSE)
+        assert get_search_index(db_path, universe_path) is rebuilt
+        print("✅ 股票列表变化后后台重建索引")
+
+
+if __name__ == "__main__":
+    test_code_and_name_lookup()
+    test_pinyin_initials()
+    test_screener_keyword_uses_index()
+    test_rebuild_in_background_on_universe_change()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试单飞协调器：并发线程与并发进程只执行一次分析并共享结果
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backend.services.single_flight import SingleFlight
+
+
+def test_threads_attach_to_running_call():
+    """执行期间的并发调用挂到同一次执行上；结束后的新调用重新执行"""
+    print("=== 单飞协调器测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(tmp)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def analyze():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'recommendations': [{'symbol': 'sz.000001', 'total_score': np.float64(0.8)}]}
+
+        results = []
+        waits = []
+
+        def caller():
+            results.append(flight.run('analysis', analyze, date='2024-03-08', on_wait=waits.append))
+
+        threads = [threading.Thread(target=caller) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        time.sleep(0.05)
+        assert flight.in_flight('analysis', '2024-03-08')
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert sorted(executed for _, executed in results) == [False, False, False, True]
+        assert all(result is results[0][0] for result, _ in results)
+        assert waits == ['thread'] * 3
+
+        flight.run('analysis', analyze, date='2024-03-08')
+        assert len(calls) == 2
+        print(f"✅ 4 个并发调用只执行 1 次")
+
+
+def test_errors_propagate_to_waiters():
+    """执行失败时等待方收到同一异常，且不会留下进行中的记录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(tmp)
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError('BaoStock 连接失败')
+
+        def caller():
+            try:
+                flight.run('analysis', failing, date='2024-03-08')
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=caller)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=caller)
+        follower.start()
+        leader.join(5)
+        follower.join(5)
+        assert errors == ['BaoStock 连接失败'] * 2
+        assert not flight.in_flight('analysis', '2024-03-08')
+
+
+def _process_caller(lock_dir, counter_path, queue):
+    def analyze():
+        with open(counter_path, 'a') as f:
+            f.write('x')
+        time.sleep(0.5)
+        return {'count': 15}
+
+    result, executed = SingleFlight(lock_dir).run('analysis', analyze, date='2024-03-08')
+    queue.put((result, executed))
+
+
+def test_processes_share_result_through_file_lock():
+    """两个 worker 进程同时发起分析，只执行一次，另一个读取共享结果"""
+    if sys.platform.startswith('win'):
+        return
+    ctx = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = os.path.join(tmp, 'counter')
+        queue = ctx.Queue()
+        procs = [ctx.Process(target=_process_caller, args=(tmp, counter, queue)) for _ in range(2)]
+        for p in procs:
+            p.start()
+            time.sleep(0.1)
+        outcomes = [queue.get(timeout=10) for _ in procs]
+        for p in procs:
+            p.join(10)
+
+        with open(counter) as f:
+            assert f.read() == 'x'
+        assert sorted(executed for _, executed in outcomes) == [False, True]
+        assert all(result == {'count': 15} for result, _ in outcomes)
+        print("✅ 跨进程并发分析只执行 1 次")
+
+
+if __name__ == "__main__":
+    test_threads_attach_to_running_call()
+    test_errors_propagate_to_waiters()
+    test_processes_share_result_through_file_lock()
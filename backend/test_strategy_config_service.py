@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试策略配置服务的快照缓存与写穿透
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.strategy_config import StrategyConfigService, STRATEGY_DEFAULTS
+
+
+def test_snapshot_cached_and_write_through():
+    """快照只加载一次，保存后立即可见且版本号递增"""
+    print("=== 策略配置服务测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        service = StrategyConfigService(os.path.join(tmp, 'test.db'))
+        loads = []
+        original_load = service._load
+        service._load = lambda db: loads.append(1) or original_load(db)
+
+        assert service.snapshot() == STRATEGY_DEFAULTS
+        for _ in range(100):
+            service.snapshot()
+        assert len(loads) == 1
+
+        version = service.version
+        service.save({'score_threshold': 0.8, 'max_recommendations': 20})
+        config = service.snapshot()
+        assert config['score_threshold'] == 0.8
+        assert config['max_recommendations'] == 20
+        assert service.version == version + 1
+
+        # 返回副本，调用方修改不影响快照
+        config['score_threshold'] = 0.1
+        assert service.snapshot()['score_threshold'] == 0.8
+        print("✅ 快照缓存与写穿透正常")
+
+
+def test_snapshot_with_custom_defaults():
+    """分析器自带默认值时只合并其包含的键"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = StrategyConfigService(os.path.join(tmp, 'test.db'))
+        service.save({'score_threshold': 0.6, 'updated_at': '2024-01-01 09:00:00'})
+
+        config = service.snapshot(defaults={'score_threshold': 0.45, 'min_price': 2.0})
+        assert config == {'score_threshold': 0.6, 'min_price': 2.0}
+        assert service.snapshot()['updated_at'] == '2024-01-01 09:00:00'
+
+        service.invalidate()
+        assert service.snapshot()['score_threshold'] == 0.6
+        print("✅ 自定义默认值合并正常")
+
+
+def test_save_visible_to_other_workers():
+    """另一进程（worker）写入配置后，本进程下次读取即可见"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        worker_a = StrategyConfigService(db_path)
+        worker_b = StrategyConfigService(db_path)
+        assert worker_b.snapshot()['max_recommendations'] == STRATEGY_DEFAULTS['max_recommendations']
+
+        worker_a.save({'max_recommendations': 30})
+        assert worker_b.version == worker_a.version
+        assert worker_b.snapshot()['max_recommendations'] == 30
+        print("✅ 配置写入跨 worker 立即可见")
+
+
+if __name__ == "__main__":
+    test_snapshot_cached_and_write_through()
+    test_snapshot_with_custom_defaults()
+    test_save_visible_to_other_workers()
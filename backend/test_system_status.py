@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试系统状态服务的快照缓存、计数维护与 .env 变更检测
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.database import get_database
+from backend.services.system_status import SystemStatusService
+
+
+def _insert(db, date, n):
+    with db.transaction() as conn:
+        conn.executemany('INSERT INTO stock_recommendations (date, symbol) VALUES (?, ?)',
+                         [(date, f'sz.{300000 + i}') for i in range(n)])
+
+
+def test_counts_and_ttl():
+    """TTL 内复用快照，写入后计数立即更新且对其他 worker 可见"""
+    print("=== 系统状态服务测试 ===")
+    today = datetime.now().strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        db = get_database(db_path)
+        service = SystemStatusService(db_path, env_path=os.path.join(tmp, '.env'), ttl=60)
+
+        _insert(db, today, 3)
+        assert service.snapshot()['today_recommendations'] == 3
+
+        # 其他进程写入：TTL 内仍返回缓存值
+        _insert(db, today, 2)
+        assert service.snapshot()['today_recommendations'] == 3
+
+        # 本进程写入后通知：计数立即更新，最后更新时间重新查询
+        service.record_recommendations_saved(today, 7)
+        status = service.snapshot()
+        assert status['today_recommendations'] == 7
+        assert status['last_update'] != "从未更新"
+
+        # 快照在进程间共享：另一个 worker 直接读到同一份快照
+        other_worker = SystemStatusService(db_path, env_path=os.path.join(tmp, '.env'), ttl=60)
+        assert other_worker.snapshot()['today_recommendations'] == 7
+
+        # 失效后以数据库为准
+        service.invalidate()
+        assert service.snapshot()['today_recommendations'] == 5
+        print("✅ 计数与 TTL 正常")
+
+
+def test_env_reloaded_only_on_change():
+    """.env 修改时间变化时才重新加载"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env_path = os.path.join(tmp, '.env')
+        service = SystemStatusService(os.path.join(tmp, 'test.db'), env_path=env_path, ttl=0)
+        saved = {key: os.environ.pop(key, None) for key in ('SENDER_EMAIL', 'SENDER_PASSWORD', 'RECIPIENT_EMAILS')}
+        try:
+            assert service.email_configured() is False
+
+            with open(env_path, 'w') as f:
+                f.write('SENDER_EMAIL=a@b.com\nSENDER_PASSWORD=x\nRECIPIENT_EMAILS=c@d.com\n')
+            assert service.email_configured() is True
+
+            # 未修改文件时不重新加载
+            os.environ.pop('SENDER_EMAIL')
+            assert service.email_configured() is False
+
+            os.utime(env_path, (0, 12345))
+            assert service.email_configured() is True
+            print("✅ .env 变更检测正常")
+        finally:
+            for key, value in saved.items():
+                os.environ.pop(key, None)
+                if value is not None:
+                    os.environ[key] = value
+
+
+if __name__ == "__main__":
+    test_counts_and_ttl()
+    test_env_reloaded_only_on_change()
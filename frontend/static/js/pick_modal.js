@@ -35,7 +35,7 @@ function openStockModal(symbol) {
             
             // 渲染图表
             setTimeout(() => {
-                renderChart(data.prices);
+                renderChart(data.chart || data.prices);
             }, 100);
             
         })
@@ -78,10 +78,11 @@ function closeStockModal() {
 
 /**
  * 渲染Chart.js迷你图表
- * @param {Array} prices - 价格数据数组
+ * @param {Object|Array} chart - 走势缩略图 {start_date, t, c}（t 为距起始日的天数，c 为收盘价），或旧版价格数组
  */
-function renderChart(prices) {
+function renderChart(chart) {
     const canvas = document.getElementById("miniChart");
+    const prices = Array.isArray(chart) ? chart : (chart && chart.c);
     
     if (!canvas || !prices || !prices.length) {
         console.warn("Chart canvas not found or no price data available");
@@ -94,8 +95,15 @@ function renderChart(prices) {
     }
     
     try {
-        // 生成时间标签（简化为索引）
-        const labels = prices.map((_, index) => index + 1);
+        // 时间标签：由起始日与天数偏移还原日期，旧版数据用序号
+        let labels = prices.map((_, index) => index + 1);
+        if (!Array.isArray(chart) && chart.start_date) {
+            const start = new Date(`${chart.start_date}T00:00:00`);
+            labels = chart.t.map(days => {
+                const date = new Date(start.getTime() + days * 86400000);
+                return `${date.getMonth() + 1}/${date.getDate()}`;
+            });
+        }
         
         // 创建新的Chart.js迷你K线图
         currentChart = new Chart(canvas, {
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CChanTrader-AI 生产环境 gunicorn 配置
+
+用法:
+    gunicorn -c gunicorn.conf.py backend.app:app
+
+- 多个 worker 进程，每个 worker 多线程（gthread）：一次分析占用的线程不影响其他请求，
+  SSE 长连接每个占用一个线程
+- 各 worker 的状态快照、推荐快照版本、选股结果、配置版本、任务状态与事件统一放在
+  data/shared_cache.db（见 backend/services/shared_cache.py），任一 worker 的写入对其他 worker 立即可见
+- 交易日调度器不在 worker 中运行：主进程启动时拉起一个 `python run.py --scheduler` 子进程，
+  退出时一并终止；设置 SCHEDULER_PROCESS=external 时由外部单独运行调度器进程（如 Procfile 的 scheduler 类型）
+
+环境变量:
+    PORT               监听端口，默认 8080
+    WEB_CONCURRENCY    worker 进程数，默认 min(CPU 核数 * 2 + 1, 4)
+    GUNICORN_THREADS   每个 worker 的线程数，默认 8
+    SCHEDULER_PROCESS  embedded（默认，由 gunicorn 主进程拉起）或 external
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# 分析任务在后台线程中执行，请求本身不会长时间阻塞；SSE 连接有心跳
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+chdir = ROOT
+accesslog = '-'
+errorlog = '-'
+# 每个 worker 自行导入应用：SQLite 连接与后台线程都不跨 fork 共享
+preload_app = False
+
+
+def on_starting(server):
+    """主进程启动时拉起调度器进程"""
+    if os.environ.get('SCHEDULER_PROCESS', 'embedded') == 'external':
+        return
+    server.scheduler_process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'run.py'), '--scheduler'], cwd=ROOT)
+    server.log.info("调度器进程已启动 (pid=%s)", server.scheduler_process.pid)
+
+
+def on_exit(server):
+    """主进程退出时终止调度器进程"""
+    process = getattr(server, 'scheduler_process', None)
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -1,25 +1,158 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-CChanTrader-AI 启动脚本
-便捷启动方式
+CChanTrader-AI 统一启动入口
+
+用法:
+    python run.py                      # 开发模式：单进程 Web 服务（端口取 PORT 环境变量，默认 8080），调度器在后台线程运行
+    python run.py --profile-startup    # 先输出启动耗时报告，再启动服务
+    python run.py --host 127.0.0.1 --port 5000
+    python run.py --scheduler          # 只运行交易日调度器（独立进程）
+
+生产环境使用 gunicorn 多 worker（见 gunicorn.conf.py）:
+    gunicorn -c gunicorn.conf.py backend.app:app
+gunicorn 主进程启动时拉起一个 --scheduler 进程，各 worker 之间通过数据目录下的共享缓存协作。
+
+akshare / baostock / pandas 与各分析器都在首次使用时才导入，数据库表结构在首次连接时创建，
+因此导入应用与响应 /health 不承担这些开销。--profile-startup 用于确认这一点。
 """
 
-import subprocess
-import sys
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
 import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 启动阶段不应加载的重量级模块
+HEAVY_MODULES = ('pandas', 'numpy', 'akshare', 'baostock', 'duckdb')
+
+
+class StartupProfile:
+    """按阶段记录启动耗时"""
+
+    def __init__(self, started=_STARTED):
+        self.stages = []
+        self._last = started
+        self._started = started
+
+    def mark(self, stage):
+        """
+        记录从上一阶段结束到现在的耗时
+
+        @param {str} stage - 阶段名称
+        """
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def report(self):
+        """打印启动耗时报告"""
+        total = time.perf_counter() - self._started
+        print("⏱️ 启动耗时报告")
+        for stage, seconds in self.stages:
+            print(f"   {stage:<24} {seconds * 1000:8.1f} ms")
+        print(f"   {'合计':<24} {total * 1000:8.1f} ms")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        if loaded:
+            print(f"⚠️ 启动阶段已加载重量级模块: {', '.join(loaded)}")
+        else:
+            print(f"✅ 启动阶段未加载 {', '.join(HEAVY_MODULES)}")
+        print("💡 逐模块导入耗时可用: python -X importtime run.py --profile-startup")
+
+
+def load_app(profile=None):
+    """
+    导入 Flask 应用
+
+    @param {StartupProfile} profile - 记录各阶段耗时，可为 None
+    @returns {Flask}
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import flask  # noqa: F401
+    if profile:
+        profile.mark('导入 Flask')
+    from backend.app import app
+    if profile:
+        profile.mark('导入 backend.app')
+    return app
+
+
+def serve(host='0.0.0.0', port=None, profile_startup=False, with_scheduler=True):
+    """
+    以 Flask 开发服务器启动 Web 服务（单进程）
+
+    @param {str} host - 监听地址
+    @param {int} port - 端口，缺省取 PORT 环境变量（Railway）或 8080
+    @param {bool} profile_startup - 是否在启动前输出耗时报告
+    @param {bool} with_scheduler - 是否在后台线程运行调度器（已有调度器进程时自动跳过）
+    """
+    profile = StartupProfile() if profile_startup else None
+    if profile:
+        profile.mark('解释器与入口脚本')
+    app = load_app(profile)
+
+    if profile:
+        with app.test_client() as client:
+            client.get('/health')
+        profile.mark('首个请求 /health')
+        from backend.app import web_manager
+        web_manager.db.connect()
+        profile.mark('数据库首次连接与建表')
+        profile.report()
+
+    os.makedirs(os.path.join(ROOT, 'data'), exist_ok=True)
+    if with_scheduler:
+        import threading
+        from backend.services.scheduler_control import run_scheduler_process
+        threading.Thread(target=run_scheduler_process, name='scheduler', daemon=True).start()
+
+    port = port or int(os.environ.get("PORT", 8080))
+    print("🚀 启动 CChanTrader-AI Web管理平台...")
+    print(f"🌐 访问地址: http://localhost:{port}")
+    print("🛑 停止服务: Ctrl+C")
+    app.run(host=host, port=port, debug=False)
+
+
+def run_scheduler():
+    """以独立进程运行交易日调度器，收到 SIGTERM / Ctrl+C 时退出"""
+    import signal
+    import threading
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from backend.services.scheduler_control import run_scheduler_process
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    run_scheduler_process(stop_event=stop_event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CChanTrader-AI Web管理平台')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址，默认 0.0.0.0')
+    parser.add_argument('--port', type=int, default=None, help='端口，默认取 PORT 环境变量或 8080')
+    parser.add_argument('--profile-startup', action='store_true', help='输出启动耗时报告')
+    parser.add_argument('--scheduler', action='store_true', help='只运行交易日调度器（独立进程）')
+    parser.add_argument('--no-scheduler', action='store_true', help='开发模式下不在后台运行调度器')
+    args = parser.parse_args(argv)
+
+    if args.scheduler:
+        run_scheduler()
+        return
 
-def main():
-    print("🚀 启动 CChanTrader-AI...")
-    print("📍 项目根目录:", os.getcwd())
-    
     try:
-        # 从项目根目录启动Flask应用
-        subprocess.run([sys.executable, "backend/app.py"], check=True)
+        serve(host=args.host, port=args.port, profile_startup=args.profile_startup,
+              with_scheduler=not args.no_scheduler)
     except KeyboardInterrupt:
         print("\n👋 已停止服务")
-    except Exception as e:
-        print(f"❌ 启动失败: {e}")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
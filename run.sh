@@ -7,10 +7,10 @@ echo "📍 项目根目录: $(pwd)"
 # 检查Python版本
 if command -v python3 &> /dev/null; then
     echo "✅ 使用 python3"
-    python3 backend/app.py
+    python3 run.py "$@"
 elif command -v python &> /dev/null; then
     echo "✅ 使用 python"
-    python backend/app.py
+    python run.py "$@"
 else
     echo "❌ 未找到Python，请安装Python 3.7+"
     exit 1
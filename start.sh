@@ -8,5 +8,5 @@ export PYTHONPATH=/app
 export FLASK_ENV=production
 
 # 启动 Flask 应用
-python3 backend/app.py
+python3 run.py
 
@@ -2,9 +2,29 @@
 # -*- coding: utf-8 -*-
 """
 同花顺风格条件选股模块
+
+导出的名称在首次访问时才导入对应子模块：只用到 models / search_index 时不加载 pandas。
 """
 
-from stock_screener.screener import StockScreener
-from stock_screener.models import ScreenerRecordManager
+import importlib
+
+_EXPORTS = {
+    'StockScreener': 'stock_screener.screener',
+    'ScreenerRecordManager': 'stock_screener.models',
+    'compile_rule': 'stock_screener.expression',
+    'RuleCompileError': 'stock_screener.expression',
+    'StockSearchIndex': 'stock_screener.search_index',
+    'get_search_index': 'stock_screener.search_index',
+    'ScreenerReplay': 'stock_screener.replay',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ['StockScreener', 'ScreenerRecordManager']
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
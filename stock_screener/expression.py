@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自定义选股规则编译器
+
+将用户手动输入的 custom_rules 一次性解析并编译为列式表达式，
+在整张候选表上向量化求值。支持三种规则写法：
+
+- 字段与常量比较: {"field": "rsi", "op": "gte", "value": 60}
+- 字段与字段比较: {"field": "current_price", "op": "lt", "value_field": "target_price"}
+- 公式表达式:     {"expr": "tech_score * 0.6 + auction_score * 0.4 > 0.7"}
+
+字段名在编译期校验，未知字段直接拒绝。
+"""
+
+import ast
+import json
+import operator
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# 可用于自定义规则的字段
+NUMERIC_FIELDS = {
+    'current_price', 'total_score', 'tech_score', 'auction_score',
+    'auction_ratio', 'rsi', 'market_cap_billion', 'entry_price',
+    'stop_loss', 'target_price', 'volume_ratio',
+}
+TEXT_FIELDS = {
+    'symbol', 'stock_name', 'market', 'strategy', 'gap_type', 'confidence',
+}
+
+# 旧版 op 与比较运算的对应关系
+RULE_OPS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'eq': operator.eq,
+    'neq': operator.ne,
+}
+
+_AST_COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+_AST_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+_FUNCTIONS = {
+    'abs': np.abs,
+}
+
+# 表达式长度上限，防止恶意超长输入
+MAX_EXPR_LENGTH = 500
+
+
+class RuleCompileError(ValueError):
+    """自定义规则无法编译（语法错误、未知字段或不支持的运算）"""
+
+
+class CompiledRule:
+    """编译后的规则，可在候选表上向量化求值"""
+
+    def __init__(self, source, fields, evaluator):
+        self.source = source
+        self.fields = fields
+        self._evaluator = evaluator
+
+    def evaluate(self, frame):
+        """
+        在候选表上求值
+
+        @param {DataFrame} frame - 候选股票列式表
+        @returns {ndarray[bool]} 每只股票是否满足规则
+        """
+        result = self._evaluator(frame)
+        if np.isscalar(result):
+            return np.full(len(frame), bool(result), dtype=bool)
+        return np.asarray(result, dtype=bool)
+
+    def __repr__(self):
+        return f"CompiledRule({self.source!r})"
+
+
+def compile_rule(rule):
+    """
+    编译一条自定义规则（结果按规则内容缓存，同一规则只解析一次）
+
+    @param {dict} rule - 规则字典
+    @returns {CompiledRule|None} 规则不完整时返回 None（视为不过滤）
+    @raises {RuleCompileError} 规则非法
+    """
+    return _compile_cached(json.dumps(rule, sort_keys=True, ensure_ascii=False))
+
+
+def validate_rules(rules):
+    """
+    校验一组自定义规则，供 API 层在执行选股前提前报错
+
+    @param {list[dict]} rules
+    @raises {RuleCompileError}
+    """
+    for rule in rules or []:
+        compile_rule(rule)
+
+
+@lru_cache(maxsize=512)
+def _compile_cached(rule_key):
+    rule = json.loads(rule_key)
+    if not isinstance(rule, dict):
+        raise RuleCompileError('规则必须是对象')
+
+    if rule.get('expr'):
+        return _compile_expression(str(rule['expr']))
+
+    field = rule.get('field', '')
+    op = rule.get('op', '')
+    if not field or not op:
+        return None
+    if 'value_field' in rule:
+        return _compile_field_compare(field, op, rule['value_field'])
+    if rule.get('value') is None:
+        return None
+    return _compile_value_compare(field, op, rule['value'])
+
+
+# ----------------------------------------------------------------------
+# 旧版 {"field","op","value"} 规则
+# ----------------------------------------------------------------------
+
+def _check_field(name):
+    if name not in NUMERIC_FIELDS and name not in TEXT_FIELDS:
+        raise RuleCompileError(f'未知字段: {name}')
+
+
+def _column(frame, name, numeric):
+    """取出列（不存在时为全空列），数值字段统一转为 float"""
+    if name in frame.columns:
+        series = frame[name]
+    else:
+        series = pd.Series([None] * len(frame), index=frame.index, dtype=object)
+    if numeric:
+        return pd.to_numeric(series, errors='coerce')
+    return series
+
+
+def _compile_value_compare(field, op, value):
+    _check_field(field)
+    source = f'{field} {op} {value!r}'
+
+    if op == 'contains':
+        target = str(value)
+
+        def evaluator(frame):
+            series = _column(frame, field, numeric=False)
+            return (series.notna() & series.astype(str).str.contains(target, regex=False)).to_numpy()
+        return CompiledRule(source, {field}, evaluator)
+
+    cmp = RULE_OPS.get(op)
+    if cmp is None:
+        raise RuleCompileError(f'不支持的运算符: {op}')
+
+    if field in TEXT_FIELDS and op in ('eq', 'neq'):
+        target = str(value)
+
+        def evaluator(frame):
+            series = _column(frame, field, numeric=False)
+            return (series.notna() & cmp(series.astype(str), target)).to_numpy()
+        return CompiledRule(source, {field}, evaluator)
+
+    try:
+        target = float(value)
+    except (TypeError, ValueError):
+        raise RuleCompileError(f'字段 {field} 的比较值必须是数字: {value}')
+
+    def evaluator(frame):
+        series = _column(frame, field, numeric=True)
+        return (series.notna() & cmp(series, target)).to_numpy()
+    return CompiledRule(source, {field}, evaluator)
+
+
+def _compile_field_compare(field, op, other):
+    _check_field(field)
+    _check_field(other)
+    cmp = RULE_OPS.get(op)
+    if cmp is None:
+        raise RuleCompileError(f'字段间比较不支持运算符: {op}')
+
+    numeric = field in NUMERIC_FIELDS and other in NUMERIC_FIELDS
+    if not numeric and op not in ('eq', 'neq'):
+        raise RuleCompileError(f'文本字段只支持 eq / neq 比较: {field} {op} {other}')
+
+    def evaluator(frame):
+        left = _column(frame, field, numeric)
+        right = _column(frame, other, numeric)
+        if not numeric:
+            left, right = left.astype(str), right.astype(str)
+        valid = _column(frame, field, False).notna() & _column(frame, other, False).notna()
+        return (valid & cmp(left, right)).to_numpy()
+    return CompiledRule(f'{field} {op} {other}', {field, other}, evaluator)
+
+
+# ----------------------------------------------------------------------
+# 公式表达式
+# ----------------------------------------------------------------------
+
+def _compile_expression(expr):
+    if len(expr) > MAX_EXPR_LENGTH:
+        raise RuleCompileError(f'表达式过长（上限 {MAX_EXPR_LENGTH} 字符）')
+    try:
+        tree = ast.parse(expr.strip(), mode='eval')
+    except SyntaxError as e:
+        raise RuleCompileError(f'表达式语法错误: {e.msg}')
+
+    fields = set()
+    node_fn, kind = _compile_node(tree.body, fields)
+    if kind != 'bool':
+        raise RuleCompileError('表达式结果必须是条件判断（例如 a + b > 0.7）')
+    return CompiledRule(expr, fields, node_fn)
+
+
+def _compile_node(node, fields):
+    """
+    递归编译 AST 节点
+
+    @returns {tuple} (evaluator(frame) -> Series/标量, 结果类型 'num'|'text'|'bool')
+    """
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or value is None:
+            raise RuleCompileError(f'不支持的常量: {value!r}')
+        if isinstance(value, (int, float)):
+            return (lambda frame, v=float(value): v), 'num'
+        if isinstance(value, str):
+            return (lambda frame, v=value: v), 'text'
+        raise RuleCompileError(f'不支持的常量: {value!r}')
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        _check_field(name)
+        fields.add(name)
+        if name in NUMERIC_FIELDS:
+            return (lambda frame: _column(frame, name, numeric=True)), 'num'
+        return (lambda frame: _column(frame, name, numeric=False)), 'text'
+
+    if isinstance(node, ast.UnaryOp):
+        operand, kind = _compile_node(node.operand, fields)
+        if isinstance(node.op, ast.USub) and kind == 'num':
+            return (lambda frame: -operand(frame)), 'num'
+        if isinstance(node.op, ast.UAdd) and kind == 'num':
+            return operand, 'num'
+        if isinstance(node.op, ast.Not) and kind == 'bool':
+            return (lambda frame: ~_as_bool(operand(frame), frame)), 'bool'
+        raise RuleCompileError('不支持的一元运算')
+
+    if isinstance(node, ast.BinOp):
+        op = _AST_BIN_OPS.get(type(node.op))
+        if op is None:
+            raise RuleCompileError('只支持 + - * / 四则运算')
+        left, lkind = _compile_node(node.left, fields)
+        right, rkind = _compile_node(node.right, fields)
+        if lkind != 'num' or rkind != 'num':
+            raise RuleCompileError('四则运算只能用于数值字段')
+        if op is operator.truediv:
+            def divide(frame):
+                denominator = right(frame)
+                if np.isscalar(denominator):
+                    return left(frame) / denominator if denominator != 0 else np.nan
+                return left(frame) / denominator.replace(0, np.nan)
+            return divide, 'num'
+        return (lambda frame: op(left(frame), right(frame))), 'num'
+
+    if isinstance(node, ast.BoolOp):
+        parts = []
+        for value in node.values:
+            fn, kind = _compile_node(value, fields)
+            if kind != 'bool':
+                raise RuleCompileError('and / or 两侧必须是条件判断')
+            parts.append(fn)
+        is_and = isinstance(node.op, ast.And)
+
+        def combine(frame):
+            result = _as_bool(parts[0](frame), frame)
+            for fn in parts[1:]:
+                other = _as_bool(fn(frame), frame)
+                result = (result & other) if is_and else (result | other)
+            return result
+        return combine, 'bool'
+
+    if isinstance(node, ast.Compare):
+        return _compile_compare(node, fields), 'bool'
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise RuleCompileError('只支持 abs() 函数')
+        if len(node.args) != 1:
+            raise RuleCompileError('abs() 只接受一个参数')
+        arg, kind = _compile_node(node.args[0], fields)
+        if kind != 'num':
+            raise RuleCompileError('abs() 只能用于数值')
+        fn = _FUNCTIONS[node.func.id]
+        return (lambda frame: fn(arg(frame))), 'num'
+
+    raise RuleCompileError(f'不支持的表达式: {type(node).__name__}')
+
+
+def _compile_compare(node, fields):
+    """编译（可链式的）比较表达式，任一侧为空值时结果为 False"""
+    nodes = [node.left] + list(node.comparators)
+    operands = [_compile_node(n, fields) for n in nodes]
+    steps = []
+    for i, op_node in enumerate(node.ops):
+        (left, lkind), (right, rkind) = operands[i], operands[i + 1]
+        if isinstance(op_node, (ast.In, ast.NotIn)):
+            if not isinstance(nodes[i], ast.Constant) or lkind != 'text' or rkind != 'text':
+                raise RuleCompileError('in 只能用于文本常量，例如 "300" in symbol')
+            steps.append(_contains_step(left, right, negate=isinstance(op_node, ast.NotIn)))
+            continue
+        cmp = _AST_COMPARE_OPS.get(type(op_node))
+        if cmp is None:
+            raise RuleCompileError('不支持的比较运算')
+        if lkind != rkind:
+            raise RuleCompileError('比较两侧类型不一致（数值与文本不能直接比较）')
+        if lkind == 'text' and cmp not in (operator.eq, operator.ne):
+            raise RuleCompileError('文本只支持 == / != 比较')
+        steps.append(_compare_step(left, right, cmp))
+
+    def evaluator(frame):
+        result = steps[0](frame)
+        for step in steps[1:]:
+            result = result & step(frame)
+        return result
+    return evaluator
+
+
+def _notna(value):
+    if np.isscalar(value):
+        return not pd.isna(value)
+    return value.notna()
+
+
+def _compare_step(left, right, cmp):
+    def step(frame):
+        lv, rv = left(frame), right(frame)
+        return _as_bool(cmp(lv, rv), frame) & _as_bool(_notna(lv), frame) & _as_bool(_notna(rv), frame)
+    return step
+
+
+def _contains_step(needle, haystack, negate):
+    def step(frame):
+        hv, nv = haystack(frame), needle(frame)
+        if np.isscalar(hv):
+            found = nv in hv
+            return _as_bool(not found if negate else found, frame)
+        found = hv.astype(str).str.contains(nv, regex=False)
+        return hv.notna() & (~found if negate else found)
+    return step
+
+
+def _as_bool(value, frame):
+    """将标量或 Series 统一为与候选表对齐的布尔 Series"""
+    if np.isscalar(value):
+        return pd.Series(bool(value), index=frame.index)
+    return value.fillna(False).astype(bool)
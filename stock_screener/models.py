@@ -4,48 +4,41 @@
 条件选股记录持久化管理
 
 将每次筛选条件与结果摘要保存到 SQLite，支持历史回看。
+股票代码列表与完整结果以 zlib 压缩的紧凑 JSON 存为 BLOB，
+旧版本写入的明文 JSON 仍可正常读取。
+超过保留期的记录由维护任务移入月度归档，查询接口透明地读取归档。
+新增或删除记录时递增进程间共享缓存中的版本号，仪表盘等缓存据此失效。
 """
 
 import sqlite3
 import json
-import os
+import zlib
+import base64
 from datetime import datetime
 
+from backend.services.database import get_database
+from backend.services.maintenance import get_archive_store
+from backend.services.shared_cache import get_shared_cache
+
+
+# 共享缓存中的版本键
+CACHE_KEY = 'screener_records'
+
 
 class ScreenerRecordManager:
     """选股记录管理器"""
 
     def __init__(self, db_path="data/cchan_web.db"):
         self.db_path = db_path
-        self._ensure_table()
+        # screener_records 表结构与索引由 services.database 统一维护
+        self.db = get_database(db_path)
+        self.archive = get_archive_store(db_path)
+        self.cache = get_shared_cache(db_path)
 
-    # ------------------------------------------------------------------
-    # 建表
-    # ------------------------------------------------------------------
-    def _ensure_table(self):
-        """确保 screener_records 表存在，并包含 result_data 列"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS screener_records (
-                id          INTEGER PRIMARY KEY AUTOINCREMENT,
-                name        TEXT NOT NULL,
-                conditions  TEXT NOT NULL,
-                result_count INTEGER DEFAULT 0,
-                result_symbols TEXT,
-                result_summary TEXT,
-                result_data TEXT,
-                preset_key  TEXT,
-                created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        # 兼容旧表：如果 result_data 列不存在则添加
-        try:
-            cursor.execute("SELECT result_data FROM screener_records LIMIT 1")
-        except sqlite3.OperationalError:
-            cursor.execute("ALTER TABLE screener_records ADD COLUMN result_data TEXT")
-        conn.commit()
-        conn.close()
+    @property
+    def version(self):
+        """记录列表版本号，任一进程新增或删除记录后递增"""
+        return self.cache.version(CACHE_KEY)
 
     # ------------------------------------------------------------------
     # 写入
@@ -63,90 +56,131 @@ class ScreenerRecordManager:
         summary = self._build_summary(results)
         full_data = self._serialize_results(results)
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO screener_records
-                (name, conditions, result_count, result_symbols,
-                 result_summary, result_data, preset_key, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            name,
-            json.dumps(conditions, ensure_ascii=False),
-            len(results),
-            json.dumps(symbols, ensure_ascii=False),
-            json.dumps(summary, ensure_ascii=False),
-            json.dumps(full_data, ensure_ascii=False),
-            conditions.get('_preset_key', ''),
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        ))
-        record_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return record_id
+        with self.db.transaction() as conn:
+            cursor = conn.execute('''
+                INSERT INTO screener_records
+                    (name, conditions, result_count, result_symbols,
+                     result_summary, result_data, preset_key, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                name,
+                self._dumps(conditions),
+                len(results),
+                self._pack(symbols),
+                self._dumps(summary),
+                self._pack(full_data),
+                conditions.get('_preset_key', ''),
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            ))
+        self.cache.invalidate(CACHE_KEY)
+        return cursor.lastrowid
 
     # ------------------------------------------------------------------
     # 查询
     # ------------------------------------------------------------------
-    def get_records(self, limit=50):
+    def get_records(self, limit=50, cursor=None):
         """
         获取历史选股记录（列表不含完整 result_data 以节省带宽）
 
+        采用键集分页：cursor 为上一页最后一条记录的游标（见 make_cursor），
+        翻页时沿 (created_at, id) 索引直接定位，不随翻页深度变慢。
+        库内记录不足一页时继续从归档补齐（归档记录一定早于库内记录）。
+
         @param {int} limit - 最大返回条数
+        @param {str} cursor - 上一页返回的游标，为空时从最新记录开始
         @returns {list[dict]} 记录列表，按创建时间降序
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
+        sql = '''
             SELECT id, name, conditions, result_count, result_symbols,
                    result_summary, preset_key, created_at
             FROM screener_records
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (limit,))
+        '''
+        params = []
+        position = self.parse_cursor(cursor)
+        if position:
+            sql += ' WHERE (created_at, id) < (?, ?)'
+            params.extend(position)
+        sql += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+        params.append(limit)
+
+        rows = self.db.query(sql, params)
 
-        columns = [desc[0] for desc in cursor.description]
-        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        conn.close()
+        if len(rows) < limit:
+            before = (rows[-1]['created_at'], rows[-1]['id']) if rows else position
+            for row in self.archive.iter_newest('screener_records', before=before):
+                row.pop('result_data', None)
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
 
         for row in rows:
-            row['conditions'] = json.loads(row['conditions']) if row['conditions'] else {}
-            row['result_symbols'] = json.loads(row['result_symbols']) if row['result_symbols'] else []
-            row['result_summary'] = json.loads(row['result_summary']) if row['result_summary'] else {}
+            row['conditions'] = self._unpack(row['conditions'], {})
+            row['result_symbols'] = self._unpack(row['result_symbols'], [])
+            row['result_summary'] = self._unpack(row['result_summary'], {})
 
         return rows
 
-    def get_record_by_id(self, record_id):
+    def get_record_by_id(self, record_id, include_data=True):
         """
-        按 id 获取单条记录（包含完整 result_data）
+        按 id 获取单条记录
 
         @param {int} record_id
+        @param {bool} include_data - 是否读取并解码完整 result_data（体积较大，按需加载）
         @returns {dict|None}
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, name, conditions, result_count, result_symbols,
-                   result_summary, result_data, preset_key, created_at
-            FROM screener_records
-            WHERE id = ?
-        ''', (record_id,))
+        columns = ['id', 'name', 'conditions', 'result_count', 'result_symbols',
+                   'result_summary', 'preset_key', 'created_at']
+        if include_data:
+            columns.append('result_data')
 
-        row = cursor.fetchone()
-        conn.close()
+        row = self.db.connect().execute(
+            f"SELECT {', '.join(columns)} FROM screener_records WHERE id = ?",
+            (record_id,)
+        ).fetchone()
 
-        if not row:
-            return None
+        if row:
+            record = dict(zip(columns, row))
+        else:
+            record = self.archive.find('screener_records', id=record_id)
+            if not record:
+                return None
+            record = {key: record.get(key) for key in columns}
 
-        columns = ['id', 'name', 'conditions', 'result_count', 'result_symbols',
-                    'result_summary', 'result_data', 'preset_key', 'created_at']
-        record = dict(zip(columns, row))
-        record['conditions'] = json.loads(record['conditions']) if record['conditions'] else {}
-        record['result_symbols'] = json.loads(record['result_symbols']) if record['result_symbols'] else []
-        record['result_summary'] = json.loads(record['result_summary']) if record['result_summary'] else {}
-        record['result_data'] = json.loads(record['result_data']) if record.get('result_data') else []
+        record['conditions'] = self._unpack(record['conditions'], {})
+        record['result_symbols'] = self._unpack(record['result_symbols'], [])
+        record['result_summary'] = self._unpack(record['result_summary'], {})
+        if include_data:
+            record['result_data'] = self._unpack(record['result_data'], [])
         return record
 
+    @staticmethod
+    def make_cursor(record):
+        """
+        由记录生成翻页游标
+
+        @param {dict} record - get_records 返回的记录
+        @returns {str}
+        """
+        raw = f"{record['created_at']}|{record['id']}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def parse_cursor(cursor):
+        """
+        解析翻页游标
+
+        @param {str} cursor
+        @returns {tuple|None} (created_at, id)，游标非法时返回 None
+        """
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            created_at, record_id = raw.rsplit('|', 1)
+            return created_at, int(record_id)
+        except (ValueError, UnicodeError):
+            return None
+
     def delete_record(self, record_id):
         """
         删除一条选股记录
@@ -154,17 +188,34 @@ class ScreenerRecordManager:
         @param {int} record_id
         @returns {bool}
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM screener_records WHERE id = ?', (record_id,))
-        affected = cursor.rowcount
-        conn.commit()
-        conn.close()
-        return affected > 0
+        with self.db.transaction() as conn:
+            cursor = conn.execute('DELETE FROM screener_records WHERE id = ?', (record_id,))
+        if cursor.rowcount:
+            self.cache.invalidate(CACHE_KEY)
+        return cursor.rowcount > 0
 
     # ------------------------------------------------------------------
     # 辅助
     # ------------------------------------------------------------------
+    @staticmethod
+    def _dumps(value):
+        """紧凑 JSON 文本"""
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def _pack(cls, value):
+        """紧凑 JSON + zlib 压缩，存为 BLOB"""
+        return sqlite3.Binary(zlib.compress(cls._dumps(value).encode('utf-8'), 6))
+
+    @staticmethod
+    def _unpack(value, default):
+        """解码列值：兼容压缩 BLOB 与旧版明文 JSON"""
+        if not value:
+            return default
+        if isinstance(value, (bytes, memoryview)):
+            value = zlib.decompress(bytes(value)).decode('utf-8')
+        return json.loads(value)
+
     @staticmethod
     def _serialize_results(results):
         """
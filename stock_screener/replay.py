@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+条件选股历史回放
+
+在 stock_recommendations 中保存的每日候选池上批量回放筛选条件：
+一次查询取出整个区间的数据，用列式筛选引擎一次性计算所有交易日的命中，
+再按本地日线的交易日轴计算命中股票的 T+N 前瞻收益。
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.services.bar_store import get_bar_store
+from backend.services.database import get_database
+from stock_screener.screener import StockScreener
+
+
+class ScreenerReplay:
+    """选股条件历史回放引擎"""
+
+    DEFAULT_HORIZONS = (1, 3, 5)
+
+    def __init__(self, db_path="data/cchan_web.db", price_provider=None):
+        """
+        @param {str} db_path - 数据库路径
+        @param {callable} price_provider - 可选的价格来源 (symbols, start_date) -> DataFrame，
+                                           行为交易日、列为股票代码的收盘价表；
+                                           缺省为本地日线库的 BarStore.load_panel
+        """
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.price_provider = price_provider or get_bar_store(db_path).load_panel
+        self.screener = StockScreener()
+
+    # ------------------------------------------------------------------
+    # 回放
+    # ------------------------------------------------------------------
+    def replay(self, condition_sets, start_date=None, end_date=None, horizons=DEFAULT_HORIZONS):
+        """
+        在历史候选池上回放多组条件
+
+        @param {dict} condition_sets - {key: conditions}
+        @param {str} start_date - 起始日期 YYYY-MM-DD，缺省为 90 天前
+        @param {str} end_date - 截止日期 YYYY-MM-DD，缺省为今天
+        @param {tuple} horizons - 前瞻收益天数（按交易日计）
+        @returns {dict} {key: {'summary': {...}, 'days': [...], 'matches': [...]}}
+        """
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        start_date = start_date or (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
+
+        history = self.load_history(start_date, end_date)
+        if history.empty:
+            return {key: self._empty_result(horizons) for key in condition_sets}
+
+        masks = self.screener.evaluate_masks(history, condition_sets)
+        forward = self._forward_returns(history, start_date, horizons)
+
+        results = {}
+        for key, mask in masks.items():
+            matches = history.loc[mask, ['date', 'symbol', 'stock_name', 'current_price',
+                                         'total_score', 'confidence']].copy()
+            for h in horizons:
+                col = f'ret_{h}d'
+                matches[col] = forward[col].loc[mask].to_numpy() if len(matches) else []
+            results[key] = self._summarize(matches, horizons)
+        return results
+
+    def replay_presets(self, preset_keys=None, **kwargs):
+        """
+        回放预置模板
+
+        @param {list} preset_keys - 模板 key 列表，为空时回放全部模板
+        @returns {dict} 同 replay
+        """
+        keys = preset_keys or list(StockScreener.PRESET_TEMPLATES.keys())
+        condition_sets = {
+            key: StockScreener.PRESET_TEMPLATES[key]['conditions']
+            for key in keys if key in StockScreener.PRESET_TEMPLATES
+        }
+        return self.replay(condition_sets, **kwargs)
+
+    # ------------------------------------------------------------------
+    # 数据加载
+    # ------------------------------------------------------------------
+    def load_history(self, start_date, end_date):
+        """一次查询加载区间内全部每日候选池"""
+        history = pd.read_sql_query(
+            '''
+            SELECT * FROM stock_recommendations
+            WHERE date BETWEEN ? AND ?
+            ORDER BY date, total_score DESC
+            ''',
+            self.db.connect(), params=(start_date, end_date)
+        )
+        return history.reset_index(drop=True)
+
+    def load_price_panel(self, symbols, start_date):
+        """
+        加载收盘价面板（行: 交易日，列: 股票代码）
+
+        缺省取本地日线库（BarStore.load_panel）的完整日线；停牌等缺失日为 NaN，对应收益不计入样本
+        """
+        return self.price_provider(symbols, start_date)
+
+    # ------------------------------------------------------------------
+    # 计算
+    # ------------------------------------------------------------------
+    def _forward_returns(self, history, start_date, horizons):
+        """按交易日轴计算每行 (date, symbol) 的 T+N 收益"""
+        forward = pd.DataFrame(index=history.index)
+        symbols = sorted(history['symbol'].dropna().unique().tolist())
+        panel = self.load_price_panel(symbols, start_date) if symbols else pd.DataFrame()
+
+        keys = pd.MultiIndex.from_arrays([history['date'], history['symbol']])
+        for h in horizons:
+            col = f'ret_{h}d'
+            if panel.empty:
+                forward[col] = np.nan
+                continue
+            returns = (panel.shift(-h) / panel - 1).stack()
+            forward[col] = returns.reindex(keys).to_numpy()
+        return forward
+
+    @staticmethod
+    def _summarize(matches, horizons):
+        """汇总命中明细：整体统计 + 逐日统计"""
+        ret_cols = [f'ret_{h}d' for h in horizons]
+        summary = {
+            'match_count': int(len(matches)),
+            'matched_days': int(matches['date'].nunique()) if len(matches) else 0,
+        }
+        for col in ret_cols:
+            series = matches[col].dropna() if len(matches) else pd.Series(dtype=float)
+            summary[f'avg_{col}'] = round(float(series.mean()), 4) if len(series) else None
+            summary[f'win_rate_{col}'] = round(float((series > 0).mean()), 4) if len(series) else None
+            summary[f'samples_{col}'] = int(len(series))
+
+        days = []
+        if len(matches):
+            grouped = matches.groupby('date')
+            day_frame = grouped.size().rename('match_count').to_frame()
+            for col in ret_cols:
+                day_frame[f'avg_{col}'] = grouped[col].mean()
+            day_frame = day_frame.reset_index()
+            days = day_frame.round(4).astype(object).where(day_frame.notna(), None).to_dict('records')
+
+        records = matches.round(4).astype(object).where(matches.notna(), None).to_dict('records')
+        return {'summary': summary, 'days': days, 'matches': records}
+
+    @staticmethod
+    def _empty_result(horizons):
+        summary = {'match_count': 0, 'matched_days': 0}
+        for h in horizons:
+            summary[f'avg_ret_{h}d'] = None
+            summary[f'win_rate_ret_{h}d'] = None
+            summary[f'samples_ret_{h}d'] = 0
+        return {'summary': summary, 'days': [], 'matches': []}
@@ -14,12 +14,15 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import json
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+from stock_screener.expression import compile_rule
+
 
 class StockScreener:
     """同花顺风格条件选股引擎"""
@@ -78,7 +81,12 @@ class StockScreener:
         },
     }
 
-    def __init__(self):
+    def __init__(self, search_index=None):
+        """
+        @param {StockSearchIndex} search_index - 可选的全市场搜索索引，
+                                                 提供时关键词过滤走索引（支持拼音首字母）
+        """
+        self.search_index = search_index
         self.last_results = []
 
     def screen(self, stock_list, conditions):
@@ -89,15 +97,73 @@ class StockScreener:
         @param {dict} conditions - 筛选条件字典
         @returns {list} 符合条件的股票列表，按 total_score 降序
         """
-        results = []
-        for stock in stock_list:
-            if self._match(stock, conditions):
-                results.append(stock)
-
-        results.sort(key=lambda x: x.get('total_score', 0), reverse=True)
+        results = self.screen_many(stock_list, {'_': conditions})['_']
         self.last_results = results
         return results
 
+    def screen_many(self, stock_list, condition_sets):
+        """
+        单次扫描候选池，同时评估多组筛选条件
+
+        候选池只转换一次为列式表，各组条件拆分为原子谓词后按谓词去重，
+        相同的谓词（如多个模板共有的 total_score_min=0.6）只计算一次。
+
+        @param {list} stock_list - 待筛选的股票字典列表
+        @param {dict} condition_sets - {key: conditions} 多组筛选条件
+        @returns {dict} {key: 符合条件的股票列表（按 total_score 降序）}
+        """
+        if not stock_list:
+            return {key: [] for key in condition_sets}
+
+        frame = pd.DataFrame.from_records(stock_list)
+        masks = self.evaluate_masks(frame, condition_sets)
+        # 同分时保持候选池原有顺序（与 list.sort 稳定排序一致）
+        scores = self._numeric_column(frame, 'total_score', 0)
+        order = np.lexsort((np.arange(len(frame)), -scores.to_numpy()))
+
+        return {
+            key: [stock_list[i] for i in order if mask[i]]
+            for key, mask in masks.items()
+        }
+
+    def evaluate_masks(self, frame, condition_sets):
+        """
+        在列式候选表上计算多组条件的布尔掩码（相同谓词只计算一次）
+
+        候选表可以包含多个交易日的数据，条件逐行生效，适合历史回放等批量场景。
+
+        @param {DataFrame} frame - 候选股票列式表
+        @param {dict} condition_sets - {key: conditions}
+        @returns {dict} {key: ndarray[bool]}
+        """
+        predicate_cache = {}
+        masks = {}
+        for key, conditions in condition_sets.items():
+            mask = np.ones(len(frame), dtype=bool)
+            for predicate in self._decompose(conditions or {}):
+                if predicate not in predicate_cache:
+                    predicate_cache[predicate] = self._eval_predicate(frame, predicate)
+                mask &= predicate_cache[predicate]
+                if not mask.any():
+                    break
+            masks[key] = mask
+        return masks
+
+    def screen_presets(self, stock_list, preset_keys=None):
+        """
+        单次扫描评估多个预置模板
+
+        @param {list} stock_list - 待筛选的股票字典列表
+        @param {list} preset_keys - 模板 key 列表，为空时评估全部模板
+        @returns {dict} {preset_key: 符合条件的股票列表}
+        """
+        keys = preset_keys or list(self.PRESET_TEMPLATES.keys())
+        condition_sets = {
+            key: self.PRESET_TEMPLATES[key]['conditions']
+            for key in keys if key in self.PRESET_TEMPLATES
+        }
+        return self.screen_many(stock_list, condition_sets)
+
     def screen_with_preset(self, stock_list, preset_key):
         """
         使用预置模板进行选股
@@ -129,131 +195,103 @@ class StockScreener:
         ]
 
     # ------------------------------------------------------------------
-    # 内部匹配逻辑
+    # 列式批量匹配
     # ------------------------------------------------------------------
 
-    def _match(self, stock, conditions):
-        """逐项检查条件是否全部满足"""
-
-        # --- 价格区间 ---
-        price = stock.get('current_price', 0)
-        if conditions.get('price_min') is not None and price < conditions['price_min']:
-            return False
-        if conditions.get('price_max') is not None and price > conditions['price_max']:
-            return False
-
-        # --- 综合评分 ---
-        total_score = stock.get('total_score', 0)
-        if conditions.get('total_score_min') is not None and total_score < conditions['total_score_min']:
-            return False
-        if conditions.get('total_score_max') is not None and total_score > conditions['total_score_max']:
-            return False
-
-        # --- 技术评分 ---
-        tech_score = stock.get('tech_score', 0)
-        if conditions.get('tech_score_min') is not None and tech_score < conditions['tech_score_min']:
-            return False
-        if conditions.get('tech_score_max') is not None and tech_score > conditions['tech_score_max']:
-            return False
-
-        # --- 竞价评分 ---
-        auction_score = stock.get('auction_score', 0)
-        if conditions.get('auction_score_min') is not None and auction_score < conditions['auction_score_min']:
-            return False
-        if conditions.get('auction_score_max') is not None and auction_score > conditions['auction_score_max']:
-            return False
-
-        # --- 竞价涨幅 ---
-        auction_ratio = stock.get('auction_ratio', 0)
-        if conditions.get('auction_ratio_min') is not None and auction_ratio < conditions['auction_ratio_min']:
-            return False
-        if conditions.get('auction_ratio_max') is not None and auction_ratio > conditions['auction_ratio_max']:
-            return False
-
-        # --- RSI ---
-        rsi = stock.get('rsi', 50)
-        if conditions.get('rsi_min') is not None and rsi < conditions['rsi_min']:
-            return False
-        if conditions.get('rsi_max') is not None and rsi > conditions['rsi_max']:
-            return False
-
-        # --- 市值范围 (亿) ---
-        market_cap = stock.get('market_cap_billion', 0)
-        if conditions.get('market_cap_min') is not None and market_cap < conditions['market_cap_min']:
-            return False
-        if conditions.get('market_cap_max') is not None and market_cap > conditions['market_cap_max']:
-            return False
-
-        # --- 跳空类型 ---
-        gap_types = conditions.get('gap_types')
-        if gap_types and stock.get('gap_type') not in gap_types:
-            return False
-
-        # --- 信心等级 ---
-        confidence_levels = conditions.get('confidence_levels')
-        if confidence_levels and stock.get('confidence') not in confidence_levels:
-            return False
-
-        # --- 市场/板块 ---
-        markets = conditions.get('markets')
-        if markets and stock.get('market') not in markets:
-            return False
-
-        # --- 关键词搜索（代码或名称） ---
-        keyword = conditions.get('keyword', '').strip()
-        if keyword:
-            symbol = stock.get('symbol', '')
-            name = stock.get('stock_name', '')
-            if keyword not in symbol and keyword not in name:
-                return False
+    # 数值区间条件: 条件前缀 -> (字段, 缺省值)
+    RANGE_FIELDS = {
+        'price': ('current_price', 0),
+        'total_score': ('total_score', 0),
+        'tech_score': ('tech_score', 0),
+        'auction_score': ('auction_score', 0),
+        'auction_ratio': ('auction_ratio', 0),
+        'rsi': ('rsi', 50),
+        'market_cap': ('market_cap_billion', 0),
+    }
+
+    FIELD_DEFAULTS = dict(RANGE_FIELDS.values())
 
-        # --- 手动输入自定义条件（custom_rules） ---
-        custom_rules = conditions.get('custom_rules', [])
-        for rule in custom_rules:
-            if not self._eval_custom_rule(stock, rule):
-                return False
+    # 枚举条件: 条件 key -> 字段
+    SET_FIELDS = {
+        'gap_types': 'gap_type',
+        'confidence_levels': 'confidence',
+        'markets': 'market',
+    }
 
-        return True
+    @staticmethod
+    def _numeric_column(frame, field, default):
+        """取数值列，缺失值按 FIELD_DEFAULTS 补齐"""
+        if field not in frame.columns:
+            return pd.Series(float(default), index=frame.index)
+        return pd.to_numeric(frame[field], errors='coerce').fillna(default)
 
     @staticmethod
-    def _eval_custom_rule(stock, rule):
+    def _text_column(frame, field):
+        """取文本列，缺失值为空字符串"""
+        if field not in frame.columns:
+            return pd.Series('', index=frame.index)
+        return frame[field].fillna('').astype(str)
+
+    def _decompose(self, conditions):
         """
-        评估单条手动输入的自定义规则
+        将条件字典拆分为可哈希的原子谓词元组
 
-        @param {dict} stock - 股票数据
-        @param {dict} rule  - 格式 {"field": "...", "op": "...", "value": ...}
-                               op 支持: gt / gte / lt / lte / eq / neq / contains
-        @returns {bool}
+        @param {dict} conditions - 筛选条件字典
+        @returns {list[tuple]} 谓词列表
         """
-        field = rule.get('field', '')
-        op = rule.get('op', '')
-        target = rule.get('value')
-        if not field or not op or target is None:
-            return True
-
-        actual = stock.get(field)
-        if actual is None:
-            return False
-
-        try:
-            if op in ('gt', 'gte', 'lt', 'lte', 'eq', 'neq'):
-                actual_num = float(actual)
-                target_num = float(target)
-                if op == 'gt':
-                    return actual_num > target_num
-                if op == 'gte':
-                    return actual_num >= target_num
-                if op == 'lt':
-                    return actual_num < target_num
-                if op == 'lte':
-                    return actual_num <= target_num
-                if op == 'eq':
-                    return actual_num == target_num
-                if op == 'neq':
-                    return actual_num != target_num
-            elif op == 'contains':
-                return str(target) in str(actual)
-        except (ValueError, TypeError):
-            return False
-
-        return True
+        predicates = []
+        for prefix, (field, _) in self.RANGE_FIELDS.items():
+            if conditions.get(f'{prefix}_min') is not None:
+                predicates.append(('ge', field, float(conditions[f'{prefix}_min'])))
+            if conditions.get(f'{prefix}_max') is not None:
+                predicates.append(('le', field, float(conditions[f'{prefix}_max'])))
+
+        for cond_key, field in self.SET_FIELDS.items():
+            values = conditions.get(cond_key)
+            if values:
+                # 单个字符串视为一个取值；列表中可能混有 null 或数字，按字符串形式排序以便去重与哈希
+                if isinstance(values, str):
+                    values = [values]
+                predicates.append(('in', field, tuple(sorted(set(values), key=str))))
+
+        keyword = (conditions.get('keyword') or '').strip()
+        if keyword:
+            predicates.append(('keyword', keyword))
+
+        for rule in conditions.get('custom_rules') or []:
+            predicates.append(('custom', json.dumps(rule, sort_keys=True, ensure_ascii=False)))
+
+        return predicates
+
+    def _eval_predicate(self, frame, predicate):
+        """计算单个原子谓词在整张候选表上的布尔掩码"""
+        kind = predicate[0]
+        if kind in ('ge', 'le'):
+            column = self._numeric_column(frame, predicate[1], self.FIELD_DEFAULTS[predicate[1]])
+            if kind == 'ge':
+                return (column >= predicate[2]).to_numpy()
+            return (column <= predicate[2]).to_numpy()
+        if kind == 'in':
+            if predicate[1] not in frame.columns:
+                # 缺少该字段的股票取值为 None
+                return np.full(len(frame), None in predicate[2], dtype=bool)
+            return frame[predicate[1]].isin(predicate[2]).to_numpy()
+        if kind == 'keyword':
+            keyword = predicate[1]
+            symbols = self._text_column(frame, 'symbol')
+            names = self._text_column(frame, 'stock_name')
+            if self.search_index is None:
+                return (symbols.str.contains(keyword, regex=False)
+                        | names.str.contains(keyword, regex=False)).to_numpy()
+            # 索引内的股票直接查倒排表，索引外的（如刚分析出的新股票）退回子串匹配
+            indexed = symbols.isin(self.search_index.match_symbols(keyword))
+            unindexed = ~symbols.map(self.search_index.__contains__).astype(bool)
+            fallback = unindexed & (symbols.str.contains(keyword, regex=False)
+                                    | names.str.contains(keyword, regex=False))
+            return (indexed | fallback).to_numpy()
+        if kind == 'custom':
+            compiled = compile_rule(json.loads(predicate[1]))
+            if compiled is None:
+                return np.ones(len(frame), dtype=bool)
+            return compiled.evaluate(frame)
+        return np.ones(len(frame), dtype=bool)
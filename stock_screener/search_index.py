@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票搜索索引
+
+在全市场股票列表上预先构建三类索引，供条件选股关键词过滤和输入联想共用：
+- 代码前缀:  "3007"  -> 300750 宁德时代
+- 名称子串:  "德时"  -> 宁德时代（一元/二元 n-gram 倒排）
+- 拼音首字母: "ndsd"  -> 宁德时代（需安装 pypinyin，未安装时自动跳过）
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+
+from backend.services.database import get_database
+
+
+UNIVERSE_FILE = "data/stock_universe.json"
+
+# 匹配类型及排序优先级（数值越小越靠前）
+MATCH_RANK = {
+    'code_exact': 0,
+    'code_prefix': 1,
+    'name_prefix': 2,
+    'pinyin_prefix': 3,
+    'substring': 4,
+}
+
+
+def _pinyin_initials(name):
+    """返回股票名称的拼音首字母（小写），pypinyin 不可用时返回空串"""
+    try:
+        from pypinyin import lazy_pinyin, Style
+    except ImportError:
+        return ''
+    letters = lazy_pinyin(name, style=Style.FIRST_LETTER, errors='default')
+    return ''.join(letters).lower()
+
+
+def _code_of(symbol):
+    """sz.300750 -> 300750"""
+    return symbol.split('.')[-1] if '.' in symbol else symbol
+
+
+class StockSearchIndex:
+    """股票代码 / 名称 / 拼音首字母索引"""
+
+    def __init__(self, entries):
+        """
+        @param {iterable} entries - (symbol, stock_name) 序列，重复 symbol 以首次出现为准
+        """
+        self._entries = []
+        self._symbol_set = set()
+        self._grams = {}
+        codes = []
+        initials = []
+
+        for symbol, name in entries:
+            if not symbol or symbol in self._symbol_set:
+                continue
+            name = name or ''
+            idx = len(self._entries)
+            code = _code_of(symbol)
+            pinyin = _pinyin_initials(name)
+            self._entries.append((symbol, name, code, pinyin))
+            self._symbol_set.add(symbol)
+
+            codes.append((code, idx))
+            if pinyin:
+                initials.append((pinyin, idx))
+
+            haystack = f'{symbol.lower()}\x00{name.lower()}'
+            for gram in self._iter_grams(haystack):
+                self._grams.setdefault(gram, set()).add(idx)
+
+        codes.sort()
+        initials.sort()
+        self._codes = codes
+        self._code_keys = [c for c, _ in codes]
+        self._initials = initials
+        self._initial_keys = [p for p, _ in initials]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, symbol):
+        return symbol in self._symbol_set
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def search(self, query, limit=10):
+        """
+        输入联想查询
+
+        @param {str} query - 代码前缀 / 名称片段 / 拼音首字母
+        @param {int} limit - 最大返回条数
+        @returns {list[dict]} 按匹配类型排序的结果
+        """
+        hits = self._collect(query)
+        ranked = sorted(hits.items(), key=lambda kv: (MATCH_RANK[kv[1]], self._entries[kv[0]][2]))
+        results = []
+        for idx, match in ranked[:limit]:
+            symbol, name, code, _ = self._entries[idx]
+            results.append({'symbol': symbol, 'stock_name': name, 'code': code, 'match': match})
+        return results
+
+    def match_symbols(self, keyword):
+        """
+        关键词过滤：返回代码或名称包含关键词、或拼音首字母以关键词开头的全部股票代码
+
+        @param {str} keyword
+        @returns {set[str]}
+        """
+        return {self._entries[idx][0] for idx in self._collect(keyword)}
+
+    def _collect(self, query):
+        """返回 {entry_idx: 最优匹配类型}"""
+        query = (query or '').strip()
+        if not query:
+            return {}
+        lowered = query.lower()
+        hits = {}
+
+        def mark(idx, match):
+            current = hits.get(idx)
+            if current is None or MATCH_RANK[match] < MATCH_RANK[current]:
+                hits[idx] = match
+
+        for idx in self._substring(lowered):
+            symbol, name, code, _ = self._entries[idx]
+            if code == lowered:
+                mark(idx, 'code_exact')
+            elif code.startswith(lowered):
+                mark(idx, 'code_prefix')
+            elif name.lower().startswith(lowered):
+                mark(idx, 'name_prefix')
+            else:
+                mark(idx, 'substring')
+
+        if lowered.isalpha() and lowered.isascii():
+            for idx in self._prefix_scan(self._initials, self._initial_keys, lowered):
+                mark(idx, 'pinyin_prefix')
+
+        return hits
+
+    def _substring(self, lowered):
+        """利用 n-gram 倒排表求候选集合，再逐一校验子串"""
+        grams = list(self._iter_grams(lowered)) if len(lowered) > 1 else [lowered]
+        grams = [g for g in grams if len(g) == min(2, len(lowered))]
+        candidates = None
+        for gram in grams:
+            posting = self._grams.get(gram)
+            if not posting:
+                return []
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return []
+        if candidates is None:
+            return []
+        if len(lowered) <= 2:
+            return candidates
+        return [idx for idx in candidates
+                if lowered in self._entries[idx][0].lower() or lowered in self._entries[idx][1].lower()]
+
+    @staticmethod
+    def _prefix_scan(pairs, keys, prefix):
+        start = bisect.bisect_left(keys, prefix)
+        for i in range(start, len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            yield pairs[i][1]
+
+    @staticmethod
+    def _iter_grams(text):
+        """一元 + 二元 gram（跳过代码与名称之间的分隔符）"""
+        for i, ch in enumerate(text):
+            if ch == '\x00':
+                continue
+            yield ch
+            if i + 1 < len(text) and text[i + 1] != '\x00':
+                yield text[i:i + 2]
+
+
+# ----------------------------------------------------------------------
+# 全市场索引（进程内缓存）
+# ----------------------------------------------------------------------
+# 以股票列表文件为失效依据：列表由分析任务在拉取全市场行情时整体写入（save_universe），
+# 推荐表每次写入都会变化，不作为重建条件；推荐表中列表外的股票在选股时退回子串匹配
+_index_lock = threading.Lock()
+_build_lock = threading.Lock()
+_indexes = {}      # (db_path, universe_path) -> (StockSearchIndex, signature)
+_rebuilding = {}   # (db_path, universe_path) -> 正在后台重建的线程
+
+
+def save_universe(entries, path=UNIVERSE_FILE):
+    """
+    保存全市场股票列表，供搜索索引使用
+
+    @param {list} entries - (symbol, stock_name) 列表
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump([[s, n] for s, n in entries], f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _universe_signature(universe_path):
+    try:
+        stat = os.stat(universe_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_entries(db_path, universe_path):
+    entries = []
+    if os.path.exists(universe_path):
+        try:
+            with open(universe_path, 'r', encoding='utf-8') as f:
+                entries.extend(tuple(item) for item in json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取股票列表失败: {e}")
+    try:
+        conn = get_database(db_path).connect()
+        entries.extend(conn.execute(
+            'SELECT symbol, MAX(stock_name) FROM stock_recommendations GROUP BY symbol'
+        ).fetchall())
+    except sqlite3.Error as e:
+        print(f"⚠️ 读取推荐股票失败: {e}")
+    return entries
+
+
+def _rebuild(key, signature):
+    """后台线程：构建新索引后替换缓存，构建期间请求继续使用旧索引"""
+    db_path, universe_path = key
+    try:
+        index = StockSearchIndex(_load_entries(db_path, universe_path))
+        with _index_lock:
+            _indexes[key] = (index, signature)
+        print(f"🔄 搜索索引已重建: {len(index)} 只股票")
+    except Exception as e:
+        print(f"⚠️ 搜索索引重建失败: {e}")
+    finally:
+        get_database(db_path).close()
+        with _index_lock:
+            _rebuilding.pop(key, None)
+
+
+def get_search_index(db_path="data/cchan_web.db", universe_path=UNIVERSE_FILE):
+    """
+    获取全市场搜索索引
+
+    首次调用时同步构建；之后股票列表文件有变化时在后台线程重建，重建完成前继续返回旧索引
+
+    @returns {StockSearchIndex}
+    """
+    key = (db_path, universe_path)
+    signature = _universe_signature(universe_path)
+    cached = _indexes.get(key)
+    if cached is None:
+        with _build_lock:
+            cached = _indexes.get(key)
+            if cached is None:
+                cached = (StockSearchIndex(_load_entries(db_path, universe_path)), signature)
+                with _index_lock:
+                    _indexes[key] = cached
+        return cached[0]
+
+    if cached[1] != signature:
+        with _index_lock:
+            if key not in _rebuilding:
+                worker = threading.Thread(target=_rebuild, args=(key, signature),
+                                          name='search-index-rebuild', daemon=True)
+                _rebuilding[key] = worker
+                worker.start()
+    return cached[0]